@@ -1,31 +1,53 @@
 # Importaciones necesarias para la interfaz y manejo de archivos, hilos y bases de datos
+import time
+_LAUNCH_TIME = time.time() # Momento en que empieza a cargarse app.py (para --medir-inicio)
 import customtkinter as ctk
 from tkinter import messagebox, filedialog, ttk
 import sys
 import io
 import os
+import json
 import threading
+import subprocess
 import sqlite3
-import pandas as pd
 from datetime import datetime # Para generar nombres de archivo únicos en la exportación
 import shutil # Importar shutil para copiar archivos
-
-# Importar funciones ETL de los módulos correspondientes
-try:
-    from etl_ciudades import run_etl_ciudades
-    from etl_famosos import run_etl_famosos
-    # Solo importamos run_etl_ubicacion, no las funciones de exportación o constantes específicas
-    from etl_ubicacion import run_etl_ubicacion
-except ImportError as e:
-    messagebox.showerror("Error de Importación",
-                         f"No se pudieron cargar los módulos ETL: {e}\n"
-                         "Asegúrate de que 'etl_ciudades.py', 'etl_famosos.py' y 'etl_ubicacion.py' "
-                         "estén en el mismo directorio que 'app.py'.")
-    sys.exit(1)
+from visor_datos import (PaginadorTabla, VisorTablaVirtual, OPERADORES_FILTRO, ORDENES_PARA_INDICE, FILAS_MINIMAS_INDICE,
+                         condicion_filtro, columna_indexada, filas_aproximadas, crear_indice_orden)
+from busqueda_texto import (es_tipo_texto, texto_a_consulta_fts, condicion_like, indice_fts_vigente,
+                            construir_indice_fts, adjuntar_cache_fts)
+from salida_log import SumideroLog, SalidaPorContexto, redirigir_salida
+from gestor_conexiones import GestorConexiones
+from metricas import ultima_ejecucion, etapa_mas_lenta, VARIABLE_MEDIR_MEMORIA
+from perfilado import perfilar, modos_solicitados, VARIABLE_PERFILAR
+from exportacion import (exportar_tabla_csv, exportar_tabla_excel, exportar_tablas_csv_en_paralelo,
+                         copiar_base_datos, formatear_progreso)
+
+# Los módulos ETL (y con ellos pandas y sqlalchemy) no se importan aquí: cada proceso ETL se ejecuta
+# en su propio intérprete con ejecutar_etl.py (ver EtlApp.run_etl_process)
+_IMPORTS_DONE_TIME = time.time()
 
 class EtlApp(ctk.CTk):
-    def __init__(self):
+    # Opciones de división del CSV exportado: texto del selector -> tamaño de cada parte en MB
+    CSV_SPLIT_OPTIONS = {
+        "CSV sin dividir": None,
+        "Partes de 100 MB": 100,
+        "Partes de 1 GB": 1024,
+    }
+    # Procesos ETL: nombre en la interfaz -> nombre en ejecutar_etl.py
+    ETL_PROCESSES = {
+        "Ciudades": "ciudades",
+        "Famosos": "famosos",
+        "Ubicacion": "ubicacion",
+    }
+    # Script que ejecuta cada ETL en un proceso aparte (así los tres pueden correr a la vez)
+    ETL_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ejecutar_etl.py")
+
+    def __init__(self, measure_startup=False):
         super().__init__()
+        # Con --medir-inicio se registran los tiempos de arranque y la aplicación se cierra al cargar la primera tabla
+        self.measure_startup = measure_startup
+        self.startup_times = {"lanzamiento": _LAUNCH_TIME, "importaciones": _IMPORTS_DONE_TIME}
 
         # Configuración de la ventana principal
         self.title("Aplicación de Procesos ETL & Visor DB")
@@ -53,6 +75,10 @@ class EtlApp(ctk.CTk):
             print("Además, verifica que el archivo .ico contenga múltiples resoluciones para una mejor compatibilidad con la barra de tareas.")
 
         self.current_db_path = None
+        # Conexiones de solo lectura y caché de tablas/columnas/conteos por base de datos (ver gestor_conexiones.py)
+        self.db_connections = GestorConexiones()
+        # (ruta, firma) de la base de datos cuyas tablas están cargadas en el selector
+        self.loaded_db_signature = None
 
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
@@ -75,8 +101,7 @@ class EtlApp(ctk.CTk):
         tab_etl = self.tab_view.tab("Procesos ETL")
         tab_etl.grid_rowconfigure(0, weight=0)
         tab_etl.grid_rowconfigure(1, weight=0)
-        tab_etl.grid_rowconfigure(2, weight=0)
-        tab_etl.grid_rowconfigure(3, weight=1)
+        tab_etl.grid_rowconfigure(2, weight=1)
         tab_etl.grid_columnconfigure((0,1,2), weight=1)
 
         # Título de la pestaña ETL
@@ -119,24 +144,88 @@ class EtlApp(ctk.CTk):
                                            text_color=self.TEXT_COLOR)
         self.btn_ubicacion.grid(row=0, column=2, padx=15, pady=10, sticky="ew")
 
-        # Barra de progreso para los procesos ETL
-        self.progress_bar = ctk.CTkProgressBar(tab_etl, orientation="horizontal", height=12, corner_radius=8,
-                                                fg_color=self.BORDER_COLOR, progress_color=self.ACCENT_PRIMARY)
-        self.progress_bar.grid(row=2, column=0, columnspan=3, padx=30, pady=10, sticky="ew")
-        self.progress_bar.set(0)
-
-        # Área de logs para mostrar la salida de los procesos ETL
-        self.output_log = ctk.CTkTextbox(tab_etl, wrap="word",
-                                        font=ctk.CTkFont(family="Consolas", size=12),
-                                        corner_radius=10, fg_color=self.BG_SECONDARY,
-                                        text_color=self.TEXT_COLOR, border_color=self.BORDER_COLOR, border_width=2)
-        self.output_log.grid(row=3, column=0, columnspan=3, padx=30, pady=15, sticky="nsew")
+        # Botón para ejecutar los tres procesos a la vez
+        self.btn_run_all = ctk.CTkButton(process_frame, text="🚀 Ejecutar todos",
+                                         command=self.run_all_etl_processes,
+                                         height=button_height, corner_radius=button_radius,
+                                         font=button_font, fg_color=self.ACCENT_PRIMARY, hover_color=self.ACCENT_HOVER,
+                                         text_color=self.TEXT_COLOR)
+        self.btn_run_all.grid(row=1, column=0, columnspan=2, rowspan=4, padx=15, pady=(0, 10), sticky="ew")
+
+        # Medir la memoria de cada etapa con tracemalloc (los ETL tardan bastante más, ver metricas.py)
+        self.measure_memory_switch = ctk.CTkSwitch(process_frame, text="Medir memoria (más lento)",
+                                                   text_color=self.TEXT_COLOR, progress_color=self.ACCENT_PRIMARY)
+        self.measure_memory_switch.grid(row=1, column=2, padx=15, pady=(0, 5), sticky="w")
+        # Perfilar los ETL y las acciones del visor con cProfile y tracemalloc (ver perfilado.py).
+        # Empieza activado si la variable de entorno ETL_PERFILAR lo pide
+        self.profile_switch = ctk.CTkSwitch(process_frame, text="Perfilar (cProfile + tracemalloc)",
+                                            text_color=self.TEXT_COLOR, progress_color=self.ACCENT_PRIMARY)
+        self.profile_switch.grid(row=2, column=2, padx=15, pady=(0, 5), sticky="w")
+        if modos_solicitados():
+            self.profile_switch.select()
+        # Recargar aunque las entradas y el código no hayan cambiado (si no, el ETL se omite, ver manifiesto.py)
+        self.force_reload_switch = ctk.CTkSwitch(process_frame, text="Forzar recarga",
+                                                 text_color=self.TEXT_COLOR, progress_color=self.ACCENT_PRIMARY)
+        self.force_reload_switch.grid(row=3, column=2, padx=15, pady=(0, 5), sticky="w")
+        # Ciudades: insertar o actualizar solo las filas nuevas o modificadas en lugar de reescribir la tabla
+        self.incremental_switch = ctk.CTkSwitch(process_frame, text="Ciudades: carga incremental",
+                                                text_color=self.TEXT_COLOR, progress_color=self.ACCENT_PRIMARY)
+        self.incremental_switch.grid(row=4, column=2, padx=15, pady=(0, 10), sticky="w")
+        self.etl_buttons = {"Ciudades": self.btn_ciudades, "Famosos": self.btn_famosos, "Ubicacion": self.btn_ubicacion}
+
+        # Paneles de log: uno general y uno por proceso ETL, con su barra de progreso y su estado
+        self.log_tabs = ctk.CTkTabview(tab_etl, corner_radius=10, fg_color=self.BG_SECONDARY,
+                                       segmented_button_selected_color=self.ACCENT_PRIMARY,
+                                       segmented_button_selected_hover_color=self.ACCENT_HOVER,
+                                       segmented_button_unselected_color=self.BG_SECONDARY,
+                                       segmented_button_unselected_hover_color=self.BORDER_COLOR,
+                                       text_color=self.TEXT_COLOR)
+        self.log_tabs.grid(row=2, column=0, columnspan=3, padx=30, pady=(0, 15), sticky="nsew")
+
+        # Área de logs general (exportaciones, descargas y mensajes que no son de un proceso ETL)
+        tab_general = self.log_tabs.add("General")
+        tab_general.grid_rowconfigure(0, weight=1)
+        tab_general.grid_columnconfigure(0, weight=1)
+        self.output_log = self.create_log_textbox(tab_general)
+        self.output_log.grid(row=0, column=0, padx=5, pady=5, sticky="nsew")
         self.output_log.insert("end", "Esperando la selección de un proceso ETL...\n")
         self.output_log.configure(state="disabled")
 
-        # Redirigir stdout a la caja de logs
+        # Los hilos solo encolan texto; el hilo principal lo vuelca en la caja por lotes (ver salida_log.py)
+        self.log_sink = SumideroLog(self.output_log, self)
+
+        # Cada proceso ETL escribe en su propio panel y en su propio archivo de log
+        self.etl_panels = {}
+        for process_name, pipeline in self.ETL_PROCESSES.items():
+            tab = self.log_tabs.add(process_name)
+            tab.grid_rowconfigure(1, weight=1)
+            tab.grid_columnconfigure(1, weight=1)
+            status_label = ctk.CTkLabel(tab, text="Sin ejecutar", text_color=self.TEXT_COLOR, anchor="w", width=220)
+            status_label.grid(row=0, column=0, padx=5, pady=5, sticky="w")
+            progress_bar = ctk.CTkProgressBar(tab, orientation="horizontal", height=12, corner_radius=8,
+                                              fg_color=self.BORDER_COLOR, progress_color=self.ACCENT_PRIMARY)
+            progress_bar.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+            progress_bar.set(0)
+            log_textbox = self.create_log_textbox(tab)
+            log_textbox.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="nsew")
+            log_textbox.configure(state="disabled")
+            # Resumen de las métricas de la última ejecución (ver metricas.py)
+            metrics_label = ctk.CTkLabel(tab, text="", text_color=self.TEXT_COLOR, anchor="w")
+            metrics_label.grid(row=2, column=0, columnspan=2, padx=5, pady=(0, 5), sticky="ew")
+            self.etl_panels[process_name] = {
+                "status": status_label,
+                "progress": progress_bar,
+                "metrics": metrics_label,
+                "log": SumideroLog(log_textbox, self, archivo_log=f"registro_etl_{pipeline}.log"),
+            }
+        # Procesos ETL en ejecución: nombre -> subprocess.Popen (None mientras se lanza)
+        self.etl_running = {}
+        self.closing = False
+
+        # Redirigir stdout a los paneles de log: cada hilo de ETL escribe en el suyo y el resto en el general
         self.original_stdout = sys.stdout
-        sys.stdout = self
+        self.output_router = SalidaPorContexto(self.log_sink)
+        sys.stdout = self.output_router
 
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
@@ -145,7 +234,8 @@ class EtlApp(ctk.CTk):
         tab_db = self.tab_view.tab("Visualizar DB")
         tab_db.grid_rowconfigure(0, weight=0) # Controles de DB
         tab_db.grid_rowconfigure(1, weight=0) # Controles de Exportación
-        tab_db.grid_rowconfigure(2, weight=1) # Treeview
+        tab_db.grid_rowconfigure(2, weight=0) # Búsqueda y filtros
+        tab_db.grid_rowconfigure(3, weight=1) # Treeview
         tab_db.grid_columnconfigure(0, weight=1)
 
         # Frame de controles para seleccionar y abrir bases de datos
@@ -193,7 +283,7 @@ class EtlApp(ctk.CTk):
         # --- Frame para las opciones de exportación de tabla ---
         export_frame = ctk.CTkFrame(tab_db, corner_radius=15, fg_color=self.BG_SECONDARY, border_color=self.BORDER_COLOR, border_width=2)
         export_frame.grid(row=1, column=0, padx=30, pady=15, sticky="ew")
-        export_frame.grid_columnconfigure((0,1,2), weight=1)
+        export_frame.grid_columnconfigure((0,1,2,3), weight=1)
 
         ctk.CTkLabel(export_frame, text="Exportar Tabla Actual:", font=label_font, text_color=self.TEXT_COLOR).grid(row=0, column=0, padx=10, pady=5, sticky="w")
         
@@ -210,9 +300,85 @@ class EtlApp(ctk.CTk):
                                               font=button_font, fg_color="#007bff", hover_color="#0069d9",
                                               text_color=self.TEXT_COLOR)
         self.btn_export_excel.grid(row=0, column=2, padx=10, pady=5, sticky="ew")
+
+        # División del CSV exportado en partes de N MB (para archivos muy grandes)
+        self.csv_split_selector = ctk.CTkOptionMenu(export_frame, values=list(self.CSV_SPLIT_OPTIONS),
+                                                    font=option_menu_font, fg_color=self.BG_SECONDARY, button_color=self.ACCENT_PRIMARY,
+                                                    button_hover_color=self.ACCENT_HOVER, dropdown_fg_color=self.BG_SECONDARY,
+                                                    dropdown_hover_color=self.BORDER_COLOR, text_color=self.TEXT_COLOR,
+                                                    corner_radius=small_button_radius)
+        self.csv_split_selector.grid(row=0, column=3, padx=10, pady=5, sticky="ew")
+        self.csv_split_selector.set("CSV sin dividir")
         # Por defecto deshabilitar los botones de exportación hasta que se seleccione una tabla válida
         self.set_export_buttons_state("disabled")
 
+        # --- Frame de búsqueda y filtros (se resuelven en SQLite, ver visor_datos.py y busqueda_texto.py) ---
+        filter_frame = ctk.CTkFrame(tab_db, corner_radius=15, fg_color=self.BG_SECONDARY, border_color=self.BORDER_COLOR, border_width=2)
+        filter_frame.grid(row=2, column=0, padx=30, pady=(0, 15), sticky="ew")
+        filter_frame.grid_columnconfigure((1, 5), weight=1)
+
+        ctk.CTkLabel(filter_frame, text="Buscar:", font=label_font, text_color=self.TEXT_COLOR).grid(row=0, column=0, padx=10, pady=5, sticky="w")
+        self.search_entry = ctk.CTkEntry(filter_frame, placeholder_text="Texto en cualquier columna de texto...",
+                                         font=option_menu_font, corner_radius=small_button_radius)
+        self.search_entry.grid(row=0, column=1, columnspan=2, padx=10, pady=5, sticky="ew")
+        self.search_entry.bind("<Return>", lambda event: self.apply_search())
+        self.btn_search = ctk.CTkButton(filter_frame, text="🔍 Buscar", command=self.apply_search,
+                                        height=small_button_height, corner_radius=small_button_radius,
+                                        font=button_font, fg_color=self.ACCENT_PRIMARY, hover_color=self.ACCENT_HOVER,
+                                        text_color=self.TEXT_COLOR)
+        self.btn_search.grid(row=0, column=3, padx=10, pady=5, sticky="ew")
+
+        # Crear índices en segundo plano para las columnas por las que se ordena a menudo
+        self.auto_index_switch = ctk.CTkSwitch(filter_frame, text="Índices automáticos al ordenar",
+                                               font=option_menu_font, text_color=self.TEXT_COLOR,
+                                               progress_color=self.ACCENT_PRIMARY)
+        self.auto_index_switch.grid(row=0, column=4, columnspan=2, padx=10, pady=5, sticky="w")
+        self.auto_index_switch.select()
+
+        ctk.CTkLabel(filter_frame, text="Filtrar:", font=label_font, text_color=self.TEXT_COLOR).grid(row=1, column=0, padx=10, pady=5, sticky="w")
+        self.filter_column_selector = ctk.CTkOptionMenu(filter_frame, values=["(Sin columnas)"],
+                                                        font=option_menu_font, fg_color=self.BG_SECONDARY, button_color=self.ACCENT_PRIMARY,
+                                                        button_hover_color=self.ACCENT_HOVER, dropdown_fg_color=self.BG_SECONDARY,
+                                                        dropdown_hover_color=self.BORDER_COLOR, text_color=self.TEXT_COLOR,
+                                                        corner_radius=small_button_radius)
+        self.filter_column_selector.grid(row=1, column=1, padx=10, pady=5, sticky="ew")
+        self.filter_operator_selector = ctk.CTkOptionMenu(filter_frame, values=list(OPERADORES_FILTRO),
+                                                          font=option_menu_font, fg_color=self.BG_SECONDARY, button_color=self.ACCENT_PRIMARY,
+                                                          button_hover_color=self.ACCENT_HOVER, dropdown_fg_color=self.BG_SECONDARY,
+                                                          dropdown_hover_color=self.BORDER_COLOR, text_color=self.TEXT_COLOR,
+                                                          corner_radius=small_button_radius)
+        self.filter_operator_selector.grid(row=1, column=2, padx=10, pady=5, sticky="ew")
+        self.filter_value_entry = ctk.CTkEntry(filter_frame, placeholder_text="Valor", font=option_menu_font,
+                                               corner_radius=small_button_radius)
+        self.filter_value_entry.grid(row=1, column=3, padx=10, pady=5, sticky="ew")
+        self.filter_value_entry.bind("<Return>", lambda event: self.add_column_filter())
+        self.btn_add_filter = ctk.CTkButton(filter_frame, text="➕ Filtro", command=self.add_column_filter,
+                                            height=small_button_height, corner_radius=small_button_radius,
+                                            font=button_font, fg_color=self.ACCENT_PRIMARY, hover_color=self.ACCENT_HOVER,
+                                            text_color=self.TEXT_COLOR)
+        self.btn_add_filter.grid(row=1, column=4, padx=10, pady=5, sticky="ew")
+        self.btn_clear_filters = ctk.CTkButton(filter_frame, text="🧹 Limpiar", command=self.clear_filters,
+                                               height=small_button_height, corner_radius=small_button_radius,
+                                               font=button_font, fg_color="#6c757d", hover_color="#5a6268",
+                                               text_color=self.TEXT_COLOR)
+        self.btn_clear_filters.grid(row=1, column=5, padx=10, pady=5, sticky="w")
+
+        # Etiqueta con los filtros activos
+        self.active_filters_label = ctk.CTkLabel(filter_frame, text="", font=ctk.CTkFont(family="Arial", size=12),
+                                                 text_color=self.TEXT_COLOR, anchor="w")
+        self.active_filters_label.grid(row=2, column=0, columnspan=6, padx=10, pady=(0, 5), sticky="ew")
+
+        # Estado de búsqueda y filtros de la tabla mostrada
+        self.current_table = None
+        self.active_filters = []  # (columna, operador, valor)
+        self.search_text = ""
+        self.fts_building = set()  # (ruta_db, tabla) con un índice FTS construyéndose en segundo plano
+        self.fts_failed = set()  # (ruta_db, tabla) cuyo índice FTS no se pudo crear: se busca con LIKE
+        self.sort_column = None
+        self.sort_descending = False
+        self.sort_counts = {}  # (ruta_db, tabla, columna) -> veces que se ordenó por esa columna
+        self.indexing = set()  # (ruta_db, tabla, columna) con un índice creándose en segundo plano
+
         # --- Treeview para mostrar el contenido de la tabla ---
         style = ttk.Style()
         style.theme_use("default")
@@ -268,7 +434,7 @@ class EtlApp(ctk.CTk):
 
         # Frame para el Treeview
         self.tree_frame = ctk.CTkFrame(tab_db, corner_radius=15, fg_color="transparent")
-        self.tree_frame.grid(row=2, column=0, padx=30, pady=15, sticky="nsew")
+        self.tree_frame.grid(row=3, column=0, padx=30, pady=15, sticky="nsew")
         self.tree_frame.grid_rowconfigure(0, weight=1)
         self.tree_frame.grid_columnconfigure(0, weight=1)
 
@@ -281,7 +447,16 @@ class EtlApp(ctk.CTk):
         vsb.grid(row=0, column=1, sticky="ns")
         hsb = ttk.Scrollbar(self.tree_frame, orient="horizontal", command=self.db_treeview.xview, style="Horizontal.TScrollbar")
         hsb.grid(row=1, column=0, sticky="ew")
-        self.db_treeview.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.db_treeview.configure(xscrollcommand=hsb.set)
+
+        # Visor paginado: solo mantiene en el Treeview las páginas cercanas a lo visible (ver visor_datos.py)
+        self.table_viewer = VisorTablaVirtual(self.db_treeview, vsb, al_cambiar_rango=self.update_viewer_status,
+                                              al_ordenar=self.sort_by_column)
+
+        # Etiqueta con el rango de filas cargadas
+        self.viewer_status_label = ctk.CTkLabel(self.tree_frame, text="", font=ctk.CTkFont(family="Arial", size=12),
+                                                text_color=self.TEXT_COLOR, anchor="w")
+        self.viewer_status_label.grid(row=2, column=0, columnspan=2, padx=5, pady=(5, 0), sticky="ew")
 
         # --- Nueva Pestaña para Descarga de Archivos ---
         self.tab_view.add("Descarga de Archivos")
@@ -312,30 +487,69 @@ class EtlApp(ctk.CTk):
         self.btn_download_file.grid(row=0, column=2, padx=10, pady=5, sticky="ew")
         self.btn_download_file.configure(state="disabled")
 
-        # Llenar los selectores al iniciar
+        # Los selectores se llenan (y la primera tabla se carga) después de que la ventana se muestra,
+        # para que el arranque no dependa del tamaño de las bases de datos
+        self.initial_data_loaded = False
+        self.bind("<Map>", self.on_first_map, add="+")
+        self.startup_times["ventana_creada"] = time.time()
+
+    def on_first_map(self, event):
+        if event.widget is not self or self.initial_data_loaded:
+            return
+        self.initial_data_loaded = True
+        # after_idle: se ejecuta cuando Tk termina de procesar los eventos pendientes, incluido el primer dibujo
+        self.after_idle(self.load_initial_data)
+
+    def load_initial_data(self):
+        self.startup_times["primer_dibujo"] = time.time()
         self.populate_db_selector()
         self.populate_download_file_selector()
+        self.startup_times["primera_tabla"] = time.time()
+        if self.measure_startup:
+            self.report_startup_times()
 
+    def report_startup_times(self):
+        """
+        Escribe los tiempos de arranque (ms desde que empezó a cargarse app.py) en la salida estándar
+        original, en una línea que lee benchmarks/inicio.py, y cierra la aplicación.
+        """
+        launch = self.startup_times["lanzamiento"]
+        times_ms = {name: round((moment - launch) * 1000, 1) for name, moment in self.startup_times.items()
+                    if name != "lanzamiento"}
+        # También se informa el momento absoluto de inicio, para sumar el arranque del intérprete
+        times_ms["epoch_carga_app"] = launch
+        self.original_stdout.write(f"MEDICION_INICIO {json.dumps(times_ms)}\n")
+        self.original_stdout.flush()
+        self.after(0, self.on_closing)
+
+
+    def create_log_textbox(self, master):
+        return ctk.CTkTextbox(master, wrap="word",
+                              font=ctk.CTkFont(family="Consolas", size=12),
+                              corner_radius=10, fg_color=self.BG_SECONDARY,
+                              text_color=self.TEXT_COLOR, border_color=self.BORDER_COLOR, border_width=2)
 
     def write(self, text):
-        self.output_log.configure(state="normal")
-        self.output_log.insert("end", text)
-        self.output_log.see("end")
-        self.output_log.configure(state="disabled")
-        self.update_idletasks()
+        # Seguro desde cualquier hilo: va al panel del proceso ETL del hilo que escribe (o al general)
+        return self.output_router.write(text)
 
     def flush(self):
         pass
 
     def on_closing(self):
+        self.closing = True
+        # Los procesos ETL que siguen en ejecución se detienen; su transacción se deshace sola
+        for process in self.etl_running.values():
+            if process is not None and process.poll() is None:
+                process.terminate()
         sys.stdout = self.original_stdout
+        self.log_sink.cerrar()
+        for panel in self.etl_panels.values():
+            panel["log"].cerrar()
+        self.table_viewer.limpiar()
+        self.db_connections.cerrar()
         self.destroy()
 
-    def set_buttons_state(self, state):
-        self.btn_ciudades.configure(state=state)
-        self.btn_famosos.configure(state=state)
-        self.btn_ubicacion.configure(state=state)
-
     def set_export_buttons_state(self, state):
         self.btn_export_csv.configure(state=state)
         self.btn_export_excel.configure(state=state)
@@ -343,42 +557,94 @@ class EtlApp(ctk.CTk):
     def set_download_button_state(self, state):
         self.btn_download_file.configure(state=state)
 
-    def run_etl_process(self, process_name):
-        self.output_log.configure(state="normal")
-        self.output_log.delete("1.0", "end")
-        self.output_log.configure(state="disabled")
-        self.write(f"--- INICIANDO PROCESO ETL DE {process_name.upper()} ---\n")
-
-        self.set_buttons_state("disabled")
-        self.progress_bar.start()
+    def run_all_etl_processes(self):
+        for process_name in self.ETL_PROCESSES:
+            self.run_etl_process(process_name)
+        self.log_tabs.set("General")
 
-        thread = threading.Thread(target=self._execute_etl_thread, args=(process_name,))
+    def run_etl_process(self, process_name):
+        if process_name in self.etl_running:
+            return
+        self.etl_running[process_name] = None
+        panel = self.etl_panels[process_name]
+        panel["log"].limpiar()
+        panel["status"].configure(text="⏳ En ejecución...")
+        panel["progress"].start()
+        self.etl_buttons[process_name].configure(state="disabled")
+        self.log_tabs.set(process_name)
+
+        thread = threading.Thread(target=self._execute_etl_thread, args=(process_name,), daemon=True)
         thread.start()
 
     def _execute_etl_thread(self, process_name):
-        try:
-            if process_name == "Ciudades":
-                run_etl_ciudades()
-            elif process_name == "Famosos":
-                run_etl_famosos()
-            elif process_name == "Ubicacion":
-                run_etl_ubicacion() # Esta es la función que genera datos_ubicacion.db
-            else:
-                self.write(f"❌ Error: Proceso ETL '{process_name}' no reconocido.\n")
-                self.after(0, lambda: messagebox.showerror("Error en Proceso ETL", f"Proceso ETL '{process_name}' no reconocido."))
-                return
-            
-            self.write(f"\n--- PROCESO ETL DE {process_name.upper()} FINALIZADO ---\n")
-            self.after(0, lambda: messagebox.showinfo("Proceso Completado", f"El proceso ETL de {process_name} ha finalizado exitosamente."))
+        # Todo lo que se imprima en este hilo va al panel del proceso (ver salida_log.py)
+        with redirigir_salida(self.etl_panels[process_name]["log"]):
+            self.write(f"--- INICIANDO PROCESO ETL DE {process_name.upper()} ---\n")
+            start = time.perf_counter()
+            success = False
+            try:
+                # Un intérprete por proceso ETL: los tres pueden usar un núcleo cada uno a la vez.
+                # -u y --sin-captura: la salida llega línea a línea mientras el ETL avanza
+                command = [sys.executable, "-u", self.ETL_SCRIPT, self.ETL_PROCESSES[process_name], "--sin-captura"]
+                if self.force_reload_switch.get():
+                    command.append("--forzar")
+                if process_name == "Ciudades" and self.incremental_switch.get():
+                    command.append("--ciudades-incremental")
+                process = subprocess.Popen(
+                    command,
+                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding="utf-8", errors="replace",
+                    env={**os.environ, "PYTHONIOENCODING": "utf-8",
+                         VARIABLE_MEDIR_MEMORIA: "1" if self.measure_memory_switch.get() else "0",
+                         VARIABLE_PERFILAR: "todo" if self.profile_switch.get() else "0"},
+                    creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+                self.etl_running[process_name] = process
+                for line in process.stdout:
+                    self.write(line)
+                # ejecutar_etl.py termina con código 1 si el ETL falló o se abortó (el motivo queda en el log)
+                success = process.wait() == 0
+                if success:
+                    self.write(f"\n--- PROCESO ETL DE {process_name.upper()} FINALIZADO ---\n")
+                elif not self.closing:
+                    self.write(f"\n--- PROCESO ETL DE {process_name.upper()} FINALIZADO CON ERRORES ---\n")
+                    self.after(0, lambda: messagebox.showwarning("Proceso con Errores", f"El proceso ETL de {process_name} no se completó. Revise el log para más detalles."))
+            except Exception as e:
+                # 'e' se borra al salir del except: el callback de after usa el mensaje ya armado
+                error_message = f"Ocurrió un error durante el proceso ETL de {process_name}:\n{e}"
+                self.write(f"\n❌ ERROR CRÍTICO DURANTE EL PROCESO ETL DE {process_name.upper()}: {e}\n")
+                self.after(0, lambda: messagebox.showerror("Error en Proceso ETL", error_message))
+            finally:
+                elapsed = time.perf_counter() - start
+                if not self.closing:
+                    self.after(0, lambda: self.on_etl_finished(process_name, success, elapsed))
+
+    def on_etl_finished(self, process_name, success, seconds):
+        self.etl_running.pop(process_name, None)
+        panel = self.etl_panels[process_name]
+        panel["progress"].stop()
+        panel["progress"].set(1 if success else 0)
+        status = "✅ Finalizado" if success else "❌ Con errores"
+        panel["status"].configure(text=f"{status} en {seconds:.1f} s ({datetime.now():%H:%M:%S})")
+        panel["metrics"].configure(text=self.format_run_metrics(self.ETL_PROCESSES[process_name], time.time() - seconds))
+        self.etl_buttons[process_name].configure(state="normal")
+        # Las bases de datos no se bloquean durante la carga (modo WAL): el visor solo recarga lo que cambió
+        self.populate_db_selector()
+        self.populate_download_file_selector() # Actualizar lista de archivos descargables
 
-        except Exception as e:
-            self.write(f"\n❌ ERROR CRÍTICO DURANTE EL PROCESO ETL DE {process_name.upper()}: {e}\n")
-            self.after(0, lambda: messagebox.showerror("Error en Proceso ETL", f"Ocurrió un error durante el proceso ETL de {process_name}:\n{e}"))
-        finally:
-            self.after(0, lambda: self.set_buttons_state("normal"))
-            self.after(0, self.progress_bar.stop)
-            self.after(0, self.populate_db_selector)
-            self.after(0, self.populate_download_file_selector) # Actualizar lista de archivos descargables
+    def format_run_metrics(self, pipeline, started_at):
+        """
+        Resumen de una línea de las métricas que guardó el ETL en esta ejecución ('' si no guardó ninguna).
+        """
+        record = ultima_ejecucion(pipeline)
+        # El registro tiene que ser de esta ejecución y no de una anterior
+        if record is None or record["inicio_epoch"] < started_at:
+            return ""
+        slowest = etapa_mas_lenta(record)
+        text = f"📈 CPU {record['cpu_segundos']:.1f} s"
+        if record["pico_memoria_bytes"] is not None:
+            text += f" · pico de memoria {record['pico_memoria_bytes'] / (1024 * 1024):,.1f} MB"
+        if slowest is not None:
+            text += f" · etapa más lenta: {slowest['etapa']} ({slowest['segundos']:.2f} s)"
+        return text
 
     # Esta función ahora manejará la exportación de la tabla actual desde app.py
     def export_selected_table_threaded(self, file_format):
@@ -396,78 +662,95 @@ class EtlApp(ctk.CTk):
             return
 
         self.write(f"\n--- INICIANDO EXPORTACIÓN DE TABLA '{selected_table_name}' de '{selected_db_name}' a {file_format.upper()} ---\n")
+
+        # La existencia sale de la caché del gestor de conexiones; si está vacía se consulta sin contar filas
+        try:
+            if selected_table_name not in self.db_connections.tablas(self.current_db_path):
+                message = f"❌ Error: La tabla '{selected_table_name}' no existe en la base de datos '{self.current_db_path}'."
+                self.write(message + "\n")
+                messagebox.showerror("Error de Exportación", message)
+                return
+            if not self.db_connections.tiene_filas(self.current_db_path, selected_table_name):
+                message = f"⚠️ Advertencia: La tabla '{selected_table_name}' está vacía. No hay datos para exportar."
+                self.write(message + "\n")
+                messagebox.showwarning("Tabla Vacía", message)
+                return
+        except sqlite3.Error as e:
+            message = f"❌ ERROR CRÍTICO DURANTE LA EXPORTACIÓN DE TABLA '{selected_table_name}': {e}"
+            self.write(message + "\n")
+            messagebox.showerror("Error de Exportación", message)
+            return
+
+        # Formato, destino y tamaño de las partes se piden aquí: Tk solo se usa desde el hilo principal
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Nombre de archivo más claro que incluye la DB y la tabla
+        base_db_name = os.path.splitext(os.path.basename(self.current_db_path))[0]
+        file_name = f"{base_db_name}_{selected_table_name}_export_{timestamp}"
+        part_size_mb = None
+
+        if file_format.lower() == 'csv':
+            output_path = filedialog.asksaveasfilename(
+                initialfile=f"{file_name}.csv",
+                defaultextension=".csv",
+                filetypes=[("Archivos CSV", "*.csv"), ("CSV comprimido (gzip)", "*.csv.gz"), ("Todos los archivos", "*.*")]
+            )
+            part_size_mb = self.CSV_SPLIT_OPTIONS.get(self.csv_split_selector.get())
+        elif file_format.lower() == 'excel':
+            output_path = filedialog.asksaveasfilename(
+                initialfile=f"{file_name}.xlsx",
+                defaultextension=".xlsx",
+                filetypes=[("Archivos Excel", "*.xlsx"), ("Todos los archivos", "*.*")]
+            )
+        else:
+            message = f"❌ Formato de archivo no soportado para exportación de tabla: '{file_format}'. Por favor, elija 'csv' o 'excel'."
+            self.write(message + "\n")
+            messagebox.showerror("Error de Formato", message)
+            return
+
+        if not output_path:
+            message = f"ℹ️ Exportación a {'CSV' if file_format.lower() == 'csv' else 'Excel'} cancelada."
+            self.write(message + "\n")
+            messagebox.showinfo("Exportación Cancelada", message)
+            return
+
         self.set_export_buttons_state("disabled")
 
-        export_thread = threading.Thread(target=self._execute_export_table_logic, 
-                                         args=(self.current_db_path, selected_table_name, file_format))
+        export_thread = threading.Thread(target=self._execute_export_table_logic,
+                                         args=(self.current_db_path, selected_table_name, file_format,
+                                               output_path, part_size_mb))
         export_thread.start()
 
-    def _execute_export_table_logic(self, db_path, table_name, file_format):
+    def _execute_export_table_logic(self, db_path, table_name, file_format, output_path, part_size_mb=None):
         """
         Lógica interna para exportar una tabla específica a CSV o Excel.
         Esta lógica vive directamente en app.py ahora.
+        El destino y el tamaño de las partes del CSV ya se eligieron en el hilo principal.
         """
         conn = None
         try:
-            conn = sqlite3.connect(db_path)
-            # Verificar si la tabla existe
-            cursor = conn.cursor()
-            cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table_name}';")
-            if cursor.fetchone() is None:
-                message = f"❌ Error: La tabla '{table_name}' no existe en la base de datos '{db_path}'."
-                self.after(0, lambda: self.write(message + "\n"))
-                self.after(0, lambda: messagebox.showerror("Error de Exportación", message))
-                return
-
-            df_export = pd.read_sql_query(f"SELECT * FROM \"{table_name}\"", conn)
-
-            if df_export.empty:
-                message = f"⚠️ Advertencia: La tabla '{table_name}' está vacía. No hay datos para exportar."
-                self.after(0, lambda: self.write(message + "\n"))
-                self.after(0, lambda: messagebox.showwarning("Tabla Vacía", message))
-                return
-
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            # Nombre de archivo más claro que incluye la DB y la tabla
-            base_db_name = os.path.splitext(os.path.basename(db_path))[0]
-            file_name = f"{base_db_name}_{table_name}_export_{timestamp}"
+            # Conexión propia del hilo (las del gestor son del hilo principal); la tabla ya se validó
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
 
             if file_format.lower() == 'csv':
-                output_path = filedialog.asksaveasfilename(
-                    initialfile=f"{file_name}.csv",
-                    defaultextension=".csv",
-                    filetypes=[("Archivos CSV", "*.csv"), ("Todos los archivos", "*.*")]
-                )
-                if output_path:
-                    # CAMBIO: Usar punto y coma como delimitador para CSV
-                    df_export.to_csv(output_path, index=False, encoding='utf-8', sep=';')
-                    message = f"✅ Tabla '{table_name}' exportada exitosamente a:\n{output_path}"
-                    self.after(0, lambda: self.write(message + "\n"))
-                    self.after(0, lambda: messagebox.showinfo("Exportación Completada", message))
-                else:
-                    message = "ℹ️ Exportación a CSV cancelada."
-                    self.after(0, lambda: self.write(message + "\n"))
-                    self.after(0, lambda: messagebox.showinfo("Exportación Cancelada", message))
-
-            elif file_format.lower() == 'excel':
-                output_path = filedialog.asksaveasfilename(
-                    initialfile=f"{file_name}.xlsx",
-                    defaultextension=".xlsx",
-                    filetypes=[("Archivos Excel", "*.xlsx"), ("Todos los archivos", "*.*")]
-                )
-                if output_path:
-                    df_export.to_excel(output_path, index=False)
-                    message = f"✅ Tabla '{table_name}' exportada exitosamente a:\n{output_path}"
-                    self.after(0, lambda: self.write(message + "\n"))
-                    self.after(0, lambda: messagebox.showinfo("Exportación Completada", message))
-                else:
-                    message = "ℹ️ Exportación a Excel cancelada."
-                    self.after(0, lambda: self.write(message + "\n"))
-                    self.after(0, lambda: messagebox.showinfo("Exportación Cancelada", message))
+                # Exportación por lotes con ';' como delimitador (ver exportacion.py);
+                # un nombre terminado en .gz se comprime con gzip
+                result = exportar_tabla_csv(
+                    conn, table_name, output_path,
+                    comprimir=output_path.lower().endswith('.gz'),
+                    tamano_parte_mb=part_size_mb,
+                    al_progresar=lambda rows, size, secs: self.write(f"📦 {formatear_progreso(rows, size, secs)}\n"))
+                written = "\n".join(result['archivos'])
+                message = f"✅ Tabla '{table_name}' exportada exitosamente a:\n{written}"
             else:
-                message = f"❌ Formato de archivo no soportado para exportación de tabla: '{file_format}'. Por favor, elija 'csv' o 'excel'."
-                self.after(0, lambda: self.write(message + "\n"))
-                self.after(0, lambda: messagebox.showerror("Error de Formato", message))
+                # Libro de solo escritura de openpyxl: las filas pasan del cursor al archivo sin armar
+                # el libro en memoria; si superan el límite de Excel continúan en Sheet2, Sheet3, ...
+                result = exportar_tabla_excel(
+                    conn, table_name, output_path,
+                    al_progresar=lambda rows, secs: self.write(f"📦 {rows:,} filas escritas en {secs:.1f} s\n"))
+                sheets_text = f" ({result['hojas']} hojas)" if result['hojas'] > 1 else ""
+                message = f"✅ Tabla '{table_name}' exportada exitosamente a:\n{output_path}{sheets_text}"
+            self.after(0, lambda: self.write(message + "\n"))
+            self.after(0, lambda: messagebox.showinfo("Exportación Completada", message))
 
         except Exception as e:
             error_message = f"❌ ERROR CRÍTICO DURANTE LA EXPORTACIÓN DE TABLA '{table_name}': {e}"
@@ -480,7 +763,7 @@ class EtlApp(ctk.CTk):
 
 
     def populate_db_selector(self):
-        db_files = [f for f in os.listdir('.') if f.endswith('.db')]
+        db_files = self.db_connections.archivos('.', '.db')
         
         if not db_files:
             self.db_selector.configure(values=["(No se encontraron DBs)"])
@@ -495,7 +778,14 @@ class EtlApp(ctk.CTk):
         if current_selection in db_files:
             self.db_selector.configure(values=db_files)
             self.db_selector.set(current_selection)
-            self.load_tables(current_selection)
+            # Si la base de datos seleccionada no cambió (p. ej. el ETL recreó otra), se deja la vista como está
+            db_path = os.path.join(os.getcwd(), current_selection)
+            try:
+                unchanged = self.loaded_db_signature == (db_path, self.db_connections.firma(db_path))
+            except sqlite3.Error:
+                unchanged = False
+            if not unchanged:
+                self.load_tables(current_selection)
         else:
             self.db_selector.configure(values=db_files)
             self.db_selector.set(db_files[0])
@@ -514,6 +804,8 @@ class EtlApp(ctk.CTk):
 
         # Asegurarse de que el path sea completo
         self.current_db_path = os.path.join(os.getcwd(), db_name)
+        # Al cambiar de base de datos se descartan la búsqueda y los filtros de la tabla anterior
+        self.current_table = None
         if not os.path.exists(self.current_db_path):
             self.table_selector.configure(values=["(Error al cargar DB)"])
             self.table_selector.set("(Error al cargar DB)")
@@ -521,13 +813,10 @@ class EtlApp(ctk.CTk):
             self.set_export_buttons_state("disabled")
             return
 
-        conn = None
         try:
-            conn = sqlite3.connect(self.current_db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = [row[0] for row in cursor.fetchall()]
-            
+            tables = self.db_connections.tablas(self.current_db_path)
+            self.loaded_db_signature = (self.current_db_path, self.db_connections.firma(self.current_db_path))
+
             if not tables:
                 self.table_selector.configure(values=["(No hay tablas)"])
                 self.table_selector.set("(No hay tablas)")
@@ -544,69 +833,226 @@ class EtlApp(ctk.CTk):
                     self.display_table_content(tables[0])
                 self.set_export_buttons_state("normal")
         except sqlite3.Error as e:
+            self.loaded_db_signature = None
             self.table_selector.configure(values=["(Error al cargar tablas)"])
             self.table_selector.set("(Error al cargar tablas)")
             self.clear_treeview()
             self.set_export_buttons_state("disabled")
             messagebox.showerror("Error de Base de Datos", f"Error al acceder a la base de datos '{db_name}': {e}")
-        finally:
-            if conn:
-                conn.close()
 
     def clear_treeview(self):
-        for item in self.db_treeview.get_children():
-            self.db_treeview.delete(item)
+        self.table_viewer.limpiar()
         self.db_treeview["columns"] = ()
         self.db_treeview.heading("#0", text="")
         self.db_treeview.column("#0", width=0, stretch=False)
+        self.viewer_status_label.configure(text="")
+
+    def update_viewer_status(self, first_row, last_row, has_more):
+        more_text = " (desplácese para ver más)" if has_more else ""
+        filtered_text = " (filtradas)" if self.active_filters or self.search_text else ""
+        query_ms = self.table_viewer.paginador.ultima_consulta_ms if self.table_viewer.paginador else 0.0
+        self.viewer_status_label.configure(
+            text=f"Filas {first_row:,}–{last_row:,} cargadas{filtered_text}{more_text} · consulta: {query_ms:.1f} ms")
 
     def display_table_content(self, table_name):
+        # Los filtros se conservan solo mientras se vuelve a mostrar la misma tabla
+        if table_name != self.current_table:
+            self.active_filters = []
+            self.search_text = ""
+            self.search_entry.delete(0, "end")
+            self.sort_column = None
+            self.sort_descending = False
+            self.current_table = table_name
+        self.refresh_table_view()
+
+    def profile_action(self, action_name):
+        """
+        Perfila una acción del visor si el interruptor de perfilado está activado (ver perfilado.py).
+        El resumen va al log general y los informes a la carpeta 'perfiles'.
+        """
+        return perfilar(action_name, {"cpu", "memoria"} if self.profile_switch.get() else set())
+
+    def refresh_table_view(self):
+        # Mostrar, ordenar, buscar y filtrar pasan por aquí: es la acción del visor que se perfila
+        with self.profile_action(f"visor_{self.current_table}"):
+            self._refresh_table_view()
+
+    def _refresh_table_view(self):
+        """
+        Muestra la tabla actual aplicando la búsqueda y los filtros activos.
+        La búsqueda usa un índice FTS5 en caché (busqueda_texto.py); si aún no existe o está
+        desactualizado se construye en segundo plano y la tabla se vuelve a mostrar al terminar.
+        """
+        table_name = self.current_table
         self.clear_treeview()
+        self.update_filters_label()
 
         if not self.current_db_path or not os.path.exists(self.current_db_path):
             messagebox.showwarning("Advertencia", "Por favor, seleccione una base de datos válida primero.")
             self.set_export_buttons_state("disabled")
             return
         
-        if table_name in ["(Seleccione una DB primero)", "(No hay tablas)", "(Error al cargar tablas)"]:
+        if table_name in [None, "(Seleccione una DB primero)", "(No hay tablas)", "(Error al cargar tablas)"]:
             self.set_export_buttons_state("disabled")
             return
 
-        conn = None
         try:
-            conn = sqlite3.connect(self.current_db_path)
-            df_table = pd.read_sql_query(f"SELECT * FROM \"{table_name}\"", conn)
-
-            if df_table.empty:
+            # Conexión de solo lectura del gestor: el visor la usa para leer las páginas al desplazarse
+            viewer_conn = self.db_connections.conexion(self.current_db_path)
+            paginator = PaginadorTabla(viewer_conn, table_name)
+            self.update_filter_columns(paginator.columnas)
+
+            conditions = [condicion_filtro(column, operator, value) for column, operator, value in self.active_filters]
+            fts_index, fts_query = None, None
+            if self.search_text:
+                text_columns = [column for column, column_type in self.db_connections.columnas(self.current_db_path, table_name)
+                                if es_tipo_texto(column_type)]
+                fts_query = texto_a_consulta_fts(self.search_text)
+                if not text_columns or fts_query is None:
+                    messagebox.showinfo("Búsqueda", "La tabla no tiene columnas de texto o la búsqueda no contiene palabras.")
+                elif paginator.usa_rowid and (self.current_db_path, table_name) not in self.fts_failed:
+                    fts_name = indice_fts_vigente(self.current_db_path, table_name, text_columns)
+                    if fts_name is None:
+                        self.build_fts_index_threaded(self.current_db_path, table_name, text_columns)
+                        return
+                    fts_index = (adjuntar_cache_fts(viewer_conn, self.current_db_path), fts_name)
+                else:
+                    # Vistas y tablas sin rowid no admiten índice FTS: se busca con LIKE
+                    conditions.append(condicion_like(text_columns, self.search_text))
+            paginator.aplicar_filtros(conditions, fts_index, fts_query)
+            if self.sort_column in paginator.columnas:
+                paginator.ordenar_por(self.sort_column, self.sort_descending)
+
+            if not self.table_viewer.mostrar(paginator) and paginator.filtrado:
+                self.table_viewer.limpiar()
+                self.viewer_status_label.configure(
+                    text=f"Sin resultados para los filtros actuales · consulta: {paginator.ultima_consulta_ms:.1f} ms")
+                self.set_export_buttons_state("normal")
+            elif not self.table_viewer.filas_cargadas:
+                self.table_viewer.limpiar()
                 self.db_treeview.heading("#0", text="Tabla vacía")
                 messagebox.showinfo("Tabla Vacía", f"La tabla '{table_name}' está vacía.")
                 self.set_export_buttons_state("disabled")
             else:
-                self.db_treeview["columns"] = list(df_table.columns)
-                self.db_treeview.column("#0", width=0, stretch=False)
-
-                for col in df_table.columns:
-                    self.db_treeview.heading(col, text=col, anchor=ctk.W)
-                    max_len_data = df_table[col].astype(str).apply(len).max() if not df_table.empty else 0
-                    header_len = len(col)
-                    width = max(max_len_data * 10, header_len * 10, 100)
-                    self.db_treeview.column(col, width=width, minwidth=20, stretch=True, anchor=ctk.W)
-
-                for index, row in df_table.iterrows():
-                    values = [str(x) if pd.notna(x) else "" for x in row.values]
-                    self.db_treeview.insert("", "end", values=values)
-                
                 self.db_treeview.grid(row=0, column=0, sticky="nsew", in_=self.tree_frame)
                 self.set_export_buttons_state("normal")
 
-
         except Exception as e:
             self.clear_treeview()
             self.set_export_buttons_state("disabled")
             messagebox.showerror("Error de Visualización de Tabla", f"Error al mostrar el contenido de la tabla '{table_name}':\n{e}")
-        finally:
-            if conn:
-                conn.close()
+
+    def build_fts_index_threaded(self, db_path, table_name, text_columns):
+        """
+        Construye en un hilo aparte el índice FTS de la tabla y, al terminar, vuelve a mostrarla
+        si sigue siendo la tabla seleccionada.
+        """
+        self.viewer_status_label.configure(text="⏳ Construyendo índice de búsqueda (solo la primera vez)...")
+        key = (db_path, table_name)
+        if key in self.fts_building:
+            return
+        self.fts_building.add(key)
+
+        def build():
+            try:
+                start_time = time.perf_counter()
+                construir_indice_fts(db_path, table_name, text_columns)
+                print(f"🔎 Índice de búsqueda de '{table_name}' creado en {time.perf_counter() - start_time:.1f} s.")
+                error = None
+            except (sqlite3.Error, OSError) as e:
+                error = e
+            self.after(0, lambda: self.on_fts_index_built(key, error))
+
+        threading.Thread(target=build, daemon=True).start()
+
+    def on_fts_index_built(self, key, error):
+        self.fts_building.discard(key)
+        if key != (self.current_db_path, self.current_table):
+            return
+        if error is not None:
+            # Sin índice, la búsqueda se hace con LIKE sobre las columnas de texto
+            print(f"⚠️ No se pudo crear el índice de búsqueda: {error}. Se buscará sin índice.")
+            self.fts_failed.add(key)
+        self.refresh_table_view()
+
+    def sort_by_column(self, column):
+        """
+        Clic en un encabezado: ascendente, luego descendente, luego sin orden.
+        El orden se resuelve en SQLite (ORDER BY) y se sigue paginando sobre el resultado.
+        """
+        if column != self.sort_column:
+            self.sort_column, self.sort_descending = column, False
+        elif not self.sort_descending:
+            self.sort_descending = True
+        else:
+            self.sort_column, self.sort_descending = None, False
+        self.refresh_table_view()
+        if self.sort_column is not None:
+            self.maybe_create_sort_index(self.sort_column)
+
+    def maybe_create_sort_index(self, column):
+        """
+        Si se ordenó varias veces por la misma columna de una tabla grande que no tiene índice sobre ella,
+        lo crea en un hilo aparte (se puede desactivar con el interruptor de índices automáticos).
+        """
+        key = (self.current_db_path, self.current_table, column)
+        self.sort_counts[key] = self.sort_counts.get(key, 0) + 1
+        paginator = self.table_viewer.paginador
+        if (not self.auto_index_switch.get() or key in self.indexing or paginator is None or not paginator.usa_rowid
+                or self.sort_counts[key] < ORDENES_PARA_INDICE):
+            return
+        try:
+            if (columna_indexada(paginator.conn, self.current_table, column)
+                    or filas_aproximadas(paginator.conn, self.current_table, paginator.alias_rowid) < FILAS_MINIMAS_INDICE):
+                return
+        except sqlite3.Error:
+            return
+        self.indexing.add(key)
+        db_path, table_name = self.current_db_path, self.current_table
+
+        def build():
+            try:
+                start_time = time.perf_counter()
+                index_name = crear_indice_orden(db_path, table_name, column)
+                print(f"📇 Índice '{index_name}' creado en {time.perf_counter() - start_time:.1f} s "
+                      f"para ordenar '{table_name}' por '{column}'.")
+            except sqlite3.Error as e:
+                print(f"⚠️ No se pudo crear el índice para ordenar por '{column}': {e}")
+            self.after(0, lambda: self.indexing.discard(key))
+
+        print(f"⏳ Creando índice para ordenar '{table_name}' por '{column}' en segundo plano...")
+        threading.Thread(target=build, daemon=True).start()
+
+    def apply_search(self):
+        self.search_text = self.search_entry.get().strip()
+        self.refresh_table_view()
+
+    def add_column_filter(self):
+        column = self.filter_column_selector.get()
+        value = self.filter_value_entry.get()
+        if column == "(Sin columnas)" or self.current_table is None:
+            return
+        self.active_filters.append((column, self.filter_operator_selector.get(), value))
+        self.filter_value_entry.delete(0, "end")
+        self.refresh_table_view()
+
+    def clear_filters(self):
+        self.active_filters = []
+        self.search_text = ""
+        self.search_entry.delete(0, "end")
+        self.refresh_table_view()
+
+    def update_filter_columns(self, columns):
+        values = list(columns) or ["(Sin columnas)"]
+        if list(self.filter_column_selector.cget("values")) != values:
+            self.filter_column_selector.configure(values=values)
+            self.filter_column_selector.set(values[0])
+
+    def update_filters_label(self):
+        parts = [f"{column} {operator} '{value}'" for column, operator, value in self.active_filters]
+        if self.search_text:
+            parts.insert(0, f"texto: '{self.search_text}'")
+        self.active_filters_label.configure(text=f"Filtros activos: {' · '.join(parts)}" if parts else "")
 
     def open_db_file_dialog(self):
         file_path = filedialog.askopenfilename(
@@ -631,8 +1077,8 @@ class EtlApp(ctk.CTk):
         """
         Llena el selector de archivos a descargar con archivos .db encontrados.
         """
-        # Filtrar solo archivos .db
-        all_files = [f for f in os.listdir('.') if f.endswith('.db')]
+        # Filtrar solo archivos .db (el listado se cachea mientras el directorio no cambie)
+        all_files = self.db_connections.archivos('.', '.db')
         
         if not all_files:
             self.file_download_selector.configure(values=["(No se encontraron archivos .db)"])
@@ -655,117 +1101,146 @@ class EtlApp(ctk.CTk):
             self.write("⚠️ Advertencia: No se puede descargar. Seleccione un archivo válido.\n")
             return
 
+        # Las tablas de una base de datos salen de la caché del gestor (por si se exportan a CSV)
+        tables = None
+        if selected_file.lower().endswith('.db'):
+            try:
+                tables = self.db_connections.tablas(selected_file)
+            except sqlite3.Error as e:
+                self.write(f"⚠️ No se pudieron leer las tablas de '{selected_file}': {e}\n")
+                tables = []
+
         self.write(f"\n--- INICIANDO DESCARGA DE ARCHIVO '{selected_file}' ---\n")
+
+        # Las preguntas y los diálogos de destino se hacen aquí: Tk solo se usa desde el hilo principal
+        initial_file_name = os.path.basename(selected_file)
+        file_extension = os.path.splitext(initial_file_name)[1].lower()
+        destination_directory = None
+        save_path = None
+        compact = False
+
+        if file_extension == '.db':
+            # Preguntar al usuario si desea exportar a CSV o descargar directamente el .db
+            choice = messagebox.askyesno(
+                "Opciones de Descarga de Base de Datos",
+                f"El archivo '{initial_file_name}' es una base de datos SQLite.\n\n"
+                "¿Desea exportar todas sus tablas a archivos CSV separados?\n"
+                "(Si selecciona 'No', se descargará el archivo .db directamente)."
+            )
+
+            if choice: # El usuario eligió exportar a CSV(s)
+                if not tables:
+                    message = f"⚠️ La base de datos '{initial_file_name}' no contiene tablas para exportar."
+                    self.write(message + "\n")
+                    messagebox.showwarning("Sin Tablas", message)
+                    return
+                # Diálogo para seleccionar la carpeta de destino para los CSVs
+                destination_directory = filedialog.askdirectory(
+                    title=f"Seleccionar Carpeta para Guardar los Archivos CSV de '{initial_file_name}'"
+                )
+                if not destination_directory:
+                    message = "ℹ️ Exportación de CSVs cancelada: No se seleccionó una carpeta de destino."
+                    self.write(message + "\n")
+                    messagebox.showinfo("Exportación Cancelada", message)
+                    return
+            else: # El usuario eligió descargar el archivo .db directamente
+                save_path = filedialog.asksaveasfilename(
+                    initialfile=initial_file_name,
+                    defaultextension=file_extension,
+                    filetypes=[(f"Archivos {file_extension.upper()}", f"*{file_extension}"), ("Todos los archivos", "*.*")]
+                )
+                if not save_path:
+                    message = "ℹ️ Descarga de archivo .db cancelada."
+                    self.write(message + "\n")
+                    messagebox.showinfo("Descarga Cancelada", message)
+                    return
+                compact = messagebox.askyesno(
+                    "Compactar Copia",
+                    "¿Desea compactar la copia (VACUUM INTO)?\n"
+                    "La copia compactada ocupa menos espacio pero no muestra progreso."
+                )
+        else: # No es un archivo .db (ej. .txt), proceder con descarga directa normal
+            # Aunque ahora solo se listan .db, mantenemos esta rama por si en el futuro se vuelve a listar .txt u otros
+            save_path = filedialog.asksaveasfilename(
+                initialfile=initial_file_name,
+                defaultextension=file_extension,
+                filetypes=[(f"Archivos {file_extension.upper()}", f"*{file_extension}"), ("Todos los archivos", "*.*")]
+            )
+            if not save_path:
+                message = "ℹ️ Descarga de archivo cancelada."
+                self.write(message + "\n")
+                messagebox.showinfo("Descarga Cancelada", message)
+                return
+
         self.set_download_button_state("disabled")
 
-        download_thread = threading.Thread(target=self._execute_file_download_thread, args=(selected_file,))
+        download_thread = threading.Thread(target=self._execute_file_download_thread,
+                                           args=(selected_file, tables, destination_directory, save_path, compact))
         download_thread.start()
 
-    def _execute_file_download_thread(self, source_file_path):
+    def _execute_file_download_thread(self, source_file_path, tables=None, destination_directory=None,
+                                      save_path=None, compact=False):
         """
         Lógica interna para ejecutar la descarga del archivo y manejar errores.
-        Ofrece la opción de exportar tablas de DB a CSVs.
+        Con destination_directory exporta cada tabla de la DB ('tables') a un CSV en esa carpeta;
+        si no, copia el archivo a save_path (compactado con VACUUM INTO si compact y es una DB).
+        Los destinos ya se eligieron en el hilo principal.
         """
         try:
             initial_file_name = os.path.basename(source_file_path)
             file_extension = os.path.splitext(initial_file_name)[1].lower()
 
-            if file_extension == '.db':
-                # Preguntar al usuario si desea exportar a CSV o descargar directamente el .db
-                choice = messagebox.askyesno(
-                    "Opciones de Descarga de Base de Datos",
-                    f"El archivo '{initial_file_name}' es una base de datos SQLite.\n\n"
-                    "¿Desea exportar todas sus tablas a archivos CSV separados?\n"
-                    "(Si selecciona 'No', se descargará el archivo .db directamente)."
-                )
-
-                if choice: # El usuario eligió exportar a CSV(s)
-                    self.write(f"ℹ️ Exportando tablas de '{initial_file_name}' a CSV(s)...\n")
-                    # Diálogo para seleccionar la carpeta de destino para los CSVs
-                    destination_directory = filedialog.askdirectory(
-                        title=f"Seleccionar Carpeta para Guardar los Archivos CSV de '{initial_file_name}'"
-                    )
-
-                    if not destination_directory:
-                        message = "ℹ️ Exportación de CSVs cancelada: No se seleccionó una carpeta de destino."
-                        self.after(0, lambda: self.write(message + "\n"))
-                        self.after(0, lambda: messagebox.showinfo("Exportación Cancelada", message))
-                        return
-
-                    conn = None
-                    try:
-                        conn = sqlite3.connect(source_file_path)
-                        cursor = conn.cursor()
-                        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-                        tables = [row[0] for row in cursor.fetchall()]
-
-                        if not tables:
-                            message = f"⚠️ La base de datos '{initial_file_name}' no contiene tablas para exportar."
-                            self.after(0, lambda: self.write(message + "\n"))
-                            self.after(0, lambda: messagebox.showwarning("Sin Tablas", message))
-                            return
-
-                        exported_files = []
-                        for table_name in tables:
-                            try:
-                                df_table = pd.read_sql_query(f"SELECT * FROM \"{table_name}\"", conn)
-                                # Asegurar que los nombres de los archivos CSV sean únicos y descriptivos
-                                base_file_name = os.path.splitext(initial_file_name)[0]
-                                output_csv_path = os.path.join(destination_directory, 
-                                                               f"{base_file_name}_{table_name}.csv")
-                                # CAMBIO CLAVE: Usar sep=';' para el delimitador de punto y coma
-                                df_table.to_csv(output_csv_path, index=False, encoding='utf-8', sep=';')
-                                exported_files.append(os.path.basename(output_csv_path))
-                                self.write(f"✅ Tabla '{table_name}' exportada a '{os.path.basename(output_csv_path)}'.\n")
-                            except Exception as table_e:
-                                self.write(f"❌ Error al exportar tabla '{table_name}': {table_e}\n")
-                        
-                        if exported_files:
-                            message = f"✅ Exportación de tablas completada. Archivos CSV guardados en '{destination_directory}'.\nArchivos: {', '.join(exported_files)}"
-                            self.after(0, lambda: messagebox.showinfo("Exportación Completada", message))
+            if destination_directory: # Exportar las tablas de la DB a CSV(s)
+                self.write(f"ℹ️ Exportando tablas de '{initial_file_name}' a CSV(s)...\n")
+                try:
+                    # Asegurar que los nombres de los archivos CSV sean únicos y descriptivos
+                    base_file_name = os.path.splitext(initial_file_name)[0]
+                    outputs = {table_name: os.path.join(destination_directory, f"{base_file_name}_{table_name}.csv")
+                               for table_name in tables}
+
+                    def on_table_done(table_name, result, error):
+                        csv_name = os.path.basename(outputs[table_name])
+                        if error is None:
+                            self.write(f"✅ Tabla '{table_name}' exportada a '{csv_name}': "
+                                       f"{formatear_progreso(result['filas'], result['bytes'], result['segundos'])}\n")
                         else:
-                            message = "⚠️ No se pudo exportar ninguna tabla a CSV. Verifique los logs para más detalles."
-                            self.after(0, lambda: messagebox.showwarning("Exportación Incompleta", message))
-
-                    except Exception as db_e:
-                        message = f"❌ Error al acceder a la base de datos '{initial_file_name}' para exportar a CSV: {db_e}"
-                        self.after(0, lambda: self.write(message + "\n"))
-                        self.after(0, lambda: messagebox.showerror("Error de Base de Datos", message))
-                    finally:
-                        if conn:
-                            conn.close()
-
-                else: # El usuario eligió descargar el archivo .db directamente
-                    save_path = filedialog.asksaveasfilename(
-                        initialfile=initial_file_name,
-                        defaultextension=file_extension,
-                        filetypes=[(f"Archivos {file_extension.upper()}", f"*{file_extension}"), ("Todos los archivos", "*.*")]
-                    )
-                    if save_path:
-                        shutil.copy(source_file_path, save_path)
-                        message = f"✅ Archivo '{initial_file_name}' descargado exitosamente a:\n{save_path}"
-                        self.after(0, lambda: self.write(message + "\n"))
-                        self.after(0, lambda: messagebox.showinfo("Descarga Completada", message))
+                            self.write(f"❌ Error al exportar tabla '{table_name}': {error}\n")
+
+                    # Las tablas se exportan a la vez en un pool de procesos, cada uno con su conexión de
+                    # solo lectura; el ';' como delimitador se mantiene (ver exportacion.py)
+                    summary = exportar_tablas_csv_en_paralelo(os.path.abspath(source_file_path), outputs,
+                                                              al_terminar_tabla=on_table_done)
+                    self.write(f"ℹ️ Total: {formatear_progreso(summary['filas'], summary['bytes'], summary['segundos'])}\n")
+                    exported_files = [os.path.basename(outputs[table_name]) for table_name in tables
+                                      if table_name in summary['resultados']]
+
+                    if exported_files:
+                        message = f"✅ Exportación de tablas completada. Archivos CSV guardados en '{destination_directory}'.\nArchivos: {', '.join(exported_files)}"
+                        self.after(0, lambda: messagebox.showinfo("Exportación Completada", message))
                     else:
-                        message = "ℹ️ Descarga de archivo .db cancelada."
-                        self.after(0, lambda: self.write(message + "\n"))
-                        self.after(0, lambda: messagebox.showinfo("Descarga Cancelada", message))
-            else: # No es un archivo .db (ej. .txt), proceder con descarga directa normal
-                # Aunque ahora solo se listan .db, mantenemos esta rama por si en el futuro se vuelve a listar .txt u otros
-                save_path = filedialog.asksaveasfilename(
-                    initialfile=initial_file_name,
-                    defaultextension=file_extension,
-                    filetypes=[(f"Archivos {file_extension.upper()}", f"*{file_extension}"), ("Todos los archivos", "*.*")]
-                )
-                if save_path:
-                    shutil.copy(source_file_path, save_path)
-                    message = f"✅ Archivo '{initial_file_name}' descargado exitosamente a:\n{save_path}"
-                    self.after(0, lambda: self.write(message + "\n"))
-                    self.after(0, lambda: messagebox.showinfo("Descarga Completada", message))
-                else:
-                    message = "ℹ️ Descarga de archivo cancelada."
+                        message = "⚠️ No se pudo exportar ninguna tabla a CSV. Verifique los logs para más detalles."
+                        self.after(0, lambda: messagebox.showwarning("Exportación Incompleta", message))
+
+                except Exception as db_e:
+                    message = f"❌ Error al acceder a la base de datos '{initial_file_name}' para exportar a CSV: {db_e}"
                     self.after(0, lambda: self.write(message + "\n"))
-                    self.after(0, lambda: messagebox.showinfo("Descarga Cancelada", message))
+                    self.after(0, lambda: messagebox.showerror("Error de Base de Datos", message))
+
+            elif file_extension == '.db': # Descargar el archivo .db directamente
+                # Copia consistente aunque un ETL esté escribiendo (ver exportacion.copiar_base_datos)
+                result = copiar_base_datos(
+                    source_file_path, save_path, compactar=compact,
+                    al_progresar=lambda copied, total: self.write(
+                        f"📦 Copiando '{initial_file_name}': {copied * 100 // max(total, 1)}% ({copied:,}/{total:,} páginas)\n"))
+                self.write(f"ℹ️ Copia de {result['bytes'] / (1024 * 1024):,.1f} MB en {result['segundos']:.1f} s.\n")
+                message = f"✅ Archivo '{initial_file_name}' descargado exitosamente a:\n{save_path}"
+                self.after(0, lambda: self.write(message + "\n"))
+                self.after(0, lambda: messagebox.showinfo("Descarga Completada", message))
+            else: # No es un archivo .db (ej. .txt): copia directa
+                shutil.copy(source_file_path, save_path)
+                message = f"✅ Archivo '{initial_file_name}' descargado exitosamente a:\n{save_path}"
+                self.after(0, lambda: self.write(message + "\n"))
+                self.after(0, lambda: messagebox.showinfo("Descarga Completada", message))
         except Exception as e:
             error_message = f"❌ ERROR CRÍTICO DURANTE LA DESCARGA DEL ARCHIVO: {e}"
             self.after(0, lambda: self.write(error_message + "\n"))
@@ -775,5 +1250,5 @@ class EtlApp(ctk.CTk):
 
 # Punto de entrada de la aplicación
 if __name__ == "__main__":
-    app = EtlApp()
+    app = EtlApp(measure_startup="--medir-inicio" in sys.argv)
     app.mainloop()
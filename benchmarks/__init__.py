@@ -0,0 +1 @@
+# Mediciones de rendimiento de la aplicación (se ejecutan con: python -m benchmarks.<modulo>)
@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.generadores import SEMILLA, generar_entradas
+from metricas import ultima_ejecucion, VARIABLE_MEDIR_MEMORIA
+
+# --- Medición de los ETL con datos sintéticos ---
+# Para cada tamaño genera (o reutiliza) los archivos de entrada en benchmarks/datos/<tamaño>/, ejecuta
+# cada ETL en un proceso aparte con ese directorio como directorio de trabajo y toma las métricas por
+# etapa que el ETL guarda en ejecuciones_etl.db (ver metricas.py). El informe (JSON) incluye el
+# rendimiento en filas por segundo de cada etapa; con --compare se compara contra un informe anterior
+# y se marcan las etapas cuyo rendimiento bajó más que la tolerancia.
+# Uso (desde la carpeta del proyecto):
+#   python -m benchmarks.etl [--tamanos 10k 1m 10m] [--etl famosos ...] [--informe RUTA] [--compare BASE]
+
+DIRECTORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO_DATOS = os.path.join(DIRECTORIO_APP, 'benchmarks', 'datos')
+SCRIPT_ETL = os.path.join(DIRECTORIO_APP, 'ejecutar_etl.py')
+ETLS = ('ciudades', 'famosos', 'ubicacion')
+TAMANOS = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+VERSION_INFORME = 1
+# Bajada de rendimiento (fracción) a partir de la cual --compare marca una regresión
+TOLERANCIA = 0.15
+# Las etapas más cortas que esto se informan pero no se comparan (su tiempo es casi todo ruido)
+SEGUNDOS_MINIMOS_COMPARACION = 0.05
+# Nombre de la fila con el total de la ejecución en el informe y en la comparación
+ETAPA_TOTAL = '(total)'
+
+
+def ejecutar_etl(etl, directorio, medir_memoria=False):
+    """
+    Ejecuta un ETL con ejecutar_etl.py en el directorio dado y devuelve el registro de métricas que guardó.
+    """
+    inicio = time.time()
+    entorno = {**os.environ, 'PYTHONIOENCODING': 'utf-8', VARIABLE_MEDIR_MEMORIA: '1' if medir_memoria else '0'}
+    proceso = subprocess.run(
+        # --forzar: con las mismas entradas el ETL se omitiría (ver manifiesto.py)
+        [sys.executable, SCRIPT_ETL, etl, '--forzar', '--directorio-logs', os.path.join(directorio, 'logs')],
+        cwd=directorio, env=entorno, capture_output=True, text=True, encoding='utf-8', errors='replace')
+    registro = ultima_ejecucion(etl, os.path.join(directorio, 'ejecuciones_etl.db'))
+    if proceso.returncode != 0 or registro is None or registro['inicio_epoch'] < inicio:
+        raise RuntimeError(f"El ETL {etl} falló (ver {os.path.join(directorio, 'logs')}):\n{proceso.stdout[-2000:]}")
+    return registro
+
+
+def filas_por_segundo(filas, segundos):
+    return filas / segundos if filas and segundos > 0 else None
+
+
+def combinar_repeticiones(etl, tamano, filas, registros):
+    """
+    Resultado de un ETL en un tamaño: la mediana de cada etapa entre las repeticiones.
+    El rendimiento de cada etapa se calcula sobre sus filas de entrada (o de salida si no tiene).
+    """
+    etapas = []
+    for posicion, etapa in enumerate(registros[0]['etapas']):
+        medidas = [registro['etapas'][posicion] for registro in registros]
+        segundos = statistics.median(medida['segundos'] for medida in medidas)
+        filas_etapa = etapa['filas_entrada'] if etapa['filas_entrada'] is not None else etapa['filas_salida']
+        picos = [medida['pico_memoria_bytes'] for medida in medidas if medida['pico_memoria_bytes'] is not None]
+        etapas.append({
+            'etapa': etapa['etapa'],
+            'segundos': segundos,
+            'cpu_segundos': statistics.median(medida['cpu_segundos'] for medida in medidas),
+            'filas_entrada': etapa['filas_entrada'],
+            'filas_salida': etapa['filas_salida'],
+            'filas_por_segundo': filas_por_segundo(filas_etapa, segundos),
+            'pico_memoria_bytes': max(picos) if picos else None,
+        })
+    segundos = statistics.median(registro['segundos'] for registro in registros)
+    picos = [registro['pico_memoria_bytes'] for registro in registros if registro['pico_memoria_bytes'] is not None]
+    return {
+        'etl': etl,
+        'tamano': tamano,
+        'filas': filas,
+        'repeticiones': len(registros),
+        'segundos': segundos,
+        'filas_por_segundo': filas_por_segundo(filas, segundos),
+        'pico_memoria_bytes': max(picos) if picos else None,
+        'etapas': etapas,
+    }
+
+
+def _texto_rendimiento(valor):
+    return '-' if valor is None else f"{valor:,.0f}"
+
+
+def mostrar_resultado(resultado):
+    print(f"\n===== {resultado['etl'].upper()} · {resultado['tamano']} ({resultado['filas']:,} filas): "
+          f"{resultado['segundos']:.2f} s, {_texto_rendimiento(resultado['filas_por_segundo'])} filas/s =====")
+    print(f"  {'etapa':<24}{'s':>9}{'CPU s':>9}{'filas/s':>14}{'pico MB':>10}")
+    for etapa in resultado['etapas']:
+        pico = '-' if etapa['pico_memoria_bytes'] is None else f"{etapa['pico_memoria_bytes'] / (1024 * 1024):,.1f}"
+        print(f"  {etapa['etapa']:<24}{etapa['segundos']:>9.2f}{etapa['cpu_segundos']:>9.2f}"
+              f"{_texto_rendimiento(etapa['filas_por_segundo']):>14}{pico:>10}")
+
+
+def _rendimientos(informe):
+    """
+    (etl, tamaño, etapa) -> (filas por segundo, segundos) de todas las etapas y totales del informe.
+    """
+    rendimientos = {}
+    for resultado in informe['resultados']:
+        clave = (resultado['etl'], resultado['tamano'])
+        rendimientos[clave + (ETAPA_TOTAL,)] = (resultado['filas_por_segundo'], resultado['segundos'])
+        for etapa in resultado['etapas']:
+            rendimientos[clave + (etapa['etapa'],)] = (etapa['filas_por_segundo'], etapa['segundos'])
+    return rendimientos
+
+
+def comparar_informes(base, actual, tolerancia=TOLERANCIA):
+    """
+    Compara el rendimiento de cada etapa presente en ambos informes.
+    Devuelve una lista de (etl, tamaño, etapa, filas/s base, filas/s actual, cambio, es_regresion);
+    cambio es la variación relativa del rendimiento (-0.2 = 20 % más lento).
+    """
+    rendimientos_base = _rendimientos(base)
+    comparacion = []
+    for clave, (actual_fps, segundos) in _rendimientos(actual).items():
+        if clave not in rendimientos_base:
+            continue
+        base_fps, segundos_base = rendimientos_base[clave]
+        if not actual_fps or not base_fps or max(segundos, segundos_base) < SEGUNDOS_MINIMOS_COMPARACION:
+            continue
+        cambio = actual_fps / base_fps - 1
+        comparacion.append(clave + (base_fps, actual_fps, cambio, cambio < -tolerancia))
+    return comparacion
+
+
+def mostrar_comparacion(comparacion, ruta_base, tolerancia):
+    print(f"\n===== COMPARACIÓN CON '{ruta_base}' (tolerancia: {tolerancia:.0%}) =====")
+    print(f"   {'etl':<10}{'tamaño':<7}{'etapa':<24}{'base filas/s':>14}{'actual':>14}{'cambio':>9}")
+    for etl, tamano, etapa, base_fps, actual_fps, cambio, es_regresion in comparacion:
+        marca = "❌ " if es_regresion else "   "
+        print(f"{marca}{etl:<10}{tamano:<7}{etapa:<24}{base_fps:>14,.0f}{actual_fps:>14,.0f}{cambio:>+9.1%}")
+    regresiones = [fila for fila in comparacion if fila[-1]]
+    if regresiones:
+        print(f"❌ {len(regresiones)} etapas con el rendimiento más de un {tolerancia:.0%} por debajo de la línea base.")
+    else:
+        print("✅ Sin regresiones de rendimiento.")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide los ETL con datos sintéticos de varios tamaños.")
+    parser.add_argument('--tamanos', nargs='+', default=['10k'], choices=list(TAMANOS),
+                        help="Tamaños de entrada a medir (por defecto, 10k).")
+    parser.add_argument('--etl', nargs='+', default=list(ETLS), choices=ETLS, help="ETL a medir (por defecto, todos).")
+    parser.add_argument('--repeticiones', type=int, default=1, help="Ejecuciones por ETL y tamaño (se toma la mediana).")
+    parser.add_argument('--semilla', type=int, default=SEMILLA, help="Semilla de los datos sintéticos.")
+    parser.add_argument('--directorio-datos', default=DIRECTORIO_DATOS, help="Dónde se generan los datos y las bases de datos.")
+    parser.add_argument('--medir-memoria', action='store_true', help="Mide el pico de memoria con tracemalloc (más lento).")
+    parser.add_argument('--informe', default=None,
+                        help="Ruta del informe JSON (por defecto, <directorio-datos>/informe_etl.json).")
+    parser.add_argument('--compare', metavar='BASE', default=None,
+                        help="Informe anterior con el que comparar; el código de salida es 1 si hay regresiones.")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help=f"Bajada de rendimiento tolerada con --compare (por defecto, {TOLERANCIA}).")
+    args = parser.parse_args(argv)
+
+    base = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+
+    informe = {
+        'version': VERSION_INFORME,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'semilla': args.semilla,
+        'medir_memoria': args.medir_memoria,
+        'resultados': [],
+    }
+    for tamano in args.tamanos:
+        filas = TAMANOS[tamano]
+        directorio = os.path.join(args.directorio_datos, tamano)
+        inicio = time.perf_counter()
+        generados = generar_entradas(directorio, filas, args.etl, args.semilla)
+        if generados:
+            print(f"🧪 Datos de {tamano} generados para {', '.join(generados)} en {time.perf_counter() - inicio:.1f} s.")
+        for etl in args.etl:
+            registros = [ejecutar_etl(etl, directorio, args.medir_memoria) for _ in range(args.repeticiones)]
+            resultado = combinar_repeticiones(etl, tamano, filas, registros)
+            informe['resultados'].append(resultado)
+            mostrar_resultado(resultado)
+
+    ruta_informe = args.informe or os.path.join(args.directorio_datos, 'informe_etl.json')
+    os.makedirs(os.path.dirname(os.path.abspath(ruta_informe)), exist_ok=True)
+    with open(ruta_informe, 'w', encoding='utf-8') as archivo:
+        json.dump(informe, archivo, indent=2, ensure_ascii=False)
+    print(f"\n📄 Informe guardado en '{ruta_informe}'.")
+
+    if base is not None:
+        comparacion = comparar_informes(base, informe, args.tolerancia)
+        if mostrar_comparacion(comparacion, args.compare, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+import json
+import os
+import random
+
+# --- Datos sintéticos para medir los ETL a escala ---
+# Generan los tres archivos de entrada con el mismo formato que los de ejemplo, pero con la cantidad
+# de filas pedida. Con la misma semilla el contenido es idéntico byte a byte, así que las mediciones
+# de distintas versiones del código son comparables.
+# Cada fila "única" se deriva de su índice con un hash (mezcla()), de modo que un duplicado de la
+# fila j se vuelve a generar sin guardar las anteriores en memoria, con variaciones de mayúsculas,
+# tildes, espacios y formato como las que los ETL tienen que normalizar.
+
+SEMILLA = 20240601
+# Nombre de cada archivo de entrada (los mismos que INPUT_FILE_* de cada ETL)
+ARCHIVOS_ENTRADA = {
+    'ciudades': 'datos.txt',
+    'famosos': 'DATOS2.txt',
+    'ubicacion': 'DATOS3.txt',
+}
+# Archivo que registra con qué parámetros se generaron los datos de un directorio
+ARCHIVO_MARCA = 'generado.json'
+# Versión de los generadores: cambiarla si cambia lo que producen, para regenerar los datos guardados
+VERSION_GENERADORES = 1
+# Filas que se acumulan antes de escribir en el archivo
+FILAS_POR_ESCRITURA = 50_000
+
+_MASCARA_64 = (1 << 64) - 1
+
+# Sílabas para nombres únicos: ninguna coincide con otra al quitar tildes y mayúsculas
+_SILABAS = ('ba', 'co', 'da', 'fe', 'ga', 'lo', 'ma', 'ne', 'pi', 'ro', 'sa', 'tu', 'vé', 'zó', 'ñu', 'qui', 'llo', 'rí')
+_PAISES = ('Argentina', 'México', 'Perú', 'Colombia', 'Chile', 'Panamá', 'Brasil', 'España',
+           'Bolivia', 'Paraguay', 'Uruguay', 'Ecuador', 'Costa Rica', 'República Dominicana')
+_NOMBRES = ('José', 'María', 'Juan', 'Ana', 'Luis', 'Sofía', 'Andrés', 'Lucía', 'Martín', 'Inés',
+            'Ramón', 'Verónica', 'Óscar', 'Beatriz', 'Joaquín', 'Mónica', 'Raúl', 'Ángela', 'Iván', 'Noemí')
+_APELLIDOS = ('García', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez', 'Sánchez', 'Ramírez',
+              'Núñez', 'Fernández', 'Gómez', 'Díaz', 'Muñoz', 'Álvarez', 'Romero', 'Suárez', 'Castillo',
+              'Ortiz', 'Rubio', 'Marín', 'Ibáñez', 'Peña', 'Cortés', 'Morán')
+_TIPOS_LUGAR = ('Museo', 'Plaza', 'Parque', 'Teatro', 'Catedral', 'Mercado', 'Estación', 'Biblioteca',
+                'Puente', 'Castillo', 'Jardín', 'Mirador')
+_CALLES = ('Avenida del Libertador', 'Calle Mayor', 'Paseo de la Reforma', 'Rua Augusta', 'Gran Vía',
+           'Calle de Alcalá', 'Avenida Corrientes', 'Königstraße', 'Rue de Rivoli', 'Carrera Séptima')
+# Formatos de fecha de DATOS2.txt (día, mes, año -> texto)
+_FORMATOS_FECHA = (
+    lambda d, m, a: f"{d:02d}-{m:02d}-{a}",
+    lambda d, m, a: f"{d:02d}/{m:02d}/{a}",
+    lambda d, m, a: f"{d:02d}.{m:02d}.{a}",
+    lambda d, m, a: f"{a}-{m:02d}-{d:02d}",
+    lambda d, m, a: f"{a}/{m:02d}/{d:02d}",
+    lambda d, m, a: f"{a}{m:02d}{d:02d}",
+)
+_FECHAS_INVALIDAS = ('alrededor del 69 a.C.', 'desconocida', 'siglo XV', '31-02-1900', '')
+
+
+def mezcla(indice, semilla=SEMILLA):
+    """
+    Entero de 64 bits pseudoaleatorio y determinista para un índice (mezclador splitmix64).
+    """
+    x = ((indice + 1) * 0x9E3779B97F4A7C15 + semilla * 0xBF58476D1CE4E5B9) & _MASCARA_64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASCARA_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASCARA_64
+    return x ^ (x >> 31)
+
+
+def nombre_unico(indice):
+    """
+    Nombre pronunciable distinto para cada índice (aun sin tildes ni mayúsculas): 0 -> 'Baco', 1 -> 'Coco'...
+    """
+    base = len(_SILABAS)
+    n = indice + base  # al menos dos sílabas
+    partes = []
+    while n:
+        n, resto = divmod(n, base)
+        partes.append(_SILABAS[resto])
+    return ''.join(partes).capitalize()
+
+
+def _quitar_tildes(texto):
+    return texto.translate(str.maketrans('áéíóúÁÉÍÓÚñÑüÜ', 'aeiouAEIOUnNuU'))
+
+
+def _variar_texto(texto, rng):
+    """
+    Variante de un texto como la que aparece en datos cargados a mano: otras mayúsculas,
+    sin tildes o con espacios de más. Los ETL la normalizan al mismo valor.
+    """
+    variante = rng.randrange(4)
+    if variante == 0:
+        return texto.upper()
+    if variante == 1:
+        return texto.lower()
+    if variante == 2:
+        return _quitar_tildes(texto)
+    return f"  {texto} "
+
+
+def _escribir_filas(ruta, encabezado, filas, codificacion='utf-8'):
+    """
+    Escribe el encabezado (si hay) y las filas en bloques. Escribe en un archivo temporal y lo renombra
+    al terminar, para no dejar un archivo a medio generar si se interrumpe.
+    """
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding=codificacion, newline='\n') as archivo:
+        if encabezado:
+            archivo.write(encabezado + '\n')
+        bloque = []
+        for fila in filas:
+            bloque.append(fila)
+            if len(bloque) >= FILAS_POR_ESCRITURA:
+                archivo.write('\n'.join(bloque) + '\n')
+                bloque = []
+        if bloque:
+            archivo.write('\n'.join(bloque) + '\n')
+    os.replace(temporal, ruta)
+
+
+def _indice_a_repetir(i, rng, tasa_duplicados):
+    """
+    Índice de una fila anterior a repetir en la posición i, o None si la fila i es nueva.
+    """
+    if i == 0 or rng.random() >= tasa_duplicados:
+        return None
+    return rng.randrange(i)
+
+
+def generar_ciudades(ruta, filas, semilla=SEMILLA, tasa_duplicados=0.15):
+    """
+    CSV 'id,nombre_ciudad,pais,poblacion' como datos.txt. Los nombres llevan tildes; una fracción
+    tasa_duplicados de las filas repite una ciudad anterior con otra escritura y otra población.
+    """
+    rng = random.Random(semilla)
+
+    def generar():
+        for i in range(filas):
+            j = _indice_a_repetir(i, rng, tasa_duplicados)
+            original = i if j is None else j
+            h = mezcla(original, semilla)
+            nombre = nombre_unico(original)
+            pais = _PAISES[h % len(_PAISES)]
+            poblacion = 1_000 + (h >> 8) % 20_000_000
+            if j is not None:
+                nombre, pais = _variar_texto(nombre, rng), _variar_texto(pais, rng)
+                poblacion += rng.randint(-1_000, 1_000)
+            yield f"{i + 1},{nombre},{pais},{poblacion}"
+
+    _escribir_filas(ruta, 'id,nombre_ciudad,pais,poblacion', generar())
+
+
+def generar_famosos(ruta, filas, semilla=SEMILLA, tasa_duplicados=0.05, tasa_fechas_invalidas=0.01):
+    """
+    Líneas 'N. Nombre - fecha' como DATOS2.txt, con la fecha en uno de seis formatos al azar.
+    Los duplicados repiten una persona anterior con otras mayúsculas y otro formato de la misma fecha;
+    una fracción tasa_fechas_invalidas tiene fechas que el ETL descarta.
+    """
+    rng = random.Random(semilla + 1)
+
+    def generar():
+        for i in range(filas):
+            j = _indice_a_repetir(i, rng, tasa_duplicados)
+            original = i if j is None else j
+            h = mezcla(original, semilla + 1)
+            nombre = (f"{_NOMBRES[h % len(_NOMBRES)]} {_APELLIDOS[(h >> 8) % len(_APELLIDOS)]} "
+                      f"{_APELLIDOS[(h >> 16) % len(_APELLIDOS)]} {nombre_unico((h >> 24) % 5_000)}")
+            if j is not None:
+                nombre = rng.choice((nombre.upper(), nombre.lower(), _quitar_tildes(nombre)))
+            if rng.random() < tasa_fechas_invalidas:
+                fecha = rng.choice(_FECHAS_INVALIDAS)
+            else:
+                dia, mes, anio = 1 + (h >> 40) % 28, 1 + (h >> 48) % 12, 1400 + (h >> 52) % 606
+                fecha = rng.choice(_FORMATOS_FECHA)(dia, mes, anio)
+            yield f"{i + 1}. {nombre} - {fecha}"
+
+    _escribir_filas(ruta, None, generar())
+
+
+def generar_ubicaciones(ruta, filas, semilla=SEMILLA, tasa_duplicados=0.10, tasa_coordenadas_invalidas=0.01):
+    """
+    Archivo 'Nombre del lugar;Dirección Completa;Georeferencia' en latin-1 como DATOS3.txt.
+    Los duplicados repiten un lugar anterior con otra escritura y las coordenadas desplazadas unos
+    metros; una fracción tasa_coordenadas_invalidas tiene coordenadas fuera de rango o ilegibles.
+    """
+    rng = random.Random(semilla + 2)
+
+    def generar():
+        for i in range(filas):
+            j = _indice_a_repetir(i, rng, tasa_duplicados)
+            original = i if j is None else j
+            h = mezcla(original, semilla + 2)
+            nombre = f"{_TIPOS_LUGAR[h % len(_TIPOS_LUGAR)]} {nombre_unico(original)}"
+            direccion = (f"{_CALLES[(h >> 8) % len(_CALLES)]} {1 + (h >> 16) % 3000}, "
+                         f"{nombre_unico((h >> 28) % 2_000)}, {_PAISES[(h >> 40) % len(_PAISES)]}")
+            lat = ((h >> 12) % 1_700_000) / 10_000 - 85
+            lon = ((h >> 36) % 3_500_000) / 10_000 - 175
+            if j is not None:
+                nombre = _variar_texto(nombre, rng)
+                lat += rng.uniform(-0.0003, 0.0003)
+                lon += rng.uniform(-0.0003, 0.0003)
+            if rng.random() < tasa_coordenadas_invalidas:
+                georeferencia = rng.choice(('sin datos', f"{lat + 200:.4f}, {lon:.4f}"))
+            else:
+                georeferencia = f"{lat:.4f}, {lon:.4f}"
+            yield f"{nombre};{direccion};{georeferencia}"
+
+    _escribir_filas(ruta, 'Nombre del lugar;Dirección Completa;Georeferencia', generar(), codificacion='latin-1')
+
+
+GENERADORES = {
+    'ciudades': generar_ciudades,
+    'famosos': generar_famosos,
+    'ubicacion': generar_ubicaciones,
+}
+
+
+def generar_entradas(directorio, filas, etls=tuple(GENERADORES), semilla=SEMILLA):
+    """
+    Genera en el directorio los archivos de entrada de los ETL indicados con 'filas' filas cada uno.
+    Los archivos ya generados con los mismos parámetros no se vuelven a generar.
+    Devuelve la lista de ETL cuyos archivos se generaron.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    ruta_marca = os.path.join(directorio, ARCHIVO_MARCA)
+    try:
+        with open(ruta_marca, encoding='utf-8') as archivo:
+            marca = json.load(archivo)
+    except (OSError, ValueError):
+        marca = {}
+    parametros = {'filas': filas, 'semilla': semilla, 'version': VERSION_GENERADORES}
+    generados = []
+    for etl in etls:
+        ruta = os.path.join(directorio, ARCHIVOS_ENTRADA[etl])
+        if marca.get(etl) == parametros and os.path.exists(ruta):
+            continue
+        GENERADORES[etl](ruta, filas, semilla)
+        marca[etl] = parametros
+        generados.append(etl)
+        with open(ruta_marca, 'w', encoding='utf-8') as archivo:
+            json.dump(marca, archivo, indent=2)
+    return generados
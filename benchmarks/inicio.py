@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# --- Medición del arranque de app.py ---
+# 1) Importaciones: ejecuta 'import app' con -X importtime y lista los módulos que más tardan.
+# 2) Arranque completo: lanza 'app.py --medir-inicio' varias veces; la aplicación informa en qué momento
+#    terminó las importaciones, creó la ventana, se dibujó por primera vez y cargó la primera tabla.
+# Uso (desde la carpeta del proyecto): python -m benchmarks.inicio [--repeticiones N] [--top N]
+
+DIRECTORIO_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Objetivo: desde que se lanza el proceso hasta el primer dibujo de la ventana
+OBJETIVO_PRIMER_DIBUJO_MS = 1000
+# Módulos que no deberían importarse al arrancar (se cargan al ejecutar un ETL o exportar)
+MODULOS_DIFERIDOS = ('pandas', 'numpy', 'sqlalchemy', 'openpyxl', 'multiprocessing',
+                     'etl_ciudades', 'etl_famosos', 'etl_ubicacion')
+MARCA_MEDICION = 'MEDICION_INICIO '
+
+
+def medir_importaciones(top=15, modulo='app'):
+    """
+    Ejecuta 'import <modulo>' con -X importtime. Devuelve (ms de la importación completa, lista de
+    (ms acumulados, módulo) de sus importaciones directas de mayor a menor, módulos diferidos importados).
+    """
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+                             cwd=DIRECTORIO_APP, capture_output=True, text=True)
+    if proceso.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {modulo}.py:\n{proceso.stderr[-2000:]}")
+
+    # Cada módulo se informa al terminar de importarse, después de sus dependencias (con más sangría)
+    lineas = []
+    for linea in proceso.stderr.splitlines():
+        if linea.startswith('import time:') and 'cumulative' not in linea:
+            _, acumulado, nombre = linea[len('import time:'):].split('|')
+            sangria = len(nombre) - len(nombre.lstrip(' '))
+            lineas.append((sangria, int(acumulado) / 1000, nombre.strip()))
+    fin = next(i for i, (sangria, _, nombre) in enumerate(lineas) if sangria == 1 and nombre == modulo)
+    inicio = fin
+    while inicio > 0 and lineas[inicio - 1][0] > 1:
+        inicio -= 1
+
+    subarbol = lineas[inicio:fin]
+    directos = sorted(((ms, nombre) for sangria, ms, nombre in subarbol if sangria == 3), reverse=True)
+    importados = {nombre.split('.')[0] for _, _, nombre in subarbol}
+    diferidos_importados = [nombre for nombre in MODULOS_DIFERIDOS if nombre in importados]
+    return lineas[fin][1], directos[:top], diferidos_importados
+
+
+def medir_arranque():
+    """
+    Lanza la aplicación con --medir-inicio y devuelve los tiempos de cada etapa en ms desde el lanzamiento
+    del proceso (incluye el arranque del intérprete, que la aplicación no puede medir por sí misma).
+    """
+    lanzamiento = time.time()
+    proceso = subprocess.run([sys.executable, 'app.py', '--medir-inicio'],
+                             cwd=DIRECTORIO_APP, capture_output=True, text=True, timeout=120)
+    for linea in proceso.stdout.splitlines():
+        if linea.startswith(MARCA_MEDICION):
+            tiempos = json.loads(linea[len(MARCA_MEDICION):])
+            arranque_interprete_ms = (tiempos.pop('epoch_carga_app') - lanzamiento) * 1000
+            etapas = {'interprete': arranque_interprete_ms}
+            etapas.update((etapa, ms + arranque_interprete_ms) for etapa, ms in tiempos.items())
+            return etapas
+    raise RuntimeError(f"La aplicación no informó los tiempos de arranque:\n{proceso.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el tiempo de arranque de app.py.")
+    parser.add_argument('--repeticiones', type=int, default=5, help="Arranques completos a medir (0 para omitirlos).")
+    parser.add_argument('--top', type=int, default=15, help="Módulos a listar en la medición de importaciones.")
+    args = parser.parse_args()
+
+    total, modulos, diferidos = medir_importaciones(args.top)
+    print(f"📦 Importación de app.py: {total:.1f} ms")
+    for ms, modulo in modulos:
+        print(f"   {ms:8.1f} ms  {modulo}")
+    if diferidos:
+        print(f"⚠️ Módulos que deberían cargarse bajo demanda y se importan al arrancar: {', '.join(diferidos)}")
+    else:
+        print("✅ Ningún módulo pesado (ETL, pandas, openpyxl, multiprocessing) se importa al arrancar.")
+
+    if args.repeticiones <= 0:
+        return 0
+    mediciones = [medir_arranque() for _ in range(args.repeticiones)]
+    print(f"\n⏱️ Arranque completo (mediana de {args.repeticiones}, ms desde el lanzamiento del proceso):")
+    for etapa in mediciones[0]:
+        print(f"   {etapa:<15} {statistics.median(medicion[etapa] for medicion in mediciones):8.1f} ms")
+    primer_dibujo = statistics.median(medicion['primer_dibujo'] for medicion in mediciones)
+    if primer_dibujo <= OBJETIVO_PRIMER_DIBUJO_MS:
+        print(f"✅ Primer dibujo en {primer_dibujo:.0f} ms (objetivo: {OBJETIVO_PRIMER_DIBUJO_MS} ms).")
+        return 0
+    print(f"❌ Primer dibujo en {primer_dibujo:.0f} ms, por encima del objetivo de {OBJETIVO_PRIMER_DIBUJO_MS} ms.")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
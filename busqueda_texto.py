@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+
+from visor_datos import citar_identificador, escapar_like, firma_base_datos
+
+# --- Búsqueda de texto completo (FTS5) para el visor de tablas ---
+# Los índices no se guardan en la base de datos de los ETL (que el visor abre en solo lectura y que
+# los ETL recrean), sino en un archivo aparte junto a ella: '<base>.db.fts-cache'. Cada índice se
+# asocia a la firma (mtime y tamaño) de la base de datos y se reconstruye solo si esta cambió.
+
+SUFIJO_CACHE_FTS = '.fts-cache'
+# Nombre con el que se adjunta el archivo de índices a la conexión del visor
+ESQUEMA_CACHE_FTS = 'fts_cache'
+# Tabla del archivo de índices que registra qué tabla y columnas cubre cada índice
+TABLA_METADATOS_FTS = 'indices_fts'
+# Tokenizador: separa por caracteres Unicode e ignora tildes (JOSÉ encuentra JOSE)
+TOKENIZADOR_FTS = "unicode61 remove_diacritics 2"
+
+_PALABRAS = re.compile(r'\w+', re.UNICODE)
+
+
+def ruta_cache_fts(ruta_db):
+    return ruta_db + SUFIJO_CACHE_FTS
+
+
+def nombre_indice_fts(tabla):
+    """
+    Nombre de la tabla FTS5 para una tabla de datos (un hash corto, válido para cualquier nombre de tabla).
+    """
+    return f"fts_{hashlib.blake2s(tabla.encode('utf-8'), digest_size=6).hexdigest()}"
+
+
+def es_tipo_texto(tipo):
+    """
+    Indica si un tipo declarado de SQLite tiene afinidad de texto (TEXT, CHAR, CLOB o sin tipo).
+    """
+    tipo = (tipo or '').upper()
+    return not tipo or any(clave in tipo for clave in ('CHAR', 'CLOB', 'TEXT'))
+
+
+def columnas_texto(conn, tabla):
+    """
+    Devuelve las columnas de la tabla con afinidad de texto.
+    """
+    return [nombre for _, nombre, tipo, *_ in conn.execute(f"PRAGMA table_info({citar_identificador(tabla)})")
+            if es_tipo_texto(tipo)]
+
+
+def texto_a_consulta_fts(texto):
+    """
+    Convierte lo escrito en el buscador a una consulta FTS5: cada palabra entre comillas y como prefijo,
+    todas obligatorias ('juan per' -> '"juan"* "per"*'). Devuelve None si no hay palabras.
+    """
+    palabras = _PALABRAS.findall(texto or '')
+    if not palabras:
+        return None
+    return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+
+def condicion_like(columnas, texto):
+    """
+    Condición SQL parametrizada que busca el texto en cualquiera de las columnas con LIKE.
+    Se usa cuando la tabla no admite índice FTS (vistas o tablas sin rowid).
+    Devuelve (sql, parametros).
+    """
+    patron = f"%{escapar_like(texto.strip())}%"
+    partes = [f"t.{citar_identificador(columna)} LIKE ? ESCAPE '\\'" for columna in columnas]
+    return ' OR '.join(partes), [patron] * len(partes)
+
+
+def _leer_metadatos(conn_cache, tabla):
+    existe = conn_cache.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLA_METADATOS_FTS,)).fetchone()
+    if existe is None:
+        return None
+    return conn_cache.execute(
+        f"SELECT nombre_fts, columnas, firma FROM {TABLA_METADATOS_FTS} WHERE tabla = ?", (tabla,)).fetchone()
+
+
+def indice_fts_vigente(ruta_db, tabla, columnas):
+    """
+    Devuelve el nombre del índice FTS de la tabla si existe y corresponde al estado actual
+    de la base de datos y a las mismas columnas; si no, None.
+    """
+    ruta_cache = ruta_cache_fts(ruta_db)
+    if not os.path.exists(ruta_cache):
+        return None
+    conn_cache = sqlite3.connect(f"file:{ruta_cache}?mode=ro", uri=True)
+    try:
+        metadatos = _leer_metadatos(conn_cache, tabla)
+    except sqlite3.Error:
+        return None
+    finally:
+        conn_cache.close()
+    if metadatos is None:
+        return None
+    nombre_fts, columnas_guardadas, firma = metadatos
+    if json.loads(columnas_guardadas) != list(columnas) or firma != json.dumps(firma_base_datos(ruta_db)):
+        return None
+    return nombre_fts
+
+
+def construir_indice_fts(ruta_db, tabla, columnas):
+    """
+    Crea (o recrea) el índice FTS5 de las columnas de texto de la tabla en el archivo de índices.
+    El índice no guarda el texto (content=''), solo el rowid de cada fila de la tabla original.
+    Puede ejecutarse en un hilo aparte: usa sus propias conexiones.
+    Devuelve el nombre del índice.
+    """
+    firma = firma_base_datos(ruta_db)
+    nombre_fts = nombre_indice_fts(tabla)
+    columnas_sql = ", ".join(citar_identificador(columna) for columna in columnas)
+
+    # Con uri=True el nombre del ATTACH también se interpreta como URI (mode=ro) aunque SQLite se haya
+    # compilado sin URI por defecto; si no, se crearía un archivo vacío llamado 'file:...?mode=ro'
+    conn_cache = sqlite3.connect(f"file:{ruta_cache_fts(ruta_db)}", uri=True)
+    try:
+        conn_cache.execute("ATTACH DATABASE ? AS origen", (f"file:{ruta_db}?mode=ro",))
+        with conn_cache:
+            conn_cache.execute(f"""
+            CREATE TABLE IF NOT EXISTS {TABLA_METADATOS_FTS} (
+                tabla TEXT PRIMARY KEY,
+                nombre_fts TEXT,
+                columnas TEXT,
+                firma TEXT
+            )
+            """)
+            conn_cache.execute(f"DROP TABLE IF EXISTS main.{nombre_fts}")
+            conn_cache.execute(
+                f"CREATE VIRTUAL TABLE main.{nombre_fts} USING fts5({columnas_sql}, content='', tokenize='{TOKENIZADOR_FTS}')")
+            conn_cache.execute(
+                f"INSERT INTO main.{nombre_fts} (rowid, {columnas_sql}) "
+                f"SELECT rowid, {columnas_sql} FROM origen.{citar_identificador(tabla)}")
+            conn_cache.execute(
+                f"INSERT OR REPLACE INTO {TABLA_METADATOS_FTS} (tabla, nombre_fts, columnas, firma) VALUES (?, ?, ?, ?)",
+                (tabla, nombre_fts, json.dumps(list(columnas)), json.dumps(firma)))
+    finally:
+        conn_cache.close()
+    return nombre_fts
+
+
+def adjuntar_cache_fts(conn, ruta_db):
+    """
+    Adjunta (en solo lectura) el archivo de índices a la conexión del visor, si aún no lo está.
+    Devuelve el nombre del esquema adjuntado.
+    """
+    adjuntas = {fila[1] for fila in conn.execute("PRAGMA database_list")}
+    if ESQUEMA_CACHE_FTS not in adjuntas:
+        conn.execute(f"ATTACH DATABASE ? AS {ESQUEMA_CACHE_FTS}", (f"file:{ruta_cache_fts(ruta_db)}?mode=ro",))
+    return ESQUEMA_CACHE_FTS
@@ -0,0 +1,61 @@
+import sqlite3
+
+from etl_ubicacion import DATABASE_NAME_UBICACION, NORMALIZED_TABLE_UBICACION, RTREE_TABLE_UBICACION
+
+# --- Consultas espaciales sobre datos_ubicacion.db ---
+# Las búsquedas usan la tabla R*Tree creada por run_etl_ubicacion, de modo que solo se leen
+# los lugares cercanos al rectángulo pedido en lugar de recorrer toda la tabla.
+
+# Columnas devueltas por las consultas, en orden
+COLUMNAS_LUGAR = ('id', 'Nombre', 'Direccion', 'lat', 'lon')
+
+
+def abrir_conexion_lectura(database_name=DATABASE_NAME_UBICACION):
+    """
+    Abre una conexión de solo lectura a la base de datos de ubicación.
+    Conviene reutilizarla cuando se hacen muchas consultas seguidas.
+    """
+    return sqlite3.connect(f"file:{database_name}?mode=ro", uri=True)
+
+
+def buscar_en_rectangulo(lat_min, lat_max, lon_min, lon_max, conn=None, database_name=DATABASE_NAME_UBICACION):
+    """
+    Devuelve los lugares cuyas coordenadas están dentro del rectángulo [lat_min, lat_max] x [lon_min, lon_max].
+    Si lon_min > lon_max se entiende que el rectángulo cruza el antimeridiano (180°).
+    El R*Tree guarda las coordenadas en precisión simple y redondea hacia afuera, así que los
+    candidatos se filtran de nuevo con los valores exactos de lat/lon de la tabla.
+    Devuelve una lista de tuplas con las columnas de COLUMNAS_LUGAR.
+    """
+    if lat_min > lat_max:
+        raise ValueError("lat_min no puede ser mayor que lat_max.")
+
+    if lon_min > lon_max:
+        # Dos rectángulos, uno a cada lado del antimeridiano
+        este = buscar_en_rectangulo(lat_min, lat_max, lon_min, 180.0, conn, database_name)
+        oeste = buscar_en_rectangulo(lat_min, lat_max, -180.0, lon_max, conn, database_name)
+        return sorted(este + oeste)
+
+    consulta = f"""
+    SELECT u.id, u.Nombre, u.Direccion, u.lat, u.lon
+    FROM {RTREE_TABLE_UBICACION} r
+    JOIN {NORMALIZED_TABLE_UBICACION} u ON u.id = r.id
+    WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lon >= ? AND r.min_lon <= ?
+      AND u.lat BETWEEN ? AND ? AND u.lon BETWEEN ? AND ?
+    ORDER BY u.id
+    """
+    parametros = (lat_min, lat_max, lon_min, lon_max, lat_min, lat_max, lon_min, lon_max)
+
+    propia = conn is None
+    if propia:
+        conn = abrir_conexion_lectura(database_name)
+    try:
+        return conn.execute(consulta, parametros).fetchall()
+    finally:
+        if propia:
+            conn.close()
+
+
+# Demostración: lugares en Londres y alrededores
+if __name__ == "__main__":
+    for lugar in buscar_en_rectangulo(51.3, 51.7, -0.5, 0.3):
+        print(lugar)
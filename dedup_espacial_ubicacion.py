@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+
+# --- Deduplicación espacial de lugares para etl_ubicacion ---
+# Dos lugares se fusionan cuando están a menos de DISTANCIA_FUSION_M metros y sus nombres se parecen.
+# Las coordenadas se pasan a puntos 3D sobre la esfera y se agrupan en una grilla de celdas
+# del tamaño del umbral: dos lugares a menos del umbral siempre caen en la misma celda o en
+# celdas vecinas, así que los nombres solo se comparan dentro de cada vecindario y nunca todos contra todos.
+
+RADIO_TIERRA_M = 6_371_008.8
+# Distancia máxima (en metros) entre dos lugares para considerarlos el mismo
+DISTANCIA_FUSION_M = 100.0
+# Similitud mínima de nombres: palabras en común sobre las palabras del nombre más corto
+SIMILITUD_MINIMA_NOMBRES = 0.5
+# Palabras que no cuentan al comparar nombres (ya normalizadas a mayúsculas y sin acentos)
+PALABRAS_VACIAS = frozenset({
+    'THE', 'OF', 'AND', 'A', 'AN', 'AT',
+    'EL', 'LA', 'LOS', 'LAS', 'DE', 'DEL', 'Y',
+    'LE', 'LES', 'DU', 'DES', 'ET',
+})
+
+# Tamaño mínimo de celda de la grilla: con celdas de ~12 m cada eje entra en 21 bits
+TAMANO_MINIMO_CELDA_M = 2 * RADIO_TIERRA_M / (1 << 20)
+
+MOTIVO_PROXIMIDAD = 'proximidad'
+MOTIVO_NOMBRE_SIN_COORDENADAS = 'mismo nombre sin coordenadas'
+
+# Vecinos "hacia adelante" de una celda 3D: cada par de celdas vecinas se visita una sola vez
+_DESPLAZAMIENTOS_VECINOS = [
+    (dx, dy, dz)
+    for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+    if (dx, dy, dz) > (0, 0, 0)
+]
+
+
+def palabras_nombre(nombre):
+    """
+    Devuelve el conjunto de palabras significativas de un nombre normalizado.
+    Si todas son palabras vacías, se usan todas.
+    """
+    if not isinstance(nombre, str):
+        return frozenset()
+    palabras = frozenset(nombre.split())
+    significativas = palabras - PALABRAS_VACIAS
+    return significativas or palabras
+
+
+def similitud_nombres(palabras_a, palabras_b):
+    """
+    Proporción de palabras en común respecto al nombre más corto (1.0 si uno contiene al otro).
+    """
+    if not palabras_a or not palabras_b:
+        return 0.0
+    return len(palabras_a & palabras_b) / min(len(palabras_a), len(palabras_b))
+
+
+def _a_cartesianas(lat, lon):
+    """
+    Convierte latitud/longitud en grados a puntos 3D (en metros) sobre la esfera terrestre.
+    """
+    lat_rad = np.radians(lat)
+    lon_rad = np.radians(lon)
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack((cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad))) * RADIO_TIERRA_M
+
+
+def _distancia_arco_m(puntos_a, puntos_b):
+    """
+    Distancia sobre la esfera (en metros) entre pares de puntos 3D, a partir de la cuerda.
+    """
+    cuerda = np.linalg.norm(puntos_a - puntos_b, axis=-1)
+    return 2 * RADIO_TIERRA_M * np.arcsin(np.clip(cuerda / (2 * RADIO_TIERRA_M), 0.0, 1.0))
+
+
+def _buscar(padres, i):
+    """
+    Raíz del grupo de i (unión-búsqueda con compresión de caminos).
+    """
+    raiz = i
+    while padres[raiz] != raiz:
+        raiz = padres[raiz]
+    while padres[i] != raiz:
+        padres[i], i = raiz, padres[i]
+    return raiz
+
+
+def _pares_cercanos(puntos, distancia_max_m):
+    """
+    Genera los pares (i, j, distancia_m) de puntos a menos de distancia_max_m, con i < j,
+    comparando solo los puntos de cada celda de la grilla con los de su celda y sus vecinas.
+    """
+    # Celdas de al menos TAMANO_MINIMO_CELDA_M para que (x, y, z) quepan en un único entero de 64 bits;
+    # una celda más grande que el umbral sigue cubriendo a todos los vecinos
+    tamano_celda = max(distancia_max_m, TAMANO_MINIMO_CELDA_M)
+    celdas = np.floor(puntos / tamano_celda).astype(np.int64)
+    celdas -= celdas.min(axis=0) - 1  # Deja un margen de una celda para los vecinos en -1
+    base = int(celdas.max()) + 2
+    claves_puntos = (celdas[:, 0] * base + celdas[:, 1]) * base + celdas[:, 2]
+
+    orden = np.argsort(claves_puntos, kind='stable')
+    claves, limites = np.unique(claves_puntos[orden], return_index=True)
+    tamanos = np.diff(np.append(limites, len(orden)))
+
+    def comparar(a, b):
+        distancias = _distancia_arco_m(puntos[a], puntos[b])
+        cerca = distancias <= distancia_max_m
+        for i, j, d in zip(a[cerca].tolist(), b[cerca].tolist(), distancias[cerca].tolist()):
+            yield (min(i, j), max(i, j), d)
+
+    # Pares dentro de la misma celda: las celdas de dos puntos (el caso típico de un duplicado) van juntas
+    dobles = limites[tamanos == 2]
+    yield from comparar(orden[dobles], orden[dobles + 1])
+    for k in np.flatnonzero(tamanos > 2):
+        posiciones = orden[limites[k]:limites[k] + tamanos[k]]
+        izquierda, derecha = np.triu_indices(len(posiciones), k=1)
+        yield from comparar(posiciones[izquierda], posiciones[derecha])
+
+    # Pares con las celdas vecinas: solo se recorren las celdas que tienen alguna vecina ocupada
+    for dx, dy, dz in _DESPLAZAMIENTOS_VECINOS:
+        vecinas = claves + (dx * base + dy) * base + dz
+        indices = np.searchsorted(claves, vecinas)
+        existe = indices < len(claves)
+        existe[existe] = claves[indices[existe]] == vecinas[existe]
+        for k, m in zip(np.flatnonzero(existe), indices[existe]):
+            posiciones = orden[limites[k]:limites[k] + tamanos[k]]
+            otras = orden[limites[m]:limites[m] + tamanos[m]]
+            a, b = np.repeat(posiciones, len(otras)), np.tile(otras, len(posiciones))
+            yield from comparar(a, b)
+
+
+def deduplicar_por_proximidad(df, columna_nombre='nombre_del_lugar', distancia_max_m=DISTANCIA_FUSION_M,
+                              similitud_minima=SIMILITUD_MINIMA_NOMBRES):
+    """
+    Agrupa los lugares cercanos con nombres parecidos y conserva el primero de cada grupo.
+    Los lugares con el mismo nombre en coordenadas lejanas se mantienen separados.
+    Las filas sin coordenadas (lat/lon nulas) se fusionan, como antes, con la primera fila del mismo nombre.
+
+    Devuelve una tupla (df_deduplicado, fusiones), donde fusiones es un DataFrame con las columnas
+    'fila_conservada', 'fila_fusionada' (etiquetas del índice de df), 'distancia_m', 'similitud' y 'motivo'.
+    """
+    n = len(df)
+    nombres = df[columna_nombre].tolist()
+    palabras = [palabras_nombre(nombre) for nombre in nombres]
+    con_coordenadas = np.flatnonzero((df['lat'].notna() & df['lon'].notna()).to_numpy())
+
+    padres = list(range(n))
+    motivos = {}
+    puntos = np.full((n, 3), np.nan)
+    if len(con_coordenadas) > 1:
+        puntos[con_coordenadas] = _a_cartesianas(df['lat'].to_numpy(dtype=float)[con_coordenadas],
+                                                 df['lon'].to_numpy(dtype=float)[con_coordenadas])
+        for i, j, _ in _pares_cercanos(puntos[con_coordenadas], distancia_max_m):
+            a, b = int(con_coordenadas[i]), int(con_coordenadas[j])
+            similitud = similitud_nombres(palabras[a], palabras[b])
+            if similitud < similitud_minima:
+                continue
+            raiz_a, raiz_b = _buscar(padres, a), _buscar(padres, b)
+            if raiz_a == raiz_b:
+                continue
+            # La raíz de cada grupo es siempre la primera fila (se conserva como drop_duplicates keep='first')
+            raiz, otra = min(raiz_a, raiz_b), max(raiz_a, raiz_b)
+            padres[otra] = raiz
+            motivos[otra] = MOTIVO_PROXIMIDAD
+
+    # Filas sin coordenadas: se fusionan con la primera fila del mismo nombre
+    primera_por_nombre = {}
+    sin_coordenadas = np.ones(n, dtype=bool)
+    sin_coordenadas[con_coordenadas] = False
+    for posicion in range(n):
+        nombre = nombres[posicion]
+        if nombre not in primera_por_nombre:
+            primera_por_nombre[nombre] = posicion
+        elif sin_coordenadas[posicion]:
+            padres[posicion] = primera_por_nombre[nombre]
+            motivos[posicion] = MOTIVO_NOMBRE_SIN_COORDENADAS
+
+    raices = [_buscar(padres, posicion) for posicion in range(n)]
+    conservadas = [posicion for posicion in range(n) if raices[posicion] == posicion]
+    fusionadas = [posicion for posicion in range(n) if raices[posicion] != posicion]
+    # Distancia y similitud de cada fila fusionada respecto a la fila conservada de su grupo
+    # (en un grupo encadenado pueden superar los umbrales, que se aplican entre pares vecinos)
+    distancias = _distancia_arco_m(puntos[fusionadas], puntos[[raices[p] for p in fusionadas]]) if fusionadas else []
+    etiquetas = df.index
+    fusiones = pd.DataFrame(
+        [
+            {
+                'fila_conservada': etiquetas[raices[posicion]],
+                'fila_fusionada': etiquetas[posicion],
+                'distancia_m': None if np.isnan(distancia) else round(float(distancia), 1),
+                'similitud': round(similitud_nombres(palabras[posicion], palabras[raices[posicion]]), 3),
+                'motivo': motivos[posicion],
+            }
+            for posicion, distancia in zip(fusionadas, distancias)
+        ],
+        columns=['fila_conservada', 'fila_fusionada', 'distancia_m', 'similitud', 'motivo'],
+    )
+    return df.iloc[conservadas].copy(), fusiones
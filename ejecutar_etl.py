@@ -0,0 +1,216 @@
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import sqlite3
+import sys
+import time
+import traceback
+
+from metricas import VARIABLE_MEDIR_MEMORIA
+from perfilado import perfilar, VARIABLE_PERFILAR
+from manifiesto import (leer_manifiesto, huella_ejecucion, motivo_para_ejecutar, guardar_manifiesto,
+                        refrescar_manifiesto)
+
+# --- Ejecución de los ETL desde la línea de comandos (sin interfaz) ---
+# Los tres ETL son independientes (entradas y bases de datos distintas), así que se ejecutan a la vez,
+# cada uno en su propio proceso. La salida de cada uno se captura por separado y se muestra completa
+# al terminar, con su duración. El código de salida es 1 si algún ETL falló.
+# Un ETL cuyas entradas, código, opciones y base de datos no cambiaron desde su última ejecución correcta
+# no se vuelve a ejecutar salvo con --forzar (ver manifiesto.py).
+# Uso: python ejecutar_etl.py [ciudades] [famosos] [ubicacion] [--max-procesos N] [--directorio-logs DIR]
+#      [--perfilar [cpu|memoria|todo]] [--forzar]
+# La interfaz lanza cada ETL con 'python -u ejecutar_etl.py <etl> --sin-captura' y lee su salida en vivo.
+
+# Nombre del ETL en la línea de comandos -> (módulo, función que lo ejecuta)
+PIPELINES = {
+    'ciudades': ('etl_ciudades', 'run_etl_ciudades'),
+    'famosos': ('etl_famosos', 'run_etl_famosos'),
+    'ubicacion': ('etl_ubicacion', 'run_etl_ubicacion'),
+}
+# Valor de LOAD_MODE_INCREMENTAL de etl_ciudades.py (no se importa aquí para no cargar pandas de entrada)
+LOAD_MODE_INCREMENTAL = 'incremental'
+
+
+def ejecutar_pipeline(nombre, opciones=None, capturar=True, forzar=False):
+    """
+    Ejecuta un ETL capturando todo lo que imprime. Pensada para correr en un proceso del pool.
+    Con capturar=False la salida se escribe directamente en stdout mientras se produce.
+    Si ETL_PERFILAR lo pide, la ejecución se perfila (ver perfilado.py) y el resumen forma parte de la salida.
+    Si nada cambió desde la última ejecución correcta (ver manifiesto.py) no se ejecuta, salvo con forzar.
+    Devuelve un diccionario con 'nombre', 'ok', 'sin_cambios', 'segundos', 'salida' y 'error' (traceback o None).
+    """
+    modulo, funcion = PIPELINES[nombre]
+    salida = io.StringIO()
+    inicio = time.perf_counter()
+    ok, sin_cambios, error = False, False, None
+    redireccion = contextlib.ExitStack()
+    if capturar:
+        redireccion.enter_context(contextlib.redirect_stdout(salida))
+        redireccion.enter_context(contextlib.redirect_stderr(salida))
+    with redireccion:
+        try:
+            anterior = leer_manifiesto(nombre)
+            huella = huella_ejecucion(nombre, opciones, anterior)
+            motivo = "ejecución forzada" if forzar else motivo_para_ejecutar(huella, anterior)
+            if motivo is None:
+                print(f"⏭️ ETL {nombre}: las entradas, el código y la base de datos no cambiaron desde la carga "
+                      f"del {anterior['fecha']}. No se vuelve a ejecutar (use --forzar para recargar).")
+                ok = sin_cambios = True
+                try:
+                    refrescar_manifiesto(huella, anterior)
+                except OSError:
+                    pass  # Solo sirve para no recalcular hashes la próxima vez
+            else:
+                print(f"🔄 Ejecutando ETL {nombre}: {motivo}.")
+                ejecutar = getattr(importlib.import_module(modulo), funcion)
+                # La importación (pandas, sqlalchemy) queda fuera del perfil
+                with perfilar(f"etl_{nombre}"):
+                    resultado = ejecutar(**(opciones or {}))
+                # Las funciones run_etl_* devuelven False si el proceso se abortó
+                ok = resultado is not False
+                if ok:
+                    try:
+                        guardar_manifiesto(huella)
+                    except (sqlite3.Error, OSError) as e:
+                        # Sin manifiesto la próxima ejecución simplemente no se omite
+                        print(f"⚠️ No se pudo guardar el manifiesto de {nombre}: {e}")
+        except Exception:
+            error = traceback.format_exc()
+    return {
+        'nombre': nombre,
+        'ok': ok,
+        'sin_cambios': sin_cambios,
+        'segundos': time.perf_counter() - inicio,
+        'salida': salida.getvalue(),
+        'error': error,
+    }
+
+
+def ejecutar_pipelines(nombres, opciones_por_pipeline=None, max_procesos=None, al_terminar=None, capturar=True,
+                       forzar=False):
+    """
+    Ejecuta los ETL indicados a la vez en un pool de procesos (o en este mismo proceso si es uno solo).
+    - al_terminar: función llamada con el resultado de cada ETL a medida que termina.
+    - capturar, forzar: ver ejecutar_pipeline.
+    Devuelve la lista de resultados en el orden en que terminaron.
+    """
+    opciones_por_pipeline = opciones_por_pipeline or {}
+    resultados = []
+
+    def registrar(resultado):
+        resultados.append(resultado)
+        if al_terminar is not None:
+            al_terminar(resultado)
+
+    procesos = min(max_procesos or len(nombres), len(nombres))
+    if procesos <= 1:
+        for nombre in nombres:
+            registrar(ejecutar_pipeline(nombre, opciones_por_pipeline.get(nombre), capturar, forzar))
+        return resultados
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        tareas = {pool.submit(ejecutar_pipeline, nombre, opciones_por_pipeline.get(nombre), capturar, forzar): nombre
+                  for nombre in nombres}
+        for tarea in as_completed(tareas):
+            try:
+                registrar(tarea.result())
+            except Exception:
+                # El proceso del pool terminó de forma anormal (p. ej. sin memoria)
+                registrar({'nombre': tareas[tarea], 'ok': False, 'sin_cambios': False, 'segundos': 0.0, 'salida': '',
+                           'error': traceback.format_exc()})
+    return resultados
+
+
+def mostrar_resultado(resultado, directorio_logs=None):
+    """
+    Imprime la salida capturada de un ETL (o la guarda en <directorio_logs>/etl_<nombre>.log).
+    """
+    estado = ("SIN CAMBIOS" if resultado['sin_cambios'] else "OK") if resultado['ok'] else "ERROR"
+    print(f"\n===== ETL {resultado['nombre'].upper()}: {estado} en {resultado['segundos']:.1f} s =====")
+    texto = resultado['salida'] + (resultado['error'] or '')
+    if directorio_logs:
+        ruta_log = os.path.join(directorio_logs, f"etl_{resultado['nombre']}.log")
+        with open(ruta_log, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto)
+        print(f"📄 Salida guardada en '{ruta_log}'.")
+        if resultado['error']:
+            print(resultado['error'], end='')
+    else:
+        print(texto, end='' if texto.endswith('\n') else '\n')
+    sys.stdout.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ejecuta los procesos ETL en paralelo, sin interfaz gráfica.")
+    parser.add_argument('pipelines', nargs='*', metavar='etl',
+                        help=f"ETL a ejecutar: {', '.join(PIPELINES)} (por defecto, todos).")
+    parser.add_argument('--max-procesos', type=int, default=None,
+                        help="Procesos simultáneos como máximo (por defecto, uno por ETL).")
+    parser.add_argument('--directorio-logs', default=None,
+                        help="Guarda la salida de cada ETL en <directorio>/etl_<nombre>.log en lugar de mostrarla.")
+    parser.add_argument('--ciudades-streaming', action='store_true',
+                        help="Procesa el archivo de ciudades por bloques (memoria acotada).")
+    parser.add_argument('--ciudades-incremental', action='store_true',
+                        help="Carga las ciudades en modo incremental: solo inserta o actualiza las filas nuevas o "
+                             "modificadas en lugar de reescribir la tabla.")
+    parser.add_argument('--dedup-espacial', action='store_true',
+                        help="Deduplica las ubicaciones por cercanía y parecido de nombres.")
+    parser.add_argument('--medir-memoria', action='store_true',
+                        help="Registra el pico de memoria de cada etapa con tracemalloc (más lento, ver metricas.py).")
+    parser.add_argument('--perfilar', nargs='?', const='todo', default=None, choices=('cpu', 'memoria', 'todo'),
+                        help="Perfila cada ETL con cProfile y/o tracemalloc y guarda los informes en 'perfiles' "
+                             "(por defecto, los dos; ver perfilado.py).")
+    parser.add_argument('--forzar', action='store_true',
+                        help="Ejecuta los ETL aunque sus entradas y su código no hayan cambiado (ver manifiesto.py).")
+    parser.add_argument('--sin-captura', action='store_true',
+                        help="Muestra la salida de cada ETL a medida que se produce en lugar de al terminar "
+                             "(con varios ETL a la vez las líneas se mezclan).")
+    args = parser.parse_args(argv)
+    desconocidos = [nombre for nombre in args.pipelines if nombre not in PIPELINES]
+    if desconocidos:
+        parser.error(f"ETL desconocido: {', '.join(desconocidos)} (opciones: {', '.join(PIPELINES)}).")
+
+    # Sin repetir y en el orden de PIPELINES
+    nombres = [nombre for nombre in PIPELINES if nombre in (args.pipelines or PIPELINES)]
+    opciones = {}
+    if args.ciudades_streaming:
+        opciones.setdefault('ciudades', {})['streaming'] = True
+    if args.ciudades_incremental:
+        opciones.setdefault('ciudades', {})['load_mode'] = LOAD_MODE_INCREMENTAL
+    if args.dedup_espacial:
+        opciones['ubicacion'] = {'dedup_espacial': True}
+    if args.directorio_logs:
+        os.makedirs(args.directorio_logs, exist_ok=True)
+    if args.medir_memoria:
+        # Los procesos del pool heredan la variable de entorno
+        os.environ[VARIABLE_MEDIR_MEMORIA] = '1'
+    if args.perfilar:
+        os.environ[VARIABLE_PERFILAR] = args.perfilar
+
+    print(f"🚀 Ejecutando {len(nombres)} ETL: {', '.join(nombres)}")
+    inicio = time.perf_counter()
+    resultados = ejecutar_pipelines(nombres, opciones, args.max_procesos,
+                                    al_terminar=lambda resultado: mostrar_resultado(resultado, args.directorio_logs),
+                                    capturar=not args.sin_captura, forzar=args.forzar)
+    total = time.perf_counter() - inicio
+
+    print("\n===== RESUMEN =====")
+    for resultado in sorted(resultados, key=lambda r: nombres.index(r['nombre'])):
+        estado = "✅" if resultado['ok'] else "❌"
+        detalle = " (sin cambios, no se ejecutó)" if resultado['sin_cambios'] else ""
+        print(f"{estado} {resultado['nombre']:<10} {resultado['segundos']:8.1f} s{detalle}")
+    suma = sum(resultado['segundos'] for resultado in resultados)
+    print(f"⏱️ Tiempo total: {total:.1f} s (suma de los ETL: {suma:.1f} s)")
+
+    fallidos = [resultado['nombre'] for resultado in resultados if not resultado['ok']]
+    if fallidos:
+        print(f"❌ ETL con errores: {', '.join(fallidos)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
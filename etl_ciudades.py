@@ -1,13 +1,27 @@
 import pandas as pd
+import numpy as np
 from sqlalchemy import create_engine
-import unicodedata
-import re
 import os
+from normalizacion import quitar_acentos, normalizar_serie, MODO_CIUDAD
+from reconstruccion_db import activar_wal
+from metricas import medir_etl, iniciar_etapa, terminar_etapa
 
 # --- Configuración de archivos y base de datos ---
 INPUT_FILE_CIUDADES = 'datos.txt'
 DATABASE_NAME_CIUDADES = 'ciudades.db'
 NORMALIZED_TABLE_CIUDADES = 'ciudades_norm'
+# Tamaño de bloque (filas) para el modo streaming
+CHUNK_SIZE_CIUDADES = 100_000
+# Columnas que identifican una ciudad única
+KEY_COLUMNS_CIUDADES = ['nombre_ciudad', 'pais']
+
+# --- Modos de carga ---
+LOAD_MODE_REPLACE = 'replace'          # Reescribe la tabla completa en cada ejecución
+LOAD_MODE_INCREMENTAL = 'incremental'  # Solo escribe filas nuevas o modificadas (upsert)
+# Columna con el hash del contenido de cada fila (modo incremental)
+HASH_COLUMN_CIUDADES = 'hash_fila'
+# Filas por lote en los INSERT ... ON CONFLICT DO UPDATE
+UPSERT_BATCH_SIZE = 10_000
 
 # --- Funciones Auxiliares ---
 def remove_accents(text):
@@ -18,10 +32,7 @@ def remove_accents(text):
     Si no era texto, lo devuelve sin cambios.
     Devuelve el mismo texto pero sin tildes ni acentos.
     """
-    if isinstance(text, str):
-        text_norm = unicodedata.normalize('NFKD', text)
-        return ''.join([c for c in text_norm if not unicodedata.combining(c)])
-    return text
+    return quitar_acentos(text)
 
 # --- 1. Extracción de Datos ---
 def extract_data_ciudades(file_path):
@@ -51,7 +62,38 @@ def extract_data_ciudades(file_path):
         print(f"❌ Error general al leer el archivo de ciudades: {e}")
         return None
 
+def extract_data_ciudades_chunks(file_path, chunk_size=CHUNK_SIZE_CIUDADES):
+    """
+    Lee un archivo CSV por bloques de tamaño fijo (modo streaming).
+    Devuelve un generador de DataFrames de como máximo chunk_size filas, o None si falló.
+    La memoria usada depende del tamaño del bloque y no del tamaño del archivo.
+    """
+    print(f"\n✨ Extrayendo datos de ciudades por bloques de {chunk_size} filas desde: {file_path}")
+    print(f"DEBUG: Ruta absoluta del archivo a extraer: {os.path.abspath(file_path)}")
+    try:
+        reader = pd.read_csv(file_path, chunksize=chunk_size)
+    except FileNotFoundError:
+        print(f"❌ Error: El archivo de entrada '{file_path}' para ciudades NO FUE ENCONTRADO.")
+        return None
+    except pd.errors.EmptyDataError:
+        print(f"❌ Error: El archivo '{file_path}' está vacío o no contiene datos CSV válidos.")
+        return None
+    except Exception as e:
+        print(f"❌ Error general al leer el archivo de ciudades: {e}")
+        return None
+    return reader
+
 # --- 2. Transformación de Datos ---
+def normalize_text_ciudades(df):
+    """
+    Normaliza las columnas de texto de ciudades: mayúsculas, sin tildes y sin espacios extra.
+    Modifica y devuelve el mismo DataFrame. No elimina duplicados.
+    """
+    # Cada valor distinto se normaliza una sola vez (ver normalizacion.py)
+    df['nombre_ciudad'] = normalizar_serie(df['nombre_ciudad'].astype(str), MODO_CIUDAD)
+    df['pais'] = normalizar_serie(df['pais'].astype(str), MODO_CIUDAD)
+    return df
+
 def transform_data_ciudades(df):
     """
     Normaliza texto, elimina tildes y duplicados para los datos de ciudades.
@@ -64,24 +106,15 @@ def transform_data_ciudades(df):
     print("🔄 Iniciando transformación de datos de ciudades...")
     initial_rows = len(df)
 
-    # Convertir a mayúsculas y asegurar tipo string
-    df['nombre_ciudad'] = df['nombre_ciudad'].astype(str).str.upper() 
-    df['pais'] = df['pais'].astype(str).str.upper() 
+    # Mayúsculas, tildes y espacios extra
+    normalize_text_ciudades(df)
     print("  - Texto de ciudades convertido a mayúsculas.")
-
-    # Remover tildes y acentos
-    df['nombre_ciudad'] = df['nombre_ciudad'].apply(remove_accents)
-    df['pais'] = df['pais'].apply(remove_accents)
     print("  - Tildes de ciudades eliminadas.")
-
-    # Eliminar espacios extra y caracteres innecesarios
-    df['nombre_ciudad'] = df['nombre_ciudad'].str.strip().str.replace(r'\s+', ' ', regex=True)
-    df['pais'] = df['pais'].str.strip().str.replace(r'\s+', ' ', regex=True)
     print("  - Espacios y caracteres innecesarios de ciudades limpiados.")
 
     # Eliminar duplicados
     filas_antes_dup = len(df)
-    df.drop_duplicates(subset=['nombre_ciudad', 'pais'], inplace=True)
+    df.drop_duplicates(subset=KEY_COLUMNS_CIUDADES, inplace=True)
     deduplicated_rows = len(df)
     print(f"  - Duplicados de ciudades eliminados: {filas_antes_dup - deduplicated_rows} filas removidas.")
 
@@ -93,10 +126,114 @@ def transform_data_ciudades(df):
     return df 
 
 # --- 3. Carga de Datos ---
-def load_data_ciudades(df, database_name, table_name):
+def compute_row_hashes(df):
+    """
+    Calcula un hash de 64 bits del contenido (columnas que no son clave) de cada fila.
+    Devuelve un array de enteros con signo, tal como los guarda SQLite.
+    """
+    content_columns = [c for c in df.columns if c not in KEY_COLUMNS_CIUDADES and c != HASH_COLUMN_CIUDADES]
+    return pd.util.hash_pandas_object(df[content_columns], index=False).to_numpy().view(np.int64)
+
+def _sqlite_type(dtype):
+    """
+    Devuelve el tipo de columna SQLite equivalente al que usa pandas.to_sql para un dtype.
+    """
+    if dtype.kind in 'iub':
+        return 'INTEGER'
+    if dtype.kind == 'f':
+        return 'REAL'
+    return 'TEXT'
+
+def ensure_upsert_schema(connection, df, table_name):
+    """
+    Prepara la tabla para la carga incremental: la crea si no existe, agrega la columna de hash
+    (y cualquier columna nueva del DataFrame) y crea el índice UNIQUE sobre (nombre_ciudad, pais).
+    """
+    exists = connection.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,)
+    ).fetchone()
+    if exists is None:
+        columns_sql = ", ".join(f'"{col}" {_sqlite_type(df[col].dtype)}' for col in df.columns)
+        connection.exec_driver_sql(f'CREATE TABLE "{table_name}" ({columns_sql}, "{HASH_COLUMN_CIUDADES}" INTEGER)')
+        print(f"  - Tabla '{table_name}' creada para carga incremental.")
+    else:
+        existing_columns = [row[1] for row in connection.exec_driver_sql(f'PRAGMA table_info("{table_name}")')]
+        for col in df.columns:
+            if col not in existing_columns:
+                connection.exec_driver_sql(f'ALTER TABLE "{table_name}" ADD COLUMN "{col}" {_sqlite_type(df[col].dtype)}')
+        if HASH_COLUMN_CIUDADES not in existing_columns:
+            connection.exec_driver_sql(f'ALTER TABLE "{table_name}" ADD COLUMN "{HASH_COLUMN_CIUDADES}" INTEGER')
+            print(f"  - Columna '{HASH_COLUMN_CIUDADES}' agregada a '{table_name}' (la primera carga incremental reescribe todas las filas).")
+    key_sql = ", ".join(f'"{col}"' for col in KEY_COLUMNS_CIUDADES)
+    connection.exec_driver_sql(f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{table_name}_clave" ON "{table_name}" ({key_sql})')
+
+def upsert_data_ciudades(connection, df, table_name, batch_size=UPSERT_BATCH_SIZE):
+    """
+    Escribe solo las filas nuevas o modificadas de df usando INSERT ... ON CONFLICT DO UPDATE por lotes.
+    Las claves y hashes se comparan contra la tabla en SQL con una tabla temporal, de modo que
+    solo se leen las posiciones de las filas nuevas o modificadas.
+    Devuelve un diccionario con las filas insertadas, actualizadas y sin cambios.
+    """
+    counts = {'insertadas': 0, 'actualizadas': 0, 'sin_cambios': 0}
+    if df is None or df.empty:
+        return counts
+
+    new_hashes = compute_row_hashes(df)
+    connection.exec_driver_sql(
+        "CREATE TEMP TABLE IF NOT EXISTS _claves_ciudades "
+        "(pos INTEGER PRIMARY KEY, nombre_ciudad TEXT, pais TEXT, hash_fila INTEGER)"
+    )
+    connection.exec_driver_sql("DELETE FROM _claves_ciudades")
+    keys = zip(range(len(df)), df['nombre_ciudad'].tolist(), df['pais'].tolist(), new_hashes.tolist())
+    connection.exec_driver_sql("INSERT INTO _claves_ciudades VALUES (?, ?, ?, ?)", list(keys))
+    # Solo vuelven las filas nuevas (sin coincidencia) o con hash distinto
+    differences = connection.exec_driver_sql(f"""
+        SELECT k.pos, t.rowid IS NOT NULL FROM _claves_ciudades k
+        LEFT JOIN "{table_name}" t ON t.nombre_ciudad = k.nombre_ciudad AND t.pais = k.pais
+        WHERE t.rowid IS NULL OR t."{HASH_COLUMN_CIUDADES}" IS NOT k.hash_fila
+    """).fetchall()
+    connection.exec_driver_sql("DELETE FROM _claves_ciudades")
+
+    unchanged = np.ones(len(df), dtype=bool)
+    for pos, exists in differences:
+        unchanged[pos] = False
+        counts['actualizadas' if exists else 'insertadas'] += 1
+    counts['sin_cambios'] = int(unchanged.sum())
+
+    to_write = df[~unchanged].copy()
+    to_write[HASH_COLUMN_CIUDADES] = new_hashes[~unchanged]
+    if to_write.empty:
+        return counts
+
+    columns = list(to_write.columns)
+    columns_sql = ", ".join(f'"{col}"' for col in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    key_sql = ", ".join(f'"{col}"' for col in KEY_COLUMNS_CIUDADES)
+    update_sql = ", ".join(f'"{col}" = excluded."{col}"' for col in columns if col not in KEY_COLUMNS_CIUDADES)
+    upsert_sql = (f'INSERT INTO "{table_name}" ({columns_sql}) VALUES ({placeholders}) '
+                  f'ON CONFLICT ({key_sql}) DO UPDATE SET {update_sql}')
+
+    # Tipos de Python (no de NumPy) y None en lugar de NaN para sqlite3
+    to_write = to_write.astype(object).where(to_write.notna(), None)
+    for start in range(0, len(to_write), batch_size):
+        batch = to_write.iloc[start:start + batch_size]
+        connection.exec_driver_sql(upsert_sql, list(batch.itertuples(index=False, name=None)))
+    return counts
+
+def print_upsert_counts(counts):
+    """
+    Muestra el resumen de una carga incremental.
+    """
+    print(f"✅ Carga incremental de ciudades completada. Insertadas: {counts['insertadas']}, "
+          f"actualizadas: {counts['actualizadas']}, sin cambios: {counts['sin_cambios']}.")
+
+def load_data_ciudades(df, database_name, table_name, load_mode=LOAD_MODE_REPLACE):
     """
     Carga los datos transformados de ciudades en una base de datos SQLite.
     Guarda los datos limpios en una base de datos SQLite.
+    Con load_mode='incremental' solo escribe las filas nuevas o modificadas y
+    devuelve el diccionario de conteos de upsert_data_ciudades; si no, devuelve True.
+    Devuelve None si no hay datos o la carga falló.
     """
     if df is None or df.empty:
         print("❌ No hay datos válidos de ciudades para cargar. Saltando carga.")
@@ -104,18 +241,130 @@ def load_data_ciudades(df, database_name, table_name):
 
     print(f"📦 Cargando datos de ciudades en '{table_name}' dentro de '{database_name}'...")
     print(f"DEBUG: Ruta de la base de datos de ciudades: {os.path.abspath(database_name)}")
+    # En modo WAL el visor puede seguir leyendo la base de datos mientras se carga (ver reconstruccion_db.py)
+    activar_wal(database_name)
     engine = create_engine(f'sqlite:///{database_name}')
     try:
+        if load_mode == LOAD_MODE_INCREMENTAL:
+            with engine.begin() as connection:
+                ensure_upsert_schema(connection, df, table_name)
+                counts = upsert_data_ciudades(connection, df, table_name)
+            print_upsert_counts(counts)
+            return counts
         df.to_sql(name=table_name, con=engine, if_exists='replace', index=False)
         print(f"✅ Datos de ciudades cargados exitosamente. {len(df)} filas insertadas.")
+        return True
     except Exception as e:
         print(f"❌ Error al cargar los datos de ciudades: {e}")
+        return None
+
+def create_seen_keys_table(connection):
+    """
+    Crea (vacía) la tabla temporal con las claves (nombre_ciudad, pais) ya emitidas en el modo streaming.
+    Vive en el almacenamiento temporal de SQLite y no en la memoria de Python, de modo que la memoria
+    del proceso no crece con la cantidad de ciudades únicas.
+    """
+    connection.exec_driver_sql("DROP TABLE IF EXISTS _claves_vistas_ciudades")
+    connection.exec_driver_sql(
+        "CREATE TEMP TABLE _claves_vistas_ciudades "
+        "(nombre_ciudad TEXT, pais TEXT, PRIMARY KEY (nombre_ciudad, pais)) WITHOUT ROWID"
+    )
+    connection.exec_driver_sql(
+        "CREATE TEMP TABLE IF NOT EXISTS _claves_bloque_ciudades "
+        "(pos INTEGER PRIMARY KEY, nombre_ciudad TEXT, pais TEXT)"
+    )
+
+def drop_seen_keys_table(connection):
+    """
+    Elimina las tablas temporales de create_seen_keys_table (la conexión vuelve al pool del engine).
+    """
+    connection.exec_driver_sql("DROP TABLE IF EXISTS _claves_vistas_ciudades")
+    connection.exec_driver_sql("DROP TABLE IF EXISTS _claves_bloque_ciudades")
+
+def transform_chunk_ciudades(df, connection):
+    """
+    Transforma un bloque de ciudades en modo streaming.
+    Normaliza el texto y elimina duplicados dentro del bloque y contra los bloques anteriores.
+    Las claves ya emitidas están en la tabla temporal de create_seen_keys_table (se comparan las
+    claves reales, no un hash); se actualiza con las claves nuevas del bloque.
+    Devuelve el bloque sin duplicados (puede quedar vacío).
+    """
+    normalize_text_ciudades(df)
+    df = df.drop_duplicates(subset=KEY_COLUMNS_CIUDADES)
+    if df.empty:
+        return df
+
+    keys = zip(range(len(df)), df['nombre_ciudad'].tolist(), df['pais'].tolist())
+    connection.exec_driver_sql("INSERT INTO _claves_bloque_ciudades VALUES (?, ?, ?)", list(keys))
+    # Solo vuelven las posiciones de las claves que no se emitieron en un bloque anterior, en el orden del archivo
+    new_positions = [pos for (pos,) in connection.exec_driver_sql("""
+        SELECT b.pos FROM _claves_bloque_ciudades b
+        WHERE NOT EXISTS (SELECT 1 FROM _claves_vistas_ciudades v
+                          WHERE v.nombre_ciudad = b.nombre_ciudad AND v.pais = b.pais)
+        ORDER BY b.pos
+    """)]
+    connection.exec_driver_sql(
+        "INSERT OR IGNORE INTO _claves_vistas_ciudades SELECT nombre_ciudad, pais FROM _claves_bloque_ciudades"
+    )
+    connection.exec_driver_sql("DELETE FROM _claves_bloque_ciudades")
+    return df.iloc[new_positions]
+
+def load_data_ciudades_streaming(chunks, database_name, table_name, load_mode=LOAD_MODE_REPLACE):
+    """
+    Transforma y carga los bloques de ciudades en SQLite dentro de una única transacción.
+    El primer bloque reemplaza la tabla y los siguientes se agregan al final, de modo que
+    el resultado es el mismo que en el modo por lotes.
+    Si la entrada no tiene filas se lanza ValueError antes de escribir y la tabla no se modifica.
+    Con load_mode='incremental' cada bloque se aplica con upsert en lugar de reemplazar la tabla.
+    Devuelve una tupla (filas_leidas, filas_cargadas).
+    """
+    print(f"📦 Cargando datos de ciudades por bloques en '{table_name}' dentro de '{database_name}'...")
+    print(f"DEBUG: Ruta de la base de datos de ciudades: {os.path.abspath(database_name)}")
+    # En modo WAL el visor puede seguir leyendo la base de datos mientras se carga (ver reconstruccion_db.py)
+    activar_wal(database_name)
+    engine = create_engine(f'sqlite:///{database_name}')
+    rows_read = 0
+    rows_loaded = 0
+    counts = {'insertadas': 0, 'actualizadas': 0, 'sin_cambios': 0}
+    # engine.begin() confirma todo al final o deshace todo si algún bloque falla
+    with engine.begin() as connection:
+        create_seen_keys_table(connection)
+        for chunk_number, chunk in enumerate(chunks, start=1):
+            if chunk_number == 1 and chunk.empty:
+                # Solo encabezado: se aborta antes de escribir, igual que el modo por lotes conserva la tabla.
+                # No basta con deshacer la transacción: pysqlite confirma el DROP TABLE de to_sql al ejecutarlo.
+                raise ValueError("el archivo de ciudades no contiene filas de datos; se conserva la tabla existente.")
+            rows_read += len(chunk)
+            chunk = transform_chunk_ciudades(chunk, connection)
+            if load_mode == LOAD_MODE_INCREMENTAL:
+                if chunk_number == 1:
+                    ensure_upsert_schema(connection, chunk, table_name)
+                for key, value in upsert_data_ciudades(connection, chunk, table_name).items():
+                    counts[key] += value
+            else:
+                if_exists = 'replace' if chunk_number == 1 else 'append'
+                chunk.to_sql(name=table_name, con=connection, if_exists=if_exists, index=False)
+            rows_loaded += len(chunk)
+            print(f"  - Bloque {chunk_number}: {len(chunk)} filas cargadas ({rows_loaded}/{rows_read} acumuladas).")
+        drop_seen_keys_table(connection)
+    print(f"  - Duplicados de ciudades eliminados: {rows_read - rows_loaded} filas removidas.")
+    if load_mode == LOAD_MODE_INCREMENTAL:
+        print_upsert_counts(counts)
+    else:
+        print(f"✅ Datos de ciudades cargados exitosamente. {rows_loaded} filas insertadas.")
+    return rows_read, rows_loaded
 
 # --- Orquestador ETL --- 
-def run_etl_ciudades():
+@medir_etl('ciudades')
+def run_etl_ciudades(streaming=False, chunk_size=CHUNK_SIZE_CIUDADES, load_mode=LOAD_MODE_REPLACE):
     """
     Ejecuta el proceso ETL completo para datos de ciudades: extracción, transformación y carga.
     Si no hay un archivo datos.txt, crea uno nuevo con ejemplos para pruebas.
+    Con streaming=True el archivo se procesa por bloques de chunk_size filas y la memoria
+    usada no crece con el tamaño de la entrada.
+    Con load_mode='incremental' solo se escriben las ciudades nuevas o modificadas.
+    Devuelve True si los datos se cargaron y False si el proceso se abortó.
+    Las métricas de cada etapa se guardan en ejecuciones_etl.db (ver metricas.py).
     """
     print("\n--- INICIANDO PROCESO ETL DE CIUDADES ---")
 
@@ -139,31 +388,42 @@ def run_etl_ciudades():
         except Exception as e:
             print(f"❌ Error al crear el archivo de ejemplo '{INPUT_FILE_CIUDADES}': {e}")
             print("❌ El proceso ETL de ciudades no puede continuar sin el archivo de entrada.")
-            return 
+            return False
     else:
         print(f"ℹ️ Archivo '{INPUT_FILE_CIUDADES}' encontrado. Usando archivo existente.")
 
+    if streaming:
+        return run_etl_ciudades_streaming(chunk_size, load_mode)
 
     # Paso 1: Extracción
+    iniciar_etapa('extraccion')
     raw_data = extract_data_ciudades(INPUT_FILE_CIUDADES)
+    terminar_etapa(filas_salida=None if raw_data is None else len(raw_data))
     if raw_data is None:
         print("❌ Extracción de datos de ciudades fallida o archivo vacío. Proceso ETL abortado.")
         print("--- PROCESO ETL DE CIUDADES FINALIZADO CON ERRORES/ADVERTENCIAS ---\n")
-        return 
+        return False
 
     # Paso 2: Transformación
+    iniciar_etapa('transformacion', filas_entrada=len(raw_data))
     transformed_data = transform_data_ciudades(raw_data)
+    terminar_etapa(filas_salida=None if transformed_data is None else len(transformed_data))
     if transformed_data is None:
         print("❌ Transformación de datos de ciudades resultó en un DataFrame vacío. Proceso ETL abortado.")
         print("--- PROCESO ETL DE CIUDADES FINALIZADO CON ERRORES/ADVERTENCIAS ---\n")
-        return 
+        return False
 
     # Paso 3: Carga
-    load_data_ciudades(transformed_data, DATABASE_NAME_CIUDADES, NORMALIZED_TABLE_CIUDADES)
+    iniciar_etapa('carga', filas_entrada=len(transformed_data))
+    if not load_data_ciudades(transformed_data, DATABASE_NAME_CIUDADES, NORMALIZED_TABLE_CIUDADES, load_mode):
+        print("--- PROCESO ETL DE CIUDADES FINALIZADO CON ERRORES/ADVERTENCIAS ---\n")
+        return False
 
+    terminar_etapa(filas_salida=len(transformed_data))
     print("--- PROCESO ETL DE CIUDADES FINALIZADO ---\n")
 
     # Verificación final de datos cargados
+    iniciar_etapa('verificacion')
     try:
         engine = create_engine(f'sqlite:///{DATABASE_NAME_CIUDADES}')
         # Intentar leer la tabla. Si no existe o está vacía, pd.read_sql_table podría lanzar un error o devolver un DF vacío.
@@ -176,6 +436,48 @@ def run_etl_ciudades():
     except Exception as e:
         print(f"❌ Error al leer la tabla de verificación de ciudades: {e}")
         print(f"DEBUG: Puede que la tabla '{NORMALIZED_TABLE_CIUDADES}' no se haya creado o no contenga datos.")
+    terminar_etapa()
+    return True
+
+@medir_etl('ciudades')
+def run_etl_ciudades_streaming(chunk_size=CHUNK_SIZE_CIUDADES, load_mode=LOAD_MODE_REPLACE):
+    """
+    Variante por bloques del ETL de ciudades: extracción, transformación y carga en memoria acotada.
+    La verificación final solo muestra el conteo y las primeras filas para no cargar la tabla completa.
+    Extracción, transformación y carga se miden como una sola etapa ('carga_por_bloques'), porque se intercalan.
+    Devuelve True si los datos se cargaron y False si el proceso se abortó.
+    """
+    chunks = extract_data_ciudades_chunks(INPUT_FILE_CIUDADES, chunk_size)
+    if chunks is None:
+        print("❌ Extracción de datos de ciudades fallida o archivo vacío. Proceso ETL abortado.")
+        print("--- PROCESO ETL DE CIUDADES FINALIZADO CON ERRORES/ADVERTENCIAS ---\n")
+        return False
+
+    iniciar_etapa('carga_por_bloques')
+    try:
+        rows_read, rows_loaded = load_data_ciudades_streaming(chunks, DATABASE_NAME_CIUDADES, NORMALIZED_TABLE_CIUDADES, load_mode)
+    except Exception as e:
+        print(f"❌ Error al cargar los datos de ciudades por bloques: {e}")
+        print("--- PROCESO ETL DE CIUDADES FINALIZADO CON ERRORES/ADVERTENCIAS ---\n")
+        return False
+
+    terminar_etapa(filas_salida=rows_loaded, filas_entrada=rows_read)
+    if rows_loaded == 0:
+        print("⚠️ Advertencia: No se cargaron filas de ciudades (archivo vacío o solo duplicados).")
+
+    print("--- PROCESO ETL DE CIUDADES FINALIZADO ---\n")
+
+    # Verificación final acotada: conteo y primeras filas
+    iniciar_etapa('verificacion')
+    try:
+        engine = create_engine(f'sqlite:///{DATABASE_NAME_CIUDADES}')
+        df_check = pd.read_sql_query(f'SELECT * FROM "{NORMALIZED_TABLE_CIUDADES}" LIMIT 10', con=engine)
+        print(f"\n📊 Tabla normalizada de ciudades (Verificación): {rows_loaded} filas. Primeras filas:")
+        print(df_check)
+    except Exception as e:
+        print(f"❌ Error al leer la tabla de verificación de ciudades: {e}")
+    terminar_etapa()
+    return True
 
 # --- Código de demostración (se ejecuta solo si este archivo es el principal) ---
 if __name__ == "__main__":
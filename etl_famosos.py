@@ -1,36 +1,286 @@
 import pandas as pd
-from datetime import datetime
+import numpy as np
+from datetime import datetime, date
 import re
 import sqlite3
+import time
+from itertools import chain, islice
 import os # Importar el módulo os para manejar archivos
+from normalizacion import normalizar_serie, MODO_NOMBRE
+from reconstruccion_db import abrir_para_reconstruir, reconstruccion
+from metricas import medir_etl, iniciar_etapa, terminar_etapa
 
 # --- Configuración de archivos y base de datos ---
 INPUT_FILE_FAMOSOS = 'DATOS2.txt'
 DATABASE_NAME_FAMOSOS = 'datos_famosos.db'
 NORMALIZED_TABLE_FAMOSOS = 'fnac_famosos_norm'
+# Filas por lote en la carga masiva (executemany)
+BATCH_SIZE_FAMOSOS = 50_000
+# Tamaño de cada bloque leído del archivo de entrada (caracteres)
+READ_BLOCK_SIZE_FAMOSOS = 1 << 20
+# Filas por DataFrame que entrega el extractor
+ROWS_PER_CHUNK_FAMOSOS = 200_000
+# Una línea "N. Nombre - fecha": índice opcional, nombre hasta el primer guion y fecha,
+# sin los espacios de los extremos (equivale a strip + re.sub del índice + split('-', 1)).
+_LINEA_FAMOSO = re.compile(
+    r'^[^\S\n]*(?:\d+\.[^\S\n]*)?([^\n-]*?)[^\S\n]*-[^\S\n]*([^\n]*?)[^\S\n]*$',
+    re.MULTILINE,
+)
+# PRAGMAs aplicados solo a la conexión de carga: menos sincronizaciones a disco y más caché
+LOAD_PRAGMAS_FAMOSOS = (
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",  # 64 MB
+)
+
+# --- Formatos de fecha aceptados, en orden de prioridad ---
+# Los patrones son los mismos que usa datetime.strptime para %d, %m, %Y y %y, de modo que
+# el análisis vectorizado acepta exactamente las mismas cadenas que el análisis fila a fila.
+_DIA = r'(3[01]|[12][0-9]|0[1-9]|[1-9]| [1-9])'
+_MES = r'(1[0-2]|0[1-9]|[1-9])'
+_ANIO = r'([0-9]{4})'
+_ANIO_CORTO = r'([0-9]{2})'
+# (formato, patrón, orden de los grupos, año de dos dígitos)
+DATE_FORMATS_FAMOSOS = [
+    ("%d-%m-%Y", rf'^{_DIA}-{_MES}-{_ANIO}\Z', ('dia', 'mes', 'anio'), False),
+    ("%Y-%m-%d", rf'^{_ANIO}-{_MES}-{_DIA}\Z', ('anio', 'mes', 'dia'), False),
+    ("%d-%m-%y", rf'^{_DIA}-{_MES}-{_ANIO_CORTO}\Z', ('dia', 'mes', 'anio'), True),
+    ("%Y%m%d", rf'^{_ANIO}{_MES}{_DIA}\Z', ('anio', 'mes', 'dia'), False),
+]
+_DIAS_POR_MES = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+def transformar_fecha(fecha_raw):
+    """
+    Intenta transformar una cadena de fecha en varios formatos a un formato estándar 'DD-MM-YYYY'.
+    Devuelve None si no puede transformar la fecha o si contiene palabras como 'alrededor' o 'a.c.'.
+    Versión fila a fila; normalizar_fechas la usa solo para las cadenas con caracteres no ASCII.
+    """
+    if not isinstance(fecha_raw, str): # Asegurarse de que es una cadena.
+        return None
+    fecha_raw = fecha_raw.lower() # Convertir a minúsculas para manejar "Alrededor" o "A.C.".
+    if "alrededor" in fecha_raw or "a.c" in fecha_raw:
+        return None # Ignorar fechas aproximadas o antes de Cristo.
+
+    # Reemplazar diferentes separadores por guiones.
+    fecha_raw = fecha_raw.replace(".", "-").replace("/", "-")
+
+    # Intentar varios formatos comunes de fecha.
+    for fmt, _, _, _ in DATE_FORMATS_FAMOSOS:
+        try:
+            fecha = datetime.strptime(fecha_raw, fmt) # Intenta parsear la fecha con el formato actual.
+            return fecha.strftime("%d-%m-%Y") # Devuelve la fecha en el formato estándar deseado.
+        except ValueError: # Si el formato no coincide, pasa al siguiente.
+            continue
+    return None # Si ningún formato coincide, devuelve None.
+
+def _dias_en_mes(anios, meses):
+    """
+    Devuelve la cantidad de días de cada mes (calendario gregoriano proléptico, como datetime).
+    """
+    bisiesto = (anios % 4 == 0) & ((anios % 100 != 0) | (anios % 400 == 0))
+    return _DIAS_POR_MES[meses - 1] + ((meses == 2) & bisiesto)
+
+def normalizar_fechas(fechas_raw):
+    """
+    Normaliza una columna completa de fechas en texto al formato 'DD-MM-YYYY' sin recorrer fila a fila.
+    La columna se factoriza a sus valores únicos (las fechas se repiten mucho), estos se analizan
+    con _analizar_fechas_unicas y el resultado se expande de nuevo a todas las filas.
+    Las fechas aproximadas ('alrededor', 'a.c.') e inválidas quedan en None.
+    Devuelve un DataFrame con las columnas 'fecha_nacimiento', 'dia', 'mes' y 'anio' (0 si no se pudo analizar).
+    """
+    codigos, unicos = pd.factorize(fechas_raw.astype(object))
+    # El último elemento es el resultado para los nulos (código -1 en pd.factorize)
+    fecha_unica, dia, mes, anio = _analizar_fechas_unicas(pd.Series(list(unicos) + [None], dtype=object))
+    return pd.DataFrame({'fecha_nacimiento': pd.Series(fecha_unica.take(codigos), index=fechas_raw.index, dtype=object),
+                         'dia': dia.take(codigos), 'mes': mes.take(codigos), 'anio': anio.take(codigos)},
+                        index=fechas_raw.index)
+
+def _analizar_fechas_unicas(fechas_raw):
+    """
+    Analiza una Series de fechas en texto sin recorrer fila a fila.
+    Unifica los separadores con operaciones .str y prueba cada formato en orden solo sobre
+    las filas que siguen sin analizar.
+    Devuelve una tupla (fecha_nacimiento, dia, mes, anio) de arrays.
+    """
+    n = len(fechas_raw)
+    dia = np.zeros(n, dtype=np.int64)
+    mes = np.zeros(n, dtype=np.int64)
+    anio = np.zeros(n, dtype=np.int64)
+    analizada = np.zeros(n, dtype=bool)
+
+    texto = fechas_raw.astype(object).str.lower()
+    aproximada = texto.str.contains("alrededor", regex=False) | texto.str.contains("a.c", regex=False)
+    candidata = (texto.notna() & ~aproximada.fillna(True).astype(bool)).to_numpy()
+    texto = texto.str.replace(".", "-", regex=False).str.replace("/", "-", regex=False)
+
+    for _, patron, orden, anio_corto in DATE_FORMATS_FAMOSOS:
+        posiciones = np.flatnonzero(candidata & ~analizada)
+        if len(posiciones) == 0:
+            break
+        partes = texto.iloc[posiciones].str.extract(patron)
+        coincide = partes.notna().all(axis=1).to_numpy()
+        if not coincide.any():
+            continue
+        valores = partes[coincide].apply(lambda columna: columna.str.strip()).astype(np.int64).to_numpy()
+        campos = dict(zip(orden, valores.T))
+        if anio_corto:
+            campos['anio'] = np.where(campos['anio'] >= 69, 1900 + campos['anio'], 2000 + campos['anio'])
+        valida = (campos['anio'] >= 1) & (campos['dia'] <= _dias_en_mes(campos['anio'], campos['mes']))
+        seleccion = posiciones[coincide][valida]
+        dia[seleccion] = campos['dia'][valida]
+        mes[seleccion] = campos['mes'][valida]
+        anio[seleccion] = campos['anio'][valida]
+        analizada[seleccion] = True
+
+    # Los dígitos no ASCII también los acepta strptime: esas pocas filas van por la versión fila a fila
+    no_ascii = texto.str.contains(r'[^\x00-\x7f]', regex=True).fillna(False).astype(bool).to_numpy()
+    restantes = np.flatnonzero(candidata & ~analizada & no_ascii)
+    for posicion in restantes:
+        fecha = transformar_fecha(fechas_raw.iloc[posicion])
+        if fecha is not None:
+            dia[posicion], mes[posicion], anio[posicion] = (int(parte) for parte in fecha.split('-'))
+            analizada[posicion] = True
+
+    fecha_nacimiento = np.full(n, None, dtype=object)
+    if analizada.any():
+        # strftime('%Y') no rellena con ceros los años menores a 1000
+        fecha_nacimiento[analizada] = (
+            pd.Series(dia[analizada]).astype(str).str.zfill(2) + '-'
+            + pd.Series(mes[analizada]).astype(str).str.zfill(2) + '-'
+            + pd.Series(anio[analizada]).astype(str)
+        ).to_numpy(dtype=object)
+    return fecha_nacimiento, dia, mes, anio
+
+def calcular_edad_y_cumple(dia, mes, anio, hoy=None):
+    """
+    Calcula la edad y el flag de cumpleaños (1 si es hoy, 0 si no) como operaciones sobre arrays,
+    usando una única fecha 'hoy' para todas las filas.
+    Devuelve una tupla (edad, cumple_hoy) de arrays de enteros.
+    """
+    hoy = hoy or date.today()
+    dia = np.asarray(dia)
+    mes = np.asarray(mes)
+    anio = np.asarray(anio)
+    # Diferencia de años - 1 si el cumpleaños aún no ha pasado este año.
+    aun_no_cumple = (mes > hoy.month) | ((mes == hoy.month) & (dia > hoy.day))
+    edad = hoy.year - anio - aun_no_cumple.astype(np.int64)
+    cumple_hoy = ((dia == hoy.day) & (mes == hoy.month)).astype(np.int64)
+    return edad, cumple_hoy
+
+def extraer_famosos_por_bloques(file_path, rows_per_chunk=ROWS_PER_CHUNK_FAMOSOS,
+                                block_size=READ_BLOCK_SIZE_FAMOSOS):
+    """
+    Lee el archivo de famosos por bloques grandes y analiza cada línea con una única expresión regular.
+    Genera DataFrames de como máximo rows_per_chunk filas con las columnas 'nombre' y
+    'fecha_nacimiento_raw'. Las líneas sin guion se ignoran, igual que antes.
+    Nunca se guarda en memoria el archivo completo ni la lista de todas sus líneas.
+    """
+    nombres = []
+    fechas = []
+    with open(file_path, "r", encoding="utf-8") as file:
+        resto = ''
+        while True:
+            bloque = file.read(block_size)
+            if not bloque:
+                texto = resto
+            else:
+                # La última línea del bloque puede estar incompleta: se completa con el siguiente
+                bloque = resto + bloque
+                corte = bloque.rfind('\n') + 1
+                texto, resto = bloque[:corte], bloque[corte:]
+            for nombre, fecha in _LINEA_FAMOSO.findall(texto):
+                nombres.append(nombre)
+                fechas.append(fecha)
+            if len(nombres) >= rows_per_chunk or (not bloque and nombres):
+                yield pd.DataFrame({"nombre": nombres, "fecha_nacimiento_raw": fechas})
+                nombres = []
+                fechas = []
+            if not bloque:
+                break
+
+def transformar_bloque_famosos(df, numero_bloque, totales, hoy):
+    """
+    Normaliza fechas y nombres de un bloque del extractor y calcula edad y cumpleaños.
+    Las filas con fecha inválida se descartan; totales acumula las filas leídas y las descartadas.
+    Devuelve el DataFrame con 'nombre', 'fecha_nacimiento', 'edad' y 'cumple_hoy'.
+    """
+    totales['leidas'] += len(df)
+    fechas = normalizar_fechas(df['fecha_nacimiento_raw'])
+    validas = fechas['fecha_nacimiento'].notna()
+    totales['fechas_invalidas'] += int((~validas).sum())
+    fechas = fechas[validas]
+    edad, cumple_hoy = calcular_edad_y_cumple(fechas['dia'], fechas['mes'], fechas['anio'], hoy)
+    # Mayúsculas y sin espacios extra, para que la deduplicación encuentre los duplicados
+    bloque = pd.DataFrame({
+        'nombre': normalizar_serie(df.loc[validas, 'nombre'].astype(str), MODO_NOMBRE),
+        'fecha_nacimiento': fechas['fecha_nacimiento'],
+        'edad': edad,
+        'cumple_hoy': cumple_hoy,
+    })
+    if numero_bloque == 1:
+        print("DEBUG: Primeras filas después de normalizar fechas y nombres:")
+        print(bloque[['nombre', 'fecha_nacimiento']].head(10).to_string(index=False))
+    return bloque
+
+def cargar_famosos_bulk(conn, df, table_name=NORMALIZED_TABLE_FAMOSOS, batch_size=BATCH_SIZE_FAMOSOS):
+    """
+    Inserta los famosos en la tabla con executemany por lotes, dentro de una única transacción
+    (la del llamador si ya abrió una, como run_etl_famosos con reconstruccion()).
+    Las filas se generan directamente desde los arrays de NumPy (sin iterrows) y se informa
+    la cantidad de filas y el rendimiento de cada lote.
+    Devuelve la cantidad de filas insertadas.
+    """
+    df = df[df['fecha_nacimiento'].notna()]
+    cursor = conn.cursor()
+    transaccion_propia = not conn.in_transaction
+    if transaccion_propia:
+        # Dentro de una transacción ya abierta no se puede cambiar 'synchronous'
+        for pragma in LOAD_PRAGMAS_FAMOSOS:
+            cursor.execute(pragma)
+
+    # tolist() convierte los valores de NumPy a tipos de Python que sqlite3 sabe guardar
+    filas = zip(df['nombre'].tolist(), df['fecha_nacimiento'].tolist(),
+                df['edad'].tolist(), df['cumple_hoy'].tolist())
+    insert_sql = f"INSERT INTO {table_name} (nombre, fecha_nacimiento, edad, cumple_hoy) VALUES (?, ?, ?, ?)"
+
+    inserted_count = 0
+    start_total = time.perf_counter()
+    if transaccion_propia:
+        cursor.execute("BEGIN")
+    try:
+        for batch_number in range(1, len(df) // batch_size + 2):
+            batch = list(islice(filas, batch_size))
+            if not batch:
+                break
+            start_batch = time.perf_counter()
+            cursor.executemany(insert_sql, batch)
+            elapsed = time.perf_counter() - start_batch
+            inserted_count += len(batch)
+            print(f"  - Lote {batch_number}: {len(batch)} filas insertadas "
+                  f"({len(batch) / max(elapsed, 1e-9):,.0f} filas/s).")
+        if transaccion_propia:
+            conn.commit()
+    except Exception:
+        if transaccion_propia:
+            conn.rollback()
+        raise
+    elapsed_total = time.perf_counter() - start_total
+    print(f"DEBUG: Carga masiva de {inserted_count} filas en {elapsed_total:.2f} s "
+          f"({inserted_count / max(elapsed_total, 1e-9):,.0f} filas/s).")
+    return inserted_count
 
 # Función principal que ejecuta el proceso ETL para famosos
+@medir_etl('famosos')
 def run_etl_famosos():
     """
     Ejecuta el proceso ETL (Extracción, Transformación, Carga) para los datos de famosos.
     Normaliza nombres y fechas, calcula edad y flag de cumpleaños, elimina duplicados,
     y carga los datos procesados en una base de datos SQLite.
+    Devuelve True si los datos se cargaron y False si el proceso se abortó.
+    Las métricas de cada etapa se guardan en ejecuciones_etl.db (ver metricas.py).
     """
     print("\n--- INICIANDO PROCESO ETL DE FAMOSOS ---")
 
-    # --- Gestión de la base de datos (eliminamos para asegurar consistencia) ---
-    if os.path.exists(DATABASE_NAME_FAMOSOS):
-        print(f"DEBUG: Eliminando base de datos existente '{DATABASE_NAME_FAMOSOS}'.")
-        try:
-            os.remove(DATABASE_NAME_FAMOSOS)
-            print(f"✅ Base de datos '{DATABASE_NAME_FAMOSOS}' eliminada exitosamente.")
-        except OSError as e:
-            print(f"❌ Error al eliminar '{DATABASE_NAME_FAMOSOS}': {e}. ¡Asegúrate de que no esté abierto en otra aplicación!")
-            print("❌ El proceso ETL de famosos no puede continuar con una base de datos antigua que podría causar inconsistencias.")
-            # Si el archivo es crítico y no se puede borrar, podrías salir del programa: sys.exit(1)
-            # Por ahora, continuamos para que el usuario vea el mensaje y el proceso falle más abajo si es necesario.
-            return # Salir de la función si no se puede eliminar el archivo.
-
     # --- Paso 1: Leer el archivo como texto plano ---
     # Verificación si el archivo de entrada existe
     if not os.path.exists(INPUT_FILE_FAMOSOS):
@@ -58,118 +308,45 @@ def run_etl_famosos():
         except Exception as e:
             print(f"❌ Error al crear el archivo de ejemplo '{INPUT_FILE_FAMOSOS}': {e}")
             print("❌ El proceso ETL de famosos no puede continuar sin el archivo de entrada.")
-            return # Salir de la función si no se puede crear el archivo de ejemplo.
+            return False # Salir de la función si no se puede crear el archivo de ejemplo.
     else:
         print(f"ℹ️ Archivo '{INPUT_FILE_FAMOSOS}' encontrado. Usando archivo existente.")
 
+    # Pasos 2 a 6 por bloques: cada bloque leído se normaliza (fechas, edad, nombres) antes de leer el
+    # siguiente, así en memoria solo quedan las filas ya transformadas y un bloque sin procesar,
+    # nunca el archivo completo ni todos los bloques sin procesar.
+    iniciar_etapa('extraccion_y_transformacion')
+    hoy = date.today() # Una única fecha de referencia para la edad y el cumpleaños de todas las filas
+    totales = {'leidas': 0, 'fechas_invalidas': 0}
     try:
-        with open(INPUT_FILE_FAMOSOS, "r", encoding="utf-8") as file:
-            lineas = file.readlines()
-        print(f"✅ Datos de famosos extraídos exitosamente desde '{INPUT_FILE_FAMOSOS}'.")
+        bloques = (transformar_bloque_famosos(bloque, numero, totales, hoy)
+                   for numero, bloque in enumerate(extraer_famosos_por_bloques(INPUT_FILE_FAMOSOS), start=1))
+        primero = next(bloques, None)
+        if primero is None:
+            # El archivo no tiene ninguna línea válida
+            df = pd.DataFrame(columns=['nombre', 'fecha_nacimiento', 'edad', 'cumple_hoy'])
+        else:
+            # pd.concat consume el generador: cada bloque sin procesar se libera antes de leer el siguiente
+            df = pd.concat(chain([primero], bloques), ignore_index=True)
+        print(f"✅ Datos de famosos extraídos y transformados desde '{INPUT_FILE_FAMOSOS}'.")
     except FileNotFoundError:
         print(f"❌ Error: El archivo '{INPUT_FILE_FAMOSOS}' no fue encontrado.")
-        return # Salir de la función si el archivo no existe.
+        return False # Salir de la función si el archivo no existe.
     except Exception as e:
-        print(f"❌ Error al leer el archivo '{INPUT_FILE_FAMOSOS}': {e}")
-        return # Salir de la función si hay un error de lectura.
-
-    # Paso 2: Extraer nombre y fecha de cada línea
-    data = []
-    for linea in lineas:
-        linea = re.sub(r'^\d+\.\s*', '', linea.strip()) # Elimina números al inicio y espacios.
-        if '-' in linea: # Si la línea contiene un guion, asumimos que es un separador nombre-fecha.
-            partes = linea.split('-', 1) # Divide la línea en dos partes: nombre y fecha.
-            nombre = partes[0].strip() # Limpia espacios alrededor del nombre.
-            fecha = partes[1].strip() # Limpia espacios alrededor de la fecha.
-            data.append((nombre, fecha))
-
-    # Paso 3: Crear DataFrame
-    df = pd.DataFrame(data, columns=["nombre", "fecha_nacimiento_raw"])
-    print(f"DEBUG: DataFrame inicial creado con {len(df)} filas.")
-    print("DEBUG: Primeras filas del DataFrame inicial:")
-    print(df.head().to_string(index=False)) # Imprime sin el índice de Pandas
-
-    # Paso 4: Normalizar fecha
-    def transformar_fecha(fecha_raw):
-        """
-        Intenta transformar una cadena de fecha en varios formatos a un formato estándar 'DD-MM-YYYY'.
-        Devuelve None si no puede transformar la fecha o si contiene palabras como 'alrededor' o 'a.c.'.
-        """
-        if not isinstance(fecha_raw, str): # Asegurarse de que es una cadena.
-            return None
-        fecha_raw = fecha_raw.lower() # Convertir a minúsculas para manejar "Alrededor" o "A.C.".
-        if "alrededor" in fecha_raw or "a.c" in fecha_raw:
-            return None # Ignorar fechas aproximadas o antes de Cristo.
-
-        # Reemplazar diferentes separadores por guiones.
-        fecha_raw = fecha_raw.replace(".", "-").replace("/", "-")
-
-        # Intentar varios formatos comunes de fecha.
-        for fmt in ("%d-%m-%Y", "%Y-%m-%d", "%d-%m-%y", "%Y%m%d"): # Añadido %d-%m-%y para años de 2 dígitos, %Y%m%d para sin separadores.
-            try:
-                fecha = datetime.strptime(fecha_raw, fmt) # Intenta parsear la fecha con el formato actual.
-                return fecha.strftime("%d-%m-%Y") # Devuelve la fecha en el formato estándar deseado.
-            except ValueError: # Si el formato no coincide, pasa al siguiente.
-                continue
-        return None # Si ningún formato coincide, devuelve None.
-
-    df['fecha_nacimiento'] = df['fecha_nacimiento_raw'].apply(transformar_fecha)
-    print("\nDEBUG: DataFrame después de normalizar fechas:")
-    print(df[['nombre', 'fecha_nacimiento']].head().to_string(index=False))
-
-    # Eliminar filas donde la fecha de nacimiento es None (no se pudo normalizar)
-    initial_rows_after_date_norm = len(df)
-    df.dropna(subset=['fecha_nacimiento'], inplace=True)
-    if len(df) < initial_rows_after_date_norm:
-        print(f"  - Se eliminaron {initial_rows_after_date_norm - len(df)} filas con fechas de nacimiento inválidas.")
-
-    # Paso 5: Calcular edad
-    def calcular_edad(fecha_str):
-        """
-        Calcula la edad de una persona basándose en su fecha de nacimiento.
-        Devuelve None si la fecha no es válida.
-        """
-        if fecha_str:
-            try:
-                fecha = datetime.strptime(fecha_str, "%d-%m-%Y")
-                hoy = datetime.now()
-                # Calcula la edad: diferencia de años - 1 si el cumpleaños aún no ha pasado este año.
-                return hoy.year - fecha.year - ((hoy.month, hoy.day) < (fecha.month, fecha.day))
-            except ValueError:
-                return None # Si la fecha no está en el formato esperado, devuelve None.
-        return None
+        print(f"❌ Error al leer o transformar el archivo '{INPUT_FILE_FAMOSOS}': {e}")
+        return False # Salir de la función si hay un error de lectura.
+    terminar_etapa(filas_salida=len(df), filas_entrada=totales['leidas'])
+    print(f"DEBUG: {totales['leidas']} filas leídas.")
+    if totales['fechas_invalidas']:
+        print(f"  - Se eliminaron {totales['fechas_invalidas']} filas con fechas de nacimiento inválidas.")
 
-    df['edad'] = df['fecha_nacimiento'].apply(calcular_edad)
-
-    # Paso 6: Flag cumpleaños
-    def cumple_hoy(fecha_str):
-        """
-        Verifica si una fecha de nacimiento es hoy.
-        Devuelve 1 si es el cumpleaños hoy, 0 en caso contrario.
-        """
-        if fecha_str:
-            try:
-                fecha = datetime.strptime(fecha_str, "%d-%m-%Y")
-                hoy = datetime.now()
-                # Compara solo el día y el mes.
-                return int((fecha.day == hoy.day) and (fecha.month == hoy.month))
-            except ValueError:
-                return 0 # Si la fecha no es válida, no es cumpleaños.
-        return 0
-
-    df['cumple_hoy'] = df['fecha_nacimiento'].apply(cumple_hoy)
-
-    # --- NORMALIZACIÓN ADICIONAL PARA LA DEDUPLICACIÓN ---
-    # Convertir 'nombre' a mayúsculas y eliminar espacios extra (si los hubiera)
-    df['nombre'] = df['nombre'].astype(str).str.strip().str.upper()
-    print("\nDEBUG: DataFrame después de normalizar nombres a MAYÚSCULAS y eliminar espacios:")
-    print(df[['nombre', 'fecha_nacimiento']].head(10).to_string(index=False)) # Muestra más filas para ver duplicados
-
-    # Paso 7: Eliminar duplicados por nombre y fecha
-    # Ahora, la eliminación de duplicados debería ser más efectiva gracias a la normalización de 'nombre'.
+    # Paso 7: Eliminar duplicados por nombre y fecha sobre todas las filas transformadas.
+    # Los bloques se unieron en el orden del archivo: se conserva la primera aparición de cada famoso.
     rows_before_dedup = len(df)
+    iniciar_etapa('deduplicacion', filas_entrada=rows_before_dedup)
     df = df.drop_duplicates(subset=['nombre', 'fecha_nacimiento'])
     rows_after_dedup = len(df)
+    terminar_etapa(filas_salida=rows_after_dedup)
 
     if rows_before_dedup > rows_after_dedup:
         print(f"✅ Se eliminaron {rows_before_dedup - rows_after_dedup} filas duplicadas de la tabla de famosos.")
@@ -181,40 +358,40 @@ def run_etl_famosos():
     print(f"DEBUG: DataFrame final tiene {len(df)} filas.")
 
 
-    # Paso 8: Conectar a SQLite y crear tabla
-    # Usamos 'datos_famosos.db' para el ETL de famosos, separado de otras DBs.
-    conn = sqlite3.connect(DATABASE_NAME_FAMOSOS)
-    cursor = conn.cursor()
-
-    cursor.execute(f"""
-    CREATE TABLE IF NOT EXISTS {NORMALIZED_TABLE_FAMOSOS} (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nombre TEXT,
-        fecha_nacimiento TEXT,
-        edad INTEGER,
-        cumple_hoy INTEGER
-    )
-    """)
-    print(f"✅ Tabla '{NORMALIZED_TABLE_FAMOSOS}' creada o verificada en '{DATABASE_NAME_FAMOSOS}'.")
-
-
-    # Paso 9: Insertar datos en la tabla
-    inserted_count = 0
-    for index, row in df.iterrows():
-        # Solo insertamos si la fecha_nacimiento no es None (porque esas filas ya fueron dropeadas pero por si acaso).
-        if pd.notna(row['fecha_nacimiento']):
-            cursor.execute(f"""
-            INSERT INTO {NORMALIZED_TABLE_FAMOSOS} (nombre, fecha_nacimiento, edad, cumple_hoy)
-            VALUES (?, ?, ?, ?)
-            """, (row['nombre'], row['fecha_nacimiento'], row['edad'], row['cumple_hoy']))
-            inserted_count += 1
-
-    conn.commit() # Guarda los cambios en la base de datos.
-    conn.close() # Cierra la conexión a la base de datos.
+    # Paso 8 y 9: Recrear la tabla e insertar los datos (carga masiva por lotes) en una única transacción.
+    # La base de datos no se borra: quien la esté leyendo (el visor) sigue viendo los datos anteriores
+    # hasta que la carga se confirma, y si falla se conservan (ver reconstruccion_db.py).
+    iniciar_etapa('carga', filas_entrada=len(df))
+    try:
+        conn = abrir_para_reconstruir(DATABASE_NAME_FAMOSOS, LOAD_PRAGMAS_FAMOSOS)
+    except sqlite3.Error as e:
+        print(f"❌ Error al abrir '{DATABASE_NAME_FAMOSOS}': {e}")
+        return False
+    try:
+        with reconstruccion(conn):
+            conn.execute(f"DROP TABLE IF EXISTS {NORMALIZED_TABLE_FAMOSOS}")
+            conn.execute(f"""
+            CREATE TABLE {NORMALIZED_TABLE_FAMOSOS} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT,
+                fecha_nacimiento TEXT,
+                edad INTEGER,
+                cumple_hoy INTEGER
+            )
+            """)
+            print(f"✅ Tabla '{NORMALIZED_TABLE_FAMOSOS}' recreada en '{DATABASE_NAME_FAMOSOS}'.")
+            inserted_count = cargar_famosos_bulk(conn, df)
+    except sqlite3.Error as e:
+        print(f"❌ Error al cargar los datos en '{DATABASE_NAME_FAMOSOS}': {e}. Se conservan los datos anteriores.")
+        return False
+    finally:
+        conn.close() # Cierra la conexión a la base de datos.
 
+    terminar_etapa(filas_salida=inserted_count)
     print(f"✅ Datos insertados en SQLite correctamente. {inserted_count} filas insertadas.")
 
     # --- Verificación final (opcional) ---
+    iniciar_etapa('verificacion')
     try:
         conn_check = sqlite3.connect(DATABASE_NAME_FAMOSOS)
         df_check = pd.read_sql_table(NORMALIZED_TABLE_FAMOSOS, con=conn_check)
@@ -223,8 +400,10 @@ def run_etl_famosos():
         conn_check.close()
     except Exception as e:
         print(f"❌ Error al leer la tabla para verificación: {e}")
+    terminar_etapa()
 
     print("\n--- PROCESO ETL DE FAMOSOS FINALIZADO ---")
+    return True
 
 # Si este script se ejecuta directamente, llama a la función ETL.
 # Esto es útil para probar el script de forma independiente.
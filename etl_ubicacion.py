@@ -1,9 +1,11 @@
 import pandas as pd
-import re
 import sqlite3
 import os
 import sys
-import unicodedata # Importar unicodedata para normalización de caracteres
+from normalizacion import normalizar_para_comparacion, normalizar_serie, MODO_COMPARACION
+from dedup_espacial_ubicacion import deduplicar_por_proximidad, DISTANCIA_FUSION_M
+from reconstruccion_db import abrir_para_reconstruir, reconstruccion
+from metricas import medir_etl, iniciar_etapa, terminar_etapa
 
 # --- Configuración de archivos y base de datos ---
 INPUT_FILE_UBICACION = 'DATOS3.txt'
@@ -11,6 +13,13 @@ DATABASE_NAME_UBICACION = 'datos_ubicacion.db'
 
 # Nombre de la tabla normalizada única
 NORMALIZED_TABLE_UBICACION = 'ubicacion_norm'
+# Tabla virtual R*Tree con las coordenadas de cada lugar (índice espacial)
+RTREE_TABLE_UBICACION = 'ubicacion_rtree'
+# Tabla de auditoría con las fusiones hechas por la deduplicación espacial
+FUSIONES_TABLE_UBICACION = 'ubicacion_fusiones'
+
+# "lat, lon" en grados decimales, con signo opcional
+_PATRON_COORDENADAS = r'^\s*([-+]?\d+(?:\.\d*)?)\s*,\s*([-+]?\d+(?:\.\d*)?)\s*$'
 
 # Función auxiliar para normalizar cadenas de texto (aplicada a datos y encabezados para limpieza final)
 def normalize_string_for_comparison(text_str):
@@ -23,46 +32,91 @@ def normalize_string_for_comparison(text_str):
     - Elimina espacios extra resultantes.
     - Convierte el resultado final a mayúsculas.
     """
-    if pd.isna(text_str) or not isinstance(text_str, str):
-        return None
-    
-    # Eliminar BOM si presente y luego strip espacios
-    clean_h = text_str.strip().replace('\ufeff', '')
-    
-    # Normalizar a NFKD (forma de compatibilidad) y luego codificar a ASCII y decodificar a utf-8
-    # Esto quita los acentos y convierte a su forma base si es posible, ignorando caracteres no ASCII.
-    normalized_h_ascii = unicodedata.normalize('NFKD', clean_h).encode('ascii', 'ignore').decode('utf-8')
-    
-    # Reemplazar secuencias de espacios, comas, guiones y guiones bajos por un solo ESPACIO
-    # Usamos un conjunto de caracteres [,\s_-]+ para reemplazar uno o más de estos por un solo ESPACIO
-    final_h = re.sub(r'[,\s_-]+', ' ', normalized_h_ascii) 
-    
-    # Eliminar espacios extra al inicio o al final que pudieran quedar después del reemplazo
-    final_h = final_h.strip()
+    # La implementación vive en normalizacion.py, compartida con los demás ETL
+    return normalizar_para_comparacion(text_str)
 
-    # Convertir el resultado final a mayúsculas para la consistencia con el formato deseado
-    return final_h.upper()
+def parsear_georeferencia(georeferencias):
+    """
+    Convierte una columna de georeferencias en texto ("37.422, -122.084") a latitud y longitud numéricas.
+    Las coordenadas que no se pueden leer o que están fuera de rango (lat [-90, 90], lon [-180, 180]) quedan en NaN.
+    Devuelve un DataFrame con las columnas 'lat' y 'lon'.
+    """
+    partes = georeferencias.astype(object).str.extract(_PATRON_COORDENADAS)
+    lat = pd.to_numeric(partes[0], errors='coerce')
+    lon = pd.to_numeric(partes[1], errors='coerce')
+    fuera_de_rango = ~lat.between(-90, 90) | ~lon.between(-180, 180)
+    lat[fuera_de_rango] = float('nan')
+    lon[fuera_de_rango] = float('nan')
+    return pd.DataFrame({'lat': lat, 'lon': lon}, index=georeferencias.index)
+
+def crear_indice_espacial(conn):
+    """
+    Crea (o recrea) la tabla R*Tree con las coordenadas válidas de la tabla normalizada.
+    Cada lugar se guarda como un rectángulo de tamaño cero con el mismo id que en la tabla.
+    Devuelve la cantidad de lugares indexados.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {RTREE_TABLE_UBICACION}")
+    cursor.execute(f"CREATE VIRTUAL TABLE {RTREE_TABLE_UBICACION} USING rtree(id, min_lat, max_lat, min_lon, max_lon)")
+    cursor.execute(f"""
+    INSERT INTO {RTREE_TABLE_UBICACION} (id, min_lat, max_lat, min_lon, max_lon)
+    SELECT id, lat, lat, lon, lon FROM {NORMALIZED_TABLE_UBICACION}
+    WHERE lat IS NOT NULL AND lon IS NOT NULL
+    """)
+    return cursor.execute(f"SELECT count(*) FROM {RTREE_TABLE_UBICACION}").fetchone()[0]
+
+def guardar_fusiones(conn, fusiones, df_raw, ids_por_fila):
+    """
+    Crea (o recrea) la tabla de auditoría con una fila por cada lugar fusionado en otro:
+    el id y nombre del lugar conservado, los datos del lugar descartado, la distancia entre ambos,
+    la similitud de nombres y el motivo de la fusión.
+    Devuelve la cantidad de fusiones guardadas.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {FUSIONES_TABLE_UBICACION}")
+    cursor.execute(f"""
+    CREATE TABLE {FUSIONES_TABLE_UBICACION} (
+        id_conservado INTEGER REFERENCES {NORMALIZED_TABLE_UBICACION}(id),
+        nombre_conservado TEXT,
+        nombre_fusionado TEXT,
+        direccion_fusionada TEXT,
+        georeferencia_fusionada TEXT,
+        distancia_m REAL,
+        similitud REAL,
+        motivo TEXT
+    )
+    """)
+    filas = [
+        (
+            int(ids_por_fila[fusion.fila_conservada]),
+            df_raw.at[fusion.fila_conservada, 'nombre_del_lugar'],
+            df_raw.at[fusion.fila_fusionada, 'nombre_del_lugar'],
+            df_raw.at[fusion.fila_fusionada, 'direccion_completa'],
+            df_raw.at[fusion.fila_fusionada, 'georeferencia'],
+            None if pd.isna(fusion.distancia_m) else float(fusion.distancia_m),
+            float(fusion.similitud),
+            fusion.motivo,
+        )
+        for fusion in fusiones.itertuples(index=False)
+    ]
+    cursor.executemany(f"INSERT INTO {FUSIONES_TABLE_UBICACION} VALUES (?, ?, ?, ?, ?, ?, ?, ?)", filas)
+    return len(filas)
 
 # Función principal que ejecuta el proceso ETL para ubicación
-def run_etl_ubicacion():
+@medir_etl('ubicacion')
+def run_etl_ubicacion(dedup_espacial=False, distancia_fusion_m=DISTANCIA_FUSION_M):
     """
     Ejecuta el proceso ETL (Extracción, Transformación, Carga) para los datos de ubicación.
     Extrae información de lugares, direcciones y georeferencias, normaliza los datos,
     elimina duplicados y carga los datos procesados en una base de datos SQLite en una única tabla normalizada.
+    Con dedup_espacial=True los duplicados se buscan por cercanía (menos de distancia_fusion_m metros)
+    y parecido de nombres en lugar de solo por nombre, y las fusiones se guardan en
+    la tabla de auditoría 'ubicacion_fusiones'.
+    Devuelve True si los datos se cargaron y False si el proceso se abortó.
+    Las métricas de cada etapa se guardan en ejecuciones_etl.db (ver metricas.py).
     """
     print("\n--- INICIANDO PROCESO ETL DE UBICACIÓN ---")
 
-    # --- Gestión de la base de datos (eliminamos para asegurar consistencia) ---
-    if os.path.exists(DATABASE_NAME_UBICACION):
-        print(f"DEBUG: Eliminando base de datos existente '{DATABASE_NAME_UBICACION}'.")
-        try:
-            os.remove(DATABASE_NAME_UBICACION)
-            print(f"✅ Base de datos '{DATABASE_NAME_UBICACION}' eliminada exitosamente.")
-        except OSError as e:
-            print(f"❌ Error al eliminar '{DATABASE_NAME_UBICACION}': {e}. ¡Asegúrate de que no esté abierto en otra aplicación!)")
-            print("❌ El proceso ETL de ubicación no puede continuar con una base de datos antigua que podría causar inconsistencias.")
-            return # Salir de la función si no se puede eliminar el archivo.
-
     # --- Paso 1: Leer el archivo como texto plano ---
     # Verificación si el archivo de entrada existe
     if not os.path.exists(INPUT_FILE_UBICACION):
@@ -141,11 +195,12 @@ def run_etl_ubicacion():
         except Exception as e:
             print(f"❌ Error al crear el archivo de ejemplo '{INPUT_FILE_UBICACION}': {e}")
             print("❌ El proceso ETL de ubicación no puede continuar sin el archivo de entrada.")
-            return # Salir de la función si no se puede crear el archivo de ejemplo.
+            return False # Salir de la función si no se puede crear el archivo de ejemplo.
     else:
         print(f"ℹ️ Archivo '{INPUT_FILE_UBICACION}' encontrado. Usando archivo existente.")
 
     # Lista de codificaciones a intentar
+    iniciar_etapa('extraccion')
     tried_encodings = ['latin-1', 'cp1252', 'utf-8'] # Priorizar latin-1 y cp1252
     file_read_successful = False
     read_encoding = None
@@ -164,7 +219,7 @@ def run_etl_ubicacion():
 
     if not file_read_successful:
         print(f"❌ Error crítico: No se pudo leer el archivo '{INPUT_FILE_UBICACION}' con ninguna de las codificaciones intentadas ({', '.join(tried_encodings)}).")
-        return # Salir de la función si no se pudo leer el archivo
+        return False # Salir de la función si no se pudo leer el archivo
 
     data = []
     # Definir los encabezados esperados para facilitar la lectura.
@@ -186,7 +241,7 @@ def run_etl_ubicacion():
             raw_headers = header_line.split(',')
         else:
             print(f"❌ Error: El encabezado del archivo '{INPUT_FILE_UBICACION}' no usa ';' ni ',' como delimitador.")
-            return
+            return False
 
         # Normalizar cada encabezado usando la función auxiliar (solo para comparación, luego se hace lowercase)
         headers = [normalize_string_for_comparison(h).lower() for h in raw_headers]
@@ -206,7 +261,7 @@ def run_etl_ubicacion():
             print(f"❌ Error: El archivo '{INPUT_FILE_UBICACION}' no contiene las columnas esperadas en el encabezado.")
             print(f"DEBUG: Columnas encontradas (normalizadas para comparación): {headers}")
             print(f"DEBUG: Columnas esperadas (normalizadas para comparación): {normalized_expected_headers_for_comparison}")
-            return
+            return False
         
         # Procesar el resto de las líneas
         for i, linea in enumerate(lineas[1:]): # Empezar desde la segunda línea (después del encabezado)
@@ -243,30 +298,53 @@ def run_etl_ubicacion():
 
     # Crear DataFrame inicial con todos los datos parseados
     df_raw = pd.DataFrame(data)
+    terminar_etapa(filas_salida=len(df_raw))
     print(f"DEBUG: DataFrame inicial creado con {len(df_raw)} filas.")
     print("DEBUG: Primeras filas del DataFrame inicial:")
     print(df_raw.head().to_string(index=False))
 
+    # --- Coordenadas numéricas (antes de normalizar, que elimina el signo negativo) ---
+    iniciar_etapa('coordenadas', filas_entrada=len(df_raw))
+    if "georeferencia" in df_raw.columns:
+        df_raw[['lat', 'lon']] = parsear_georeferencia(df_raw["georeferencia"])
+        invalid_coords = int(df_raw['lat'].isna().sum())
+        if invalid_coords:
+            print(f"⚠️ Advertencia: {invalid_coords} georeferencias no válidas o fuera de rango (lat/lon quedarán vacías).")
+    else:
+        df_raw['lat'] = float('nan')
+        df_raw['lon'] = float('nan')
+    terminar_etapa(filas_salida=len(df_raw))
+
     # --- Paso 2: Normalizar columnas de texto para deduplicación y carga final ---
+    iniciar_etapa('normalizacion', filas_entrada=len(df_raw))
     # Aplicar normalize_string_for_comparison a todas las columnas de texto relevantes
+    # (cada valor distinto se normaliza una sola vez, ver normalizacion.py)
     for col in ["nombre_del_lugar", "direccion_completa", "georeferencia"]:
         if col in df_raw.columns:
-            df_raw[col] = df_raw[col].astype(str).apply(lambda x: normalize_string_for_comparison(x) if pd.notna(x) else None)
-    
+            df_raw[col] = normalizar_serie(df_raw[col].astype(str), MODO_COMPARACION)
+    terminar_etapa(filas_salida=len(df_raw))
+
     print("\nDEBUG: DataFrame después de normalizar columnas de texto (para deduplicación y carga):")
     print(df_raw.head(10).to_string(index=False))
 
     # --- Paso 3: Eliminar duplicados ---
-    # La deduplicación ahora se realiza SÓLO sobre el nombre del lugar normalizado.
-    subset_cols_dedup = ["nombre_del_lugar"] # CAMBIO CLAVE AQUÍ
-    
     rows_before_dedup = len(df_raw)
-    # df_deduplicated contendrá las columnas ya normalizadas y en mayúsculas
-    df_deduplicated = df_raw.drop_duplicates(subset=subset_cols_dedup, inplace=False).copy()
+    iniciar_etapa('deduplicacion', filas_entrada=rows_before_dedup)
+    fusiones = None
+    if dedup_espacial:
+        # Lugares cercanos con nombres parecidos (ver dedup_espacial_ubicacion.py)
+        df_deduplicated, fusiones = deduplicar_por_proximidad(df_raw, distancia_max_m=distancia_fusion_m)
+        criterio = f"por cercanía de {distancia_fusion_m:g} m y nombre"
+    else:
+        # La deduplicación ahora se realiza SÓLO sobre el nombre del lugar normalizado.
+        subset_cols_dedup = ["nombre_del_lugar"] # CAMBIO CLAVE AQUÍ
+        # df_deduplicated contendrá las columnas ya normalizadas y en mayúsculas
+        df_deduplicated = df_raw.drop_duplicates(subset=subset_cols_dedup, inplace=False).copy()
+        criterio = "por nombre"
     rows_after_dedup = len(df_deduplicated)
 
     if rows_before_dedup > rows_after_dedup:
-        print(f"✅ Se eliminaron {rows_before_dedup - rows_after_dedup} filas duplicadas (por nombre). Filas únicas: {rows_after_dedup}.")
+        print(f"✅ Se eliminaron {rows_before_dedup - rows_after_dedup} filas duplicadas ({criterio}). Filas únicas: {rows_after_dedup}.")
     else:
         print("ℹ️ No se encontraron duplicados significativos para eliminar.")
     
@@ -279,44 +357,75 @@ def run_etl_ubicacion():
              df_deduplicated[col] = df_deduplicated[col].replace({pd.NA: None, 'NAN': None}).fillna('')
 
     # Reordenar las columnas para que 'id' sea la primera y los nombres coincidan con la imagen
-    df_final_table = df_deduplicated[['id', 'nombre_del_lugar', 'direccion_completa', 'georeferencia']].copy()
+    df_final_table = df_deduplicated[['id', 'nombre_del_lugar', 'direccion_completa', 'georeferencia', 'lat', 'lon']].copy()
     df_final_table.rename(columns={
         'nombre_del_lugar': 'Nombre', 
         'direccion_completa': 'Direccion', 
         'georeferencia': 'Georeferencia'
     }, inplace=True)
-
+    terminar_etapa(filas_salida=len(df_final_table))
 
     print("\nDEBUG: DataFrame final listo para la carga en la tabla única:")
     print(df_final_table.head(10).to_string(index=False))
     print(f"DEBUG: DataFrame final tiene {len(df_final_table)} filas.")
 
 
-    # --- Paso 4: Conectar a SQLite y crear la tabla única ---
-    conn = sqlite3.connect(DATABASE_NAME_UBICACION)
-    cursor = conn.cursor()
-
-    # Crear la tabla única 'ubicacion_norm'
-    cursor.execute(f"""
-    CREATE TABLE IF NOT EXISTS {NORMALIZED_TABLE_UBICACION} (
-        id INTEGER PRIMARY KEY,
-        Nombre TEXT,
-        Direccion TEXT,
-        Georeferencia TEXT
-    )
-    """)
-    print(f"✅ Tabla '{NORMALIZED_TABLE_UBICACION}' creada o verificada en '{DATABASE_NAME_UBICACION}'.")
-
-    # --- Paso 5: Insertar datos en la tabla única ---
-    df_final_table.to_sql(NORMALIZED_TABLE_UBICACION, conn, if_exists='replace', index=False)
-    print(f"✅ Datos insertados en '{NORMALIZED_TABLE_UBICACION}'. {len(df_final_table)} filas.")
-    
-    conn.commit() # Guarda los cambios en la base de datos.
-    conn.close() # Cierra la conexión a la base de datos.
+    # --- Pasos 4 a 7: Recrear las tablas y cargarlas en una única transacción ---
+    # La base de datos no se borra: quien la esté leyendo (el visor) sigue viendo los datos anteriores
+    # hasta que la carga se confirma, y si falla se conservan (ver reconstruccion_db.py).
+    iniciar_etapa('carga', filas_entrada=len(df_final_table))
+    try:
+        conn = abrir_para_reconstruir(DATABASE_NAME_UBICACION)
+    except sqlite3.Error as e:
+        print(f"❌ Error al abrir '{DATABASE_NAME_UBICACION}': {e}")
+        return False
+    try:
+        with reconstruccion(conn):
+            cursor = conn.cursor()
+            # También se borra la auditoría de una carga anterior: solo se recrea si hay deduplicación espacial
+            for tabla in (FUSIONES_TABLE_UBICACION, RTREE_TABLE_UBICACION, NORMALIZED_TABLE_UBICACION):
+                cursor.execute(f"DROP TABLE IF EXISTS {tabla}")
+
+            # --- Paso 4: Crear la tabla única 'ubicacion_norm' ---
+            cursor.execute(f"""
+            CREATE TABLE {NORMALIZED_TABLE_UBICACION} (
+                id INTEGER PRIMARY KEY,
+                Nombre TEXT,
+                Direccion TEXT,
+                Georeferencia TEXT,
+                lat REAL,
+                lon REAL
+            )
+            """)
+            print(f"✅ Tabla '{NORMALIZED_TABLE_UBICACION}' recreada en '{DATABASE_NAME_UBICACION}'.")
+
+            # --- Paso 5: Insertar datos en la tabla única ---
+            # executemany y no to_sql: pandas confirmaría la transacción a mitad de la carga.
+            # astype(object) convierte los valores de NumPy a tipos de Python y NaN a None (NULL)
+            filas = df_final_table.astype(object).where(df_final_table.notna(), None)
+            cursor.executemany(f"INSERT INTO {NORMALIZED_TABLE_UBICACION} VALUES (?, ?, ?, ?, ?, ?)",
+                               filas.itertuples(index=False, name=None))
+            print(f"✅ Datos insertados en '{NORMALIZED_TABLE_UBICACION}'. {len(df_final_table)} filas.")
+
+            # --- Paso 6: Índice espacial R*Tree sobre lat/lon ---
+            indexed_count = crear_indice_espacial(conn)
+            print(f"✅ Índice espacial '{RTREE_TABLE_UBICACION}' creado con {indexed_count} lugares.")
+
+            # --- Paso 7: Auditoría de la deduplicación espacial ---
+            if fusiones is not None:
+                merged_count = guardar_fusiones(conn, fusiones, df_raw, df_deduplicated['id'])
+                print(f"✅ {merged_count} fusiones registradas en '{FUSIONES_TABLE_UBICACION}'.")
+    except sqlite3.Error as e:
+        print(f"❌ Error al cargar los datos en '{DATABASE_NAME_UBICACION}': {e}. Se conservan los datos anteriores.")
+        return False
+    finally:
+        conn.close() # Cierra la conexión a la base de datos.
+    terminar_etapa(filas_salida=len(df_final_table))
 
     print(f"✅ Tabla '{NORMALIZED_TABLE_UBICACION}' cargada exitosamente. Total de lugares únicos: {len(df_final_table)}.")
 
     # --- Verificación final (opcional) ---
+    iniciar_etapa('verificacion')
     try:
         conn_check = sqlite3.connect(DATABASE_NAME_UBICACION)
         print(f"\n📊 Contenido de la tabla '{NORMALIZED_TABLE_UBICACION}' después de la carga:")
@@ -325,8 +434,10 @@ def run_etl_ubicacion():
         conn_check.close()
     except Exception as e:
         print(f"❌ Error al leer la tabla para verificación: {e}")
+    terminar_etapa()
 
     print("\n--- PROCESO ETL DE UBICACIÓN FINALIZADO ---")
+    return True
 
 # Si este script se ejecuta directamente, llama a la función ETL.
 if __name__ == "__main__":
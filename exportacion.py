@@ -0,0 +1,298 @@
+import csv
+import gzip
+import io
+import os
+import sqlite3
+import time
+
+from visor_datos import citar_identificador
+
+# --- Exportación de tablas SQLite por streaming ---
+# Las filas se leen del cursor por lotes con fetchmany y se escriben directamente al archivo,
+# así que la memoria usada no depende del tamaño de la tabla.
+
+# Filas leídas del cursor en cada lote
+TAMANO_LOTE_EXPORTACION = 10_000
+# Separador de los CSV exportados (el mismo que usaba la exportación con pandas)
+SEPARADOR_CSV = ';'
+# Nivel de compresión gzip: 6 comprime casi igual que 9 y es bastante más rápido
+NIVEL_COMPRESION_GZIP = 6
+# Segundos mínimos entre dos llamadas al callback de progreso
+INTERVALO_PROGRESO_S = 1.0
+# Páginas copiadas en cada paso de la copia en caliente (con páginas de 4 KB, unos 16 MB por paso)
+PAGINAS_POR_PASO_COPIA = 4096
+# Filas por hoja de Excel (límite del formato .xlsx, incluye el encabezado)
+MAX_FILAS_HOJA_EXCEL = 1_048_576
+
+
+def formatear_progreso(filas, bytes_escritos, segundos):
+    """
+    Texto con filas y bytes escritos y su velocidad por segundo, para mostrar en el log.
+    """
+    segundos = max(segundos, 1e-9)
+    megabytes = bytes_escritos / (1024 * 1024)
+    return (f"{filas:,} filas · {megabytes:,.1f} MB en {segundos:.1f} s "
+            f"({filas / segundos:,.0f} filas/s, {megabytes / segundos:,.1f} MB/s)")
+
+
+def _ruta_parte(ruta_salida, numero):
+    """
+    Nombre del archivo de la parte 'numero' (1, 2, ...): datos.csv -> datos.part001.csv (o .csv.gz).
+    """
+    base, extension = ruta_salida, ''
+    for sufijo in ('.csv.gz', '.gz', '.csv'):
+        if ruta_salida.lower().endswith(sufijo):
+            base, extension = ruta_salida[:-len(sufijo)], ruta_salida[-len(sufijo):]
+            break
+    return f"{base}.part{numero:03d}{extension}"
+
+
+def _abrir_salida(ruta, comprimir):
+    if comprimir:
+        return gzip.open(ruta, 'wb', compresslevel=NIVEL_COMPRESION_GZIP)
+    return open(ruta, 'wb')
+
+
+def exportar_tabla_csv(conn, tabla, ruta_salida, comprimir=False, tamano_parte_mb=None,
+                       al_progresar=None, tamano_lote=TAMANO_LOTE_EXPORTACION, separador=SEPARADOR_CSV):
+    """
+    Exporta una tabla completa a CSV (UTF-8, con encabezado) leyendo el cursor por lotes.
+    - comprimir: escribe el archivo comprimido con gzip.
+    - tamano_parte_mb: si se indica, divide la salida en partes de aproximadamente ese tamaño
+      (sin comprimir), cada una con su encabezado: datos.part001.csv, datos.part002.csv, ...
+    - al_progresar: función llamada con (filas, bytes_escritos, segundos) durante la exportación y al final.
+    Devuelve un diccionario con 'filas', 'bytes', 'segundos' y 'archivos' (lista de rutas escritas).
+    """
+    inicio = time.perf_counter()
+    cursor = conn.execute(f"SELECT * FROM {citar_identificador(tabla)}")
+    encabezado = [descripcion[0] for descripcion in cursor.description]
+
+    # Cada lote se arma en memoria como texto y se escribe al archivo de una vez
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=separador, lineterminator=os.linesep)
+    limite_parte = int(tamano_parte_mb * 1024 * 1024) if tamano_parte_mb else None
+
+    archivos = []
+    salida = None
+    bytes_parte = 0
+    filas = 0
+    bytes_escritos = 0
+    ultimo_progreso = inicio
+
+    def nueva_parte():
+        nonlocal salida, bytes_parte
+        if salida is not None:
+            salida.close()
+        ruta = _ruta_parte(ruta_salida, len(archivos) + 1) if limite_parte else ruta_salida
+        salida = _abrir_salida(ruta, comprimir)
+        archivos.append(ruta)
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerow(encabezado)
+        datos = buffer.getvalue().encode('utf-8')
+        salida.write(datos)
+        bytes_parte = len(datos)
+        return len(datos)
+
+    try:
+        bytes_escritos += nueva_parte()
+        while True:
+            lote = cursor.fetchmany(tamano_lote)
+            if not lote:
+                break
+            if limite_parte and bytes_parte >= limite_parte:
+                bytes_escritos += nueva_parte()
+            buffer.seek(0)
+            buffer.truncate()
+            escritor.writerows(lote)
+            datos = buffer.getvalue().encode('utf-8')
+            salida.write(datos)
+            bytes_parte += len(datos)
+            bytes_escritos += len(datos)
+            filas += len(lote)
+
+            ahora = time.perf_counter()
+            if al_progresar is not None and ahora - ultimo_progreso >= INTERVALO_PROGRESO_S:
+                al_progresar(filas, bytes_escritos, ahora - inicio)
+                ultimo_progreso = ahora
+    finally:
+        cursor.close()
+        if salida is not None:
+            salida.close()
+
+    segundos = time.perf_counter() - inicio
+    if al_progresar is not None:
+        al_progresar(filas, bytes_escritos, segundos)
+    return {'filas': filas, 'bytes': bytes_escritos, 'segundos': segundos, 'archivos': archivos}
+
+
+def _exportar_tabla_csv_desde_archivo(ruta_db, tabla, ruta_salida):
+    """
+    Exporta una tabla a CSV con su propia conexión de solo lectura (se ejecuta en un proceso del pool).
+    """
+    conn = sqlite3.connect(f"file:{ruta_db}?mode=ro", uri=True)
+    try:
+        return exportar_tabla_csv(conn, tabla, ruta_salida)
+    finally:
+        conn.close()
+
+
+def exportar_tablas_csv_en_paralelo(ruta_db, salidas_por_tabla, max_procesos=None, al_terminar_tabla=None):
+    """
+    Exporta varias tablas de una base de datos a CSV a la vez, una tabla por proceso.
+    El trabajo de armar el CSV es Python puro, así que se reparte entre procesos (no hilos)
+    para aprovechar todos los núcleos; cada proceso abre su propia conexión de solo lectura.
+    - salidas_por_tabla: diccionario {tabla: ruta_csv}.
+    - max_procesos: tamaño del pool (por defecto, el número de núcleos sin superar el de tablas).
+    - al_terminar_tabla: función llamada con (tabla, resultado, error) al terminar cada tabla;
+      resultado es el diccionario de exportar_tabla_csv, o None si falló (error tiene la excepción).
+    Devuelve un diccionario con 'resultados' ({tabla: resultado}), 'errores' ({tabla: excepción}),
+    'filas' y 'bytes' totales y 'segundos' de reloj.
+    """
+    inicio = time.perf_counter()
+    resultados, errores = {}, {}
+
+    def registrar(tabla, resultado, error):
+        if error is None:
+            resultados[tabla] = resultado
+        else:
+            errores[tabla] = error
+        if al_terminar_tabla is not None:
+            al_terminar_tabla(tabla, resultado, error)
+
+    procesos = min(max_procesos or os.cpu_count() or 1, len(salidas_por_tabla))
+    if procesos <= 1:
+        # Una sola tabla (o un solo núcleo): no vale la pena arrancar procesos
+        for tabla, ruta_salida in salidas_por_tabla.items():
+            try:
+                registrar(tabla, _exportar_tabla_csv_desde_archivo(ruta_db, tabla, ruta_salida), None)
+            except Exception as e:
+                registrar(tabla, None, e)
+    else:
+        # Importado aquí: multiprocessing alarga el arranque de la interfaz y solo se usa en este caso
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        # 'spawn' en todas las plataformas: con 'fork' (el predeterminado en Linux) el hijo copia los
+        # locks que otros hilos de la interfaz (Tk, lectores de los ETL, log) tengan tomados y puede bloquearse
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+            tareas = {
+                pool.submit(_exportar_tabla_csv_desde_archivo, ruta_db, tabla, ruta_salida): tabla
+                for tabla, ruta_salida in salidas_por_tabla.items()
+            }
+            for tarea in as_completed(tareas):
+                try:
+                    registrar(tareas[tarea], tarea.result(), None)
+                except Exception as e:
+                    registrar(tareas[tarea], None, e)
+
+    return {
+        'resultados': resultados,
+        'errores': errores,
+        'filas': sum(resultado['filas'] for resultado in resultados.values()),
+        'bytes': sum(resultado['bytes'] for resultado in resultados.values()),
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+def exportar_tabla_excel(conn, tabla, ruta_salida, al_progresar=None, tamano_lote=TAMANO_LOTE_EXPORTACION,
+                         max_filas_hoja=MAX_FILAS_HOJA_EXCEL):
+    """
+    Exporta una tabla completa a .xlsx con el modo de solo escritura de openpyxl, que escribe
+    cada fila al archivo en lugar de armar el libro en memoria.
+    Cuando una hoja llega a max_filas_hoja filas (encabezado incluido) se continúa en una nueva:
+    Sheet1, Sheet2, ... cada una con su encabezado.
+    - al_progresar: función llamada con (filas, segundos) durante la exportación y al final.
+    Devuelve un diccionario con 'filas', 'hojas' y 'segundos'.
+    """
+    from openpyxl import Workbook
+
+    inicio = time.perf_counter()
+    cursor = conn.execute(f"SELECT * FROM {citar_identificador(tabla)}")
+    encabezado = [descripcion[0] for descripcion in cursor.description]
+
+    libro = Workbook(write_only=True)
+    hoja = None
+    filas_en_hoja = max_filas_hoja  # Fuerza la creación de la primera hoja
+    filas = 0
+    ultimo_progreso = inicio
+    try:
+        while True:
+            lote = cursor.fetchmany(tamano_lote)
+            if not lote and hoja is not None:
+                break
+            if hoja is None and not lote:
+                # Tabla vacía: solo el encabezado
+                libro.create_sheet("Sheet1").append(encabezado)
+                break
+            for fila in lote:
+                if filas_en_hoja >= max_filas_hoja:
+                    hoja = libro.create_sheet(f"Sheet{len(libro.worksheets) + 1}")
+                    hoja.append(encabezado)
+                    filas_en_hoja = 1
+                hoja.append(fila)
+                filas_en_hoja += 1
+            filas += len(lote)
+
+            ahora = time.perf_counter()
+            if al_progresar is not None and ahora - ultimo_progreso >= INTERVALO_PROGRESO_S:
+                al_progresar(filas, ahora - inicio)
+                ultimo_progreso = ahora
+        libro.save(ruta_salida)
+    finally:
+        cursor.close()
+
+    segundos = time.perf_counter() - inicio
+    if al_progresar is not None:
+        al_progresar(filas, segundos)
+    return {'filas': filas, 'hojas': len(libro.worksheets), 'segundos': segundos}
+
+
+def copiar_base_datos(ruta_origen, ruta_destino, compactar=False, paginas_por_paso=PAGINAS_POR_PASO_COPIA,
+                      al_progresar=None):
+    """
+    Hace una copia consistente de una base de datos SQLite aunque otra conexión la esté leyendo o escribiendo.
+    - Por defecto usa la API de copia en línea (Connection.backup) por pasos de paginas_por_paso páginas.
+      La conexión de origen mantiene una transacción de lectura durante toda la copia: todos los pasos
+      leen la misma foto de la base de datos y la copia no se reinicia aunque otra conexión escriba
+      (en modo WAL los escritores siguen trabajando; en modo rollback esperan a que termine la copia).
+    - Con compactar=True usa VACUUM INTO, que además deja la copia sin páginas libres.
+    - al_progresar: función llamada con (paginas_copiadas, paginas_totales) durante la copia.
+    La copia se escribe en un archivo temporal junto al destino y se renombra al terminar.
+    Devuelve un diccionario con 'bytes' (tamaño de la copia) y 'segundos'.
+    """
+    inicio = time.perf_counter()
+    ruta_temporal = ruta_destino + '.tmp'
+    if os.path.exists(ruta_temporal):
+        os.remove(ruta_temporal)
+
+    origen = sqlite3.connect(f"file:{ruta_origen}?mode=ro", uri=True)
+    try:
+        if compactar:
+            origen.execute("VACUUM INTO ?", (ruta_temporal,))
+        else:
+            ultimo_progreso = [0.0]
+
+            def progreso(estado, restantes, totales):
+                ahora = time.perf_counter()
+                if al_progresar is not None and (restantes == 0 or ahora - ultimo_progreso[0] >= INTERVALO_PROGRESO_S):
+                    al_progresar(totales - restantes, totales)
+                    ultimo_progreso[0] = ahora
+
+            destino = sqlite3.connect(ruta_temporal)
+            try:
+                origen.execute("BEGIN")
+                origen.execute("SELECT count(*) FROM sqlite_master").fetchone()  # Fija la foto de lectura
+                origen.backup(destino, pages=paginas_por_paso, progress=progreso)
+                origen.rollback()
+            finally:
+                destino.close()
+        os.replace(ruta_temporal, ruta_destino)
+    except BaseException:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        raise
+    finally:
+        origen.close()
+
+    return {'bytes': os.path.getsize(ruta_destino), 'segundos': time.perf_counter() - inicio}
@@ -0,0 +1,143 @@
+import os
+import sqlite3
+
+from visor_datos import citar_identificador, firma_base_datos
+
+# --- Conexiones de solo lectura y caché de esquema para la pestaña "Visualizar DB" ---
+# Cada base de datos se abre una sola vez en modo solo lectura y la conexión se reutiliza al cambiar
+# de base de datos o de tabla. La lista de tablas, las columnas y los conteos de filas se guardan
+# junto a la firma del archivo (mtime y tamaño, también del -wal) y solo se vuelven a consultar
+# cuando el archivo cambia. Los ETL recargan sus bases de datos en modo WAL dentro de una transacción,
+# así que la conexión no se bloquea mientras tanto y al terminar ve los datos nuevos. Si el archivo
+# fue reemplazado (borrado o copiado encima) se reabre la conexión, que seguiría leyendo el anterior.
+# Las conexiones son del hilo principal de Tk: los hilos de exportación abren las suyas.
+
+# Tablas de datos: sin las internas de SQLite ni las virtuales y sus tablas sombra, que SQLite nombra
+# '<tabla virtual><sufijo>' (p. ej. ubicacion_rtree_node). Solo se ocultan los sufijos que usan los módulos
+# rtree y fts3/4/5: una tabla real como '<tabla virtual>_historico' sí se lista. Se arma con sqlite_master
+# y no con PRAGMA table_list porque este no existe antes de SQLite 3.37 (y un PRAGMA desconocido no da error)
+SUFIJOS_TABLAS_SOMBRA = (
+    '_node', '_parent', '_rowid',                                   # rtree
+    '_data', '_idx', '_content', '_docsize', '_config',             # fts5
+    '_segments', '_segdir', '_stat',                                # fts3/fts4
+)
+CONSULTA_TABLAS_DATOS = f"""
+    WITH sufijos(sufijo) AS (VALUES {', '.join(f"('{sufijo}')" for sufijo in SUFIJOS_TABLAS_SOMBRA)}),
+    virtuales(nombre) AS (
+        SELECT lower(name) FROM sqlite_master
+        WHERE type = 'table' AND upper(sql) LIKE 'CREATE VIRTUAL TABLE%')
+    SELECT t.name FROM sqlite_master t
+    WHERE t.type = 'table' AND lower(substr(t.name, 1, 7)) <> 'sqlite_'
+      AND lower(t.name) NOT IN (SELECT nombre FROM virtuales)
+      AND lower(t.name) NOT IN (SELECT v.nombre || s.sufijo FROM virtuales v, sufijos s)
+"""
+
+class GestorConexiones:
+    """
+    Conexiones de solo lectura (URI mode=ro) por base de datos, con caché de metadatos
+    invalidada por la firma del archivo.
+    """
+
+    def __init__(self):
+        self._entradas = {}     # ruta absoluta -> dict(firma, inodo, conn, tablas, columnas, conteos)
+        self._listados = {}     # (directorio, extension) -> (mtime_ns del directorio, archivos)
+
+    def _entrada(self, ruta_db):
+        """
+        Devuelve la entrada de caché de la base de datos, descartándola si el archivo cambió.
+        """
+        ruta_db = os.path.abspath(ruta_db)
+        firma = firma_base_datos(ruta_db)
+        inodo = os.stat(ruta_db).st_ino
+        entrada = self._entradas.get(ruta_db)
+        if entrada is not None and entrada['inodo'] != inodo:
+            # Archivo reemplazado: la conexión abierta seguiría viendo el archivo anterior
+            self.cerrar(ruta_db)
+            entrada = None
+        if entrada is None:
+            entrada = {
+                'inodo': inodo,
+                'conn': sqlite3.connect(f"file:{ruta_db}?mode=ro", uri=True),
+            }
+            self._entradas[ruta_db] = entrada
+        if entrada.get('firma') != firma:
+            # Archivo nuevo o modificado: la conexión sirve (ve los cambios), los metadatos no
+            entrada.update(firma=firma, tablas=None, columnas={}, conteos={})
+        return entrada
+
+    def conexion(self, ruta_db):
+        """
+        Conexión de solo lectura a la base de datos (siempre la misma mientras el archivo no cambie).
+        """
+        return self._entrada(ruta_db)['conn']
+
+    def tablas(self, ruta_db):
+        """
+        Nombres de las tablas de datos de la base de datos. No incluye las internas de SQLite (sqlite_%)
+        ni las tablas virtuales (p. ej. el índice R*Tree de ubicaciones) con sus tablas sombra.
+        """
+        entrada = self._entrada(ruta_db)
+        if entrada['tablas'] is None:
+            entrada['tablas'] = [fila[0] for fila in entrada['conn'].execute(CONSULTA_TABLAS_DATOS)]
+        return list(entrada['tablas'])
+
+    def columnas(self, ruta_db, tabla):
+        """
+        Columnas de la tabla como lista de (nombre, tipo declarado).
+        """
+        entrada = self._entrada(ruta_db)
+        if tabla not in entrada['columnas']:
+            entrada['columnas'][tabla] = [(fila[1], fila[2] or '') for fila in entrada['conn'].execute(
+                f"PRAGMA table_info({citar_identificador(tabla)})")]
+        return list(entrada['columnas'][tabla])
+
+    def conteo_filas(self, ruta_db, tabla):
+        """
+        Número de filas de la tabla (COUNT(*) una sola vez por versión del archivo).
+        """
+        entrada = self._entrada(ruta_db)
+        if tabla not in entrada['conteos']:
+            entrada['conteos'][tabla] = entrada['conn'].execute(
+                f"SELECT COUNT(*) FROM {citar_identificador(tabla)}").fetchone()[0]
+        return entrada['conteos'][tabla]
+
+    def tiene_filas(self, ruta_db, tabla):
+        """
+        Indica si la tabla tiene al menos una fila. Usa el conteo cacheado si ya se calculó y, si no,
+        SELECT EXISTS, que se detiene en la primera fila: no recorre la tabla en el hilo de Tk.
+        """
+        entrada = self._entrada(ruta_db)
+        if tabla in entrada['conteos']:
+            return entrada['conteos'][tabla] > 0
+        return bool(entrada['conn'].execute(
+            f"SELECT EXISTS(SELECT 1 FROM {citar_identificador(tabla)})").fetchone()[0])
+
+    def firma(self, ruta_db):
+        """
+        Firma con la que están cacheados los metadatos de la base de datos (la abre si hace falta).
+        """
+        return self._entrada(ruta_db)['firma']
+
+    def archivos(self, directorio='.', extension='.db'):
+        """
+        Archivos del directorio con la extensión dada. Solo se vuelve a listar el directorio
+        si cambió su fecha de modificación (se agregó, borró o renombró algún archivo).
+        """
+        clave = (os.path.abspath(directorio), extension)
+        mtime = os.stat(directorio).st_mtime_ns
+        listado = self._listados.get(clave)
+        if listado is None or listado[0] != mtime:
+            listado = (mtime, sorted(f for f in os.listdir(directorio) if f.endswith(extension)))
+            self._listados[clave] = listado
+        return list(listado[1])
+
+    def cerrar(self, ruta_db=None):
+        """
+        Cierra la conexión de una base de datos (o de todas si ruta_db es None) y olvida sus metadatos.
+        Se usa al cerrar la aplicación.
+        """
+        rutas = list(self._entradas) if ruta_db is None else [os.path.abspath(ruta_db)]
+        for ruta in rutas:
+            entrada = self._entradas.pop(ruta, None)
+            if entrada is not None:
+                entrada['conn'].close()
@@ -0,0 +1,364 @@
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from etl_ubicacion import DATABASE_NAME_UBICACION, NORMALIZED_TABLE_UBICACION
+from visor_datos import firma_base_datos
+
+# --- Índice espacial en memoria sobre ubicacion_norm ---
+# Los lugares se agrupan en celdas de una grilla lat/lon. Los arrays de NumPy se ordenan por celda,
+# de modo que cada fila de celdas es un tramo contiguo que se encuentra con searchsorted.
+# Las distancias se refinan con haversine vectorizado sobre los candidatos.
+# Las consultas por lotes arman a la vez los pares (consulta, candidato) de todas las consultas de un tramo
+# y calculan sus distancias con una sola llamada, sin un bucle de Python por consulta.
+
+RADIO_TIERRA_KM = 6371.0088
+# Tamaño de cada celda de la grilla en grados
+TAMANO_CELDA_GRADOS = 0.5
+# Consultas que se resuelven juntas en las consultas por lotes (acota la memoria de los pares consulta-candidato)
+TAMANO_TRAMO_CONSULTAS = 4096
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Distancia en kilómetros sobre la esfera entre dos puntos (o arrays de puntos) en grados.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _posiciones_en_grupos(tamanos):
+    """
+    Para grupos consecutivos de los tamaños dados, la posición de cada elemento dentro de su grupo.
+    """
+    inicios = np.cumsum(tamanos) - tamanos
+    return np.arange(int(tamanos.sum())) - np.repeat(inicios, tamanos)
+
+
+class IndiceEspacialUbicacion:
+    """
+    Índice en memoria para consultas de vecinos más cercanos y por radio sobre los lugares de ubicacion_norm.
+    Se construye la primera vez que se consulta y se reconstruye solo cuando cambia el archivo de la base de datos.
+    """
+
+    def __init__(self, database_name=DATABASE_NAME_UBICACION, tamano_celda=TAMANO_CELDA_GRADOS):
+        self.database_name = database_name
+        self.tamano_celda = tamano_celda
+        self.filas_grilla = int(math.ceil(180.0 / tamano_celda))
+        self.columnas_grilla = int(math.ceil(360.0 / tamano_celda))
+        self._firma = None
+        self.ids = np.empty(0, dtype=np.int64)
+        self.nombres = np.empty(0, dtype=object)
+        self.lat = np.empty(0)
+        self.lon = np.empty(0)
+        self._claves = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        self._asegurar_actualizado()
+        return len(self.ids)
+
+    # --- Construcción ---
+    def _asegurar_actualizado(self):
+        """
+        Reconstruye el índice si el archivo de la base de datos cambió desde la última carga.
+        """
+        if not os.path.exists(self.database_name):
+            raise FileNotFoundError(f"No existe la base de datos '{self.database_name}'.")
+        firma = firma_base_datos(self.database_name)
+        if firma != self._firma:
+            self.reconstruir()
+            self._firma = firma
+
+    def reconstruir(self):
+        """
+        Lee los lugares con coordenadas válidas y arma la grilla ordenada por celda.
+        """
+        conn = sqlite3.connect(f"file:{self.database_name}?mode=ro", uri=True)
+        try:
+            filas = conn.execute(
+                f"SELECT id, Nombre, lat, lon FROM {NORMALIZED_TABLE_UBICACION} "
+                "WHERE lat IS NOT NULL AND lon IS NOT NULL"
+            ).fetchall()
+        finally:
+            conn.close()
+
+        ids = np.fromiter((fila[0] for fila in filas), dtype=np.int64, count=len(filas))
+        nombres = np.array([fila[1] for fila in filas], dtype=object)
+        lat = np.fromiter((fila[2] for fila in filas), dtype=np.float64, count=len(filas))
+        lon = np.fromiter((fila[3] for fila in filas), dtype=np.float64, count=len(filas))
+
+        claves = self._clave_celda(self._fila_celda(lat), self._columna_celda(lon))
+        orden = np.argsort(claves, kind='stable')
+        self.ids = ids[orden]
+        self.nombres = nombres[orden]
+        self.lat = lat[orden]
+        self.lon = lon[orden]
+        self._claves = claves[orden]
+
+    def _fila_celda(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90.0) / self.tamano_celda).astype(np.int64), 0, self.filas_grilla - 1)
+
+    def _columna_celda(self, lon):
+        return np.floor((np.asarray(lon) + 180.0) / self.tamano_celda).astype(np.int64) % self.columnas_grilla
+
+    def _clave_celda(self, fila, columna):
+        return fila * self.columnas_grilla + columna
+
+    # --- Búsqueda de candidatos ---
+    def _candidatos(self, lat, lon, radio_km):
+        """
+        Devuelve las posiciones de los lugares en las celdas que cubren el círculo de radio_km alrededor del punto.
+        """
+        angulo = radio_km / RADIO_TIERRA_KM
+        if angulo >= math.pi:
+            return np.arange(len(self.ids))
+        dlat = math.degrees(angulo)
+        lat_min, lat_max = lat - dlat, lat + dlat
+        cos_lat = math.cos(math.radians(lat))
+        if lat_min <= -90.0 or lat_max >= 90.0 or math.sin(angulo) >= cos_lat:
+            # El círculo toca un polo: se recorren todas las longitudes
+            columnas = [(0, self.columnas_grilla - 1)]
+        else:
+            dlon = math.degrees(math.asin(math.sin(angulo) / cos_lat))
+            col_min = int(self._columna_celda(lon - dlon))
+            col_max = int(self._columna_celda(lon + dlon))
+            if dlon >= 180.0:
+                columnas = [(0, self.columnas_grilla - 1)]
+            elif col_min <= col_max:
+                columnas = [(col_min, col_max)]
+            else:
+                # Cruza el antimeridiano
+                columnas = [(col_min, self.columnas_grilla - 1), (0, col_max)]
+
+        fila_min = int(self._fila_celda(max(lat_min, -90.0)))
+        fila_max = int(self._fila_celda(min(lat_max, 90.0)))
+        tramos = []
+        for fila in range(fila_min, fila_max + 1):
+            for col_min, col_max in columnas:
+                inicio = np.searchsorted(self._claves, self._clave_celda(fila, col_min), side='left')
+                fin = np.searchsorted(self._claves, self._clave_celda(fila, col_max), side='right')
+                if fin > inicio:
+                    tramos.append(np.arange(inicio, fin))
+        if not tramos:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(tramos)
+
+    def _resultado(self, posiciones, distancias):
+        return [(int(self.ids[p]), self.nombres[p], float(d)) for p, d in zip(posiciones, distancias)]
+
+    # --- Consultas ---
+    def _en_radio(self, lat, lon, radio_km):
+        candidatos = self._candidatos(lat, lon, radio_km)
+        distancias = haversine_km(lat, lon, self.lat[candidatos], self.lon[candidatos])
+        dentro = distancias <= radio_km
+        candidatos, distancias = candidatos[dentro], distancias[dentro]
+        orden = np.argsort(distancias, kind='stable')
+        return self._resultado(candidatos[orden], distancias[orden])
+
+    def _vecinos_cercanos(self, lat, lon, k):
+        if k <= 0 or len(self.ids) == 0:
+            return []
+        # Se duplica el radio hasta que haya al menos k lugares dentro: esos contienen a los k más cercanos
+        radio_km = self.tamano_celda * 111.0
+        while True:
+            candidatos = self._candidatos(lat, lon, radio_km)
+            distancias = haversine_km(lat, lon, self.lat[candidatos], self.lon[candidatos])
+            dentro = distancias <= radio_km
+            if dentro.sum() >= k or radio_km >= math.pi * RADIO_TIERRA_KM:
+                candidatos, distancias = candidatos[dentro], distancias[dentro]
+                break
+            radio_km *= 2
+        if k < len(distancias):
+            mejores = np.argpartition(distancias, k - 1)[:k]
+            candidatos, distancias = candidatos[mejores], distancias[mejores]
+        orden = np.argsort(distancias, kind='stable')
+        return self._resultado(candidatos[orden], distancias[orden])
+
+    def en_radio(self, lat, lon, radio_km):
+        """
+        Devuelve los lugares a menos de radio_km del punto, ordenados por distancia.
+        Cada resultado es una tupla (id, Nombre, distancia_km).
+        """
+        self._asegurar_actualizado()
+        return self._en_radio(lat, lon, radio_km)
+
+    def vecinos_cercanos(self, lat, lon, k=5):
+        """
+        Devuelve los k lugares más cercanos al punto, ordenados por distancia.
+        Cada resultado es una tupla (id, Nombre, distancia_km).
+        """
+        self._asegurar_actualizado()
+        return self._vecinos_cercanos(lat, lon, k)
+
+    # --- Consultas por lotes ---
+    def _pares_candidatos(self, lats, lons, radios_km):
+        """
+        Versión vectorizada de _candidatos: devuelve dos arrays alineados (consulta, posición) con los
+        lugares de las celdas que cubren el círculo de cada consulta, en el mismo orden que _candidatos.
+        """
+        angulos = radios_km / RADIO_TIERRA_KM
+        dlat = np.degrees(angulos)
+        lat_min, lat_max = lats - dlat, lats + dlat
+        cos_lat = np.cos(np.radians(lats))
+        seno = np.sin(angulos)
+        # El círculo toca un polo (o cubre la esfera): se recorren todas las longitudes
+        completas = (angulos >= math.pi) | (lat_min <= -90.0) | (lat_max >= 90.0) | (seno >= cos_lat)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dlon = np.degrees(np.arcsin(np.where(completas, 0.0, seno / cos_lat)))
+        col_min = np.where(completas, 0, self._columna_celda(lons - dlon))
+        col_max = np.where(completas, self.columnas_grilla - 1, self._columna_celda(lons + dlon))
+        # Cruza el antimeridiano: dos tramos de columnas por fila
+        cruza = col_min > col_max
+        fila_min = self._fila_celda(np.maximum(lat_min, -90.0))
+        fila_max = self._fila_celda(np.minimum(lat_max, 90.0))
+
+        # Un tramo de columnas por (consulta, fila), más el segundo tramo de las que cruzan
+        filas_por_consulta = fila_max - fila_min + 1
+        consulta = np.repeat(np.arange(len(lats)), filas_por_consulta)
+        fila = fila_min[consulta] + _posiciones_en_grupos(filas_por_consulta)
+        segundo = cruza[consulta]
+        tramo_consulta = np.concatenate([consulta, consulta[segundo]])
+        tramo_fila = np.concatenate([fila, fila[segundo]])
+        tramo_desde = np.concatenate([col_min[consulta], np.zeros(int(segundo.sum()), dtype=np.int64)])
+        tramo_hasta = np.concatenate([np.where(segundo, self.columnas_grilla - 1, col_max[consulta]),
+                                      col_max[consulta][segundo]])
+        orden = np.lexsort((np.repeat([0, 1], [len(consulta), int(segundo.sum())]), tramo_fila, tramo_consulta))
+        tramo_consulta, tramo_fila = tramo_consulta[orden], tramo_fila[orden]
+        inicio = np.searchsorted(self._claves, self._clave_celda(tramo_fila, tramo_desde[orden]), side='left')
+        fin = np.searchsorted(self._claves, self._clave_celda(tramo_fila, tramo_hasta[orden]), side='right')
+        largos = fin - inicio
+        return np.repeat(tramo_consulta, largos), np.repeat(inicio, largos) + _posiciones_en_grupos(largos)
+
+    def _pares_en_radio(self, lats, lons, radios_km):
+        """
+        Pares (consulta, posición, distancia) de los lugares a menos del radio de cada consulta,
+        ordenados por consulta y luego por distancia.
+        """
+        consulta, posiciones = self._pares_candidatos(lats, lons, radios_km)
+        distancias = haversine_km(lats[consulta], lons[consulta], self.lat[posiciones], self.lon[posiciones])
+        dentro = distancias <= radios_km[consulta]
+        consulta, posiciones, distancias = consulta[dentro], posiciones[dentro], distancias[dentro]
+        orden = np.lexsort((distancias, consulta))
+        return consulta[orden], posiciones[orden], distancias[orden]
+
+    def _resultados_por_consulta(self, consulta, posiciones, distancias, n_consultas):
+        """
+        Separa pares ordenados por consulta en una lista de resultados (id, Nombre, distancia_km) por consulta.
+        """
+        filas = list(zip(self.ids[posiciones].tolist(), self.nombres[posiciones].tolist(), distancias.tolist()))
+        fines = np.cumsum(np.bincount(consulta, minlength=n_consultas)).tolist()
+        return [filas[inicio:fin] for inicio, fin in zip([0] + fines[:-1], fines)]
+
+    def _en_radio_tramo(self, lats, lons, radio_km):
+        consulta, posiciones, distancias = self._pares_en_radio(lats, lons, np.full(len(lats), float(radio_km)))
+        return self._resultados_por_consulta(consulta, posiciones, distancias, len(lats))
+
+    def _vecinos_cercanos_tramo(self, lats, lons, k):
+        # Como en _vecinos_cercanos, pero el radio se duplica solo para las consultas que aún no tienen k lugares
+        radios_km = np.full(len(lats), self.tamano_celda * 111.0)
+        pendientes = np.arange(len(lats))
+        partes = []
+        while len(pendientes):
+            consulta, posiciones, distancias = self._pares_en_radio(lats[pendientes], lons[pendientes],
+                                                                    radios_km[pendientes])
+            cantidades = np.bincount(consulta, minlength=len(pendientes))
+            resueltas = (cantidades >= k) | (radios_km[pendientes] >= math.pi * RADIO_TIERRA_KM)
+            # Los pares ya están ordenados por distancia dentro de cada consulta: se toman los k primeros
+            elegidos = resueltas[consulta] & (_posiciones_en_grupos(cantidades) < k)
+            partes.append((pendientes[consulta[elegidos]], posiciones[elegidos], distancias[elegidos]))
+            pendientes = pendientes[~resueltas]
+            radios_km[pendientes] *= 2
+        consulta, posiciones, distancias = (np.concatenate(columna) for columna in zip(*partes))
+        orden = np.argsort(consulta, kind='stable')
+        return self._resultados_por_consulta(consulta[orden], posiciones[orden], distancias[orden], len(lats))
+
+    def _por_tramos(self, consulta_tramo, lats, lons, *args):
+        lats = np.asarray(lats, dtype=np.float64).ravel()
+        lons = np.asarray(lons, dtype=np.float64).ravel()
+        resultados = []
+        for inicio in range(0, len(lats), TAMANO_TRAMO_CONSULTAS):
+            fin = inicio + TAMANO_TRAMO_CONSULTAS
+            resultados.extend(consulta_tramo(lats[inicio:fin], lons[inicio:fin], *args))
+        return resultados
+
+    def en_radio_lote(self, lats, lons, radio_km):
+        """
+        Versión por lotes de en_radio: una lista de resultados por cada punto (lats[i], lons[i]).
+        Las consultas se resuelven vectorizadas, de a TAMANO_TRAMO_CONSULTAS a la vez.
+        """
+        self._asegurar_actualizado()
+        return self._por_tramos(self._en_radio_tramo, lats, lons, radio_km)
+
+    def vecinos_cercanos_lote(self, lats, lons, k=5):
+        """
+        Versión por lotes de vecinos_cercanos: una lista de resultados por cada punto (lats[i], lons[i]).
+        Las consultas se resuelven vectorizadas, de a TAMANO_TRAMO_CONSULTAS a la vez.
+        """
+        self._asegurar_actualizado()
+        if k <= 0 or len(self.ids) == 0:
+            return [[] for _ in range(len(lats))]
+        return self._por_tramos(self._vecinos_cercanos_tramo, lats, lons, k)
+
+def benchmark(n_lugares=1_000_000, n_consultas=5_000, k=10, radio_km=25.0, semilla=42):
+    """
+    Mide el rendimiento del índice con lugares aleatorios en una base de datos temporal
+    y verifica una muestra de resultados contra la búsqueda por fuerza bruta.
+    """
+    rng = np.random.default_rng(semilla)
+    # Latitudes uniformes sobre la esfera
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, n_lugares)))
+    lon = rng.uniform(-180, 180, n_lugares)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'benchmark_ubicacion.db')
+        conn = sqlite3.connect(ruta)
+        conn.execute(f"CREATE TABLE {NORMALIZED_TABLE_UBICACION} (id INTEGER PRIMARY KEY, Nombre TEXT, lat REAL, lon REAL)")
+        conn.executemany(f"INSERT INTO {NORMALIZED_TABLE_UBICACION} VALUES (?, ?, ?, ?)",
+                         ((i + 1, f"LUGAR {i + 1}", float(lat[i]), float(lon[i])) for i in range(n_lugares)))
+        conn.commit()
+        conn.close()
+
+        indice = IndiceEspacialUbicacion(ruta)
+        inicio = time.perf_counter()
+        print(f"Lugares indexados: {len(indice)} en {time.perf_counter() - inicio:.2f} s")
+
+        consultas_lat = np.degrees(np.arcsin(rng.uniform(-1, 1, n_consultas)))
+        consultas_lon = rng.uniform(-180, 180, n_consultas)
+
+        inicio = time.perf_counter()
+        vecinos = indice.vecinos_cercanos_lote(consultas_lat, consultas_lon, k)
+        duracion = time.perf_counter() - inicio
+        print(f"k={k} vecinos: {n_consultas} consultas en {duracion:.2f} s ({n_consultas / duracion:,.0f} consultas/s)")
+
+        inicio = time.perf_counter()
+        en_radio = indice.en_radio_lote(consultas_lat, consultas_lon, radio_km)
+        duracion = time.perf_counter() - inicio
+        encontrados = sum(len(r) for r in en_radio)
+        print(f"Radio {radio_km} km: {n_consultas} consultas en {duracion:.2f} s "
+              f"({n_consultas / duracion:,.0f} consultas/s, {encontrados} lugares encontrados)")
+
+        # Verificación contra fuerza bruta sobre una muestra
+        for i in range(min(20, n_consultas)):
+            distancias = haversine_km(consultas_lat[i], consultas_lon[i], lat, lon)
+            esperados = set((np.argsort(distancias)[:k] + 1).tolist())
+            assert {r[0] for r in vecinos[i]} == esperados, "Vecinos distintos a la fuerza bruta"
+            assert {r[0] for r in en_radio[i]} == set((np.flatnonzero(distancias <= radio_km) + 1).tolist())
+        print("✅ Resultados verificados contra la búsqueda por fuerza bruta.")
+
+
+# Demostración: lugares cercanos a la Torre Eiffel, o benchmark con --benchmark
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        indice = IndiceEspacialUbicacion()
+        print(f"Lugares indexados: {len(indice)}")
+        for lugar in indice.vecinos_cercanos(48.8584, 2.2945, k=5):
+            print(lugar)
+        for lugar in indice.en_radio(48.8584, 2.2945, 10.0):
+            print(lugar)
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from visor_datos import PREFIJO_INDICE_VISOR, citar_identificador
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# --- Manifiesto de la última ejecución de cada ETL (para no repetir cargas que no cambiarían nada) ---
+# Al terminar bien, ejecutar_etl.py guarda en manifiesto_<etl>.json la huella de lo que se usó:
+#  - cada archivo de entrada: tamaño, fecha de modificación y hash del contenido,
+#  - la versión del código (hash de los .py del ETL) y las opciones de la ejecución,
+#  - la base de datos resultante: tamaño, fecha y hash de sus archivos, y un hash de su contenido
+#    (esquema y filas de cada tabla, sin los índices idx_visor_* que crea el visor al ordenar).
+# Si en la siguiente ejecución todo coincide y la base de datos sigue como quedó, el ETL no se vuelve
+# a ejecutar (ni siquiera se importa pandas); con forzar (--forzar o el interruptor de la interfaz) sí.
+# El hash es xxh3 si está instalado xxhash (mucho más rápido) y si no blake2b. Solo se calcula si el
+# tamaño o la fecha de un archivo cambiaron: si no, se reutiliza el del manifiesto.
+# Si los archivos de la base de datos cambiaron se compara el hash del contenido: así un índice de orden
+# del visor (visor_datos.crear_indice_orden), que se escribe en el mismo archivo, no obliga a recargar.
+# Ese hash lee todas las filas, por eso solo se calcula al guardar el manifiesto y cuando los archivos difieren.
+# Las versiones de las librerías (pandas, etc.) no forman parte de la huella: tras actualizarlas, forzar.
+
+VERSION_MANIFIESTO = 2
+# Datos de cada ETL: archivos de entrada, base de datos que genera y archivos de código de los que depende
+ETLS = {
+    'ciudades': {
+        'entradas': ('datos.txt',),
+        'salida': 'ciudades.db',
+        'codigo': ('etl_ciudades.py', 'normalizacion.py', 'reconstruccion_db.py'),
+    },
+    'famosos': {
+        'entradas': ('DATOS2.txt',),
+        'salida': 'datos_famosos.db',
+        'codigo': ('etl_famosos.py', 'normalizacion.py', 'reconstruccion_db.py'),
+    },
+    'ubicacion': {
+        'entradas': ('DATOS3.txt',),
+        'salida': 'datos_ubicacion.db',
+        'codigo': ('etl_ubicacion.py', 'normalizacion.py', 'dedup_espacial_ubicacion.py', 'reconstruccion_db.py'),
+    },
+}
+DIRECTORIO_CODIGO = os.path.dirname(os.path.abspath(__file__))
+# Bytes que se leen de una vez al calcular el hash de un archivo
+TAMANO_BLOQUE_HASH = 1024 * 1024
+# Segundos que se espera a otro escritor al consolidar el WAL de la base de datos de salida
+ESPERA_CHECKPOINT_S = 30
+# Filas que se leen de una vez al calcular el hash del contenido de la base de datos de salida
+TAMANO_LOTE_CONTENIDO = 10_000
+
+
+def ruta_manifiesto(etl):
+    return f"manifiesto_{etl}.json"
+
+
+def algoritmo_hash():
+    return 'xxh3_64' if xxhash is not None else 'blake2b'
+
+
+def _nuevo_resumen():
+    return xxhash.xxh3_64() if xxhash is not None else hashlib.blake2b(digest_size=16)
+
+
+def hash_archivo(ruta):
+    """
+    Hash del contenido de un archivo leído por bloques (no se carga entero en memoria).
+    """
+    resumen = _nuevo_resumen()
+    with open(ruta, 'rb') as archivo:
+        while bloque := archivo.read(TAMANO_BLOQUE_HASH):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+def huella_archivo(ruta, anterior=None):
+    """
+    Tamaño, fecha de modificación (ns) y hash de un archivo, o None si no existe.
+    Si 'anterior' (huella previa del mismo archivo) tiene el mismo tamaño, fecha y algoritmo,
+    se reutiliza su hash sin leer el archivo.
+    """
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    huella = {'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns, 'algoritmo': algoritmo_hash()}
+    if anterior and all(anterior.get(clave) == valor for clave, valor in huella.items()):
+        huella['hash'] = anterior['hash']
+    else:
+        huella['hash'] = hash_archivo(ruta)
+    return huella
+
+
+def version_codigo(etl):
+    """
+    Hash de los archivos de código del ETL: cambia si se modifica cualquiera de ellos.
+    """
+    resumen = hashlib.blake2b(digest_size=16)
+    for nombre in ETLS[etl]['codigo']:
+        resumen.update(nombre.encode('utf-8'))
+        with open(os.path.join(DIRECTORIO_CODIGO, nombre), 'rb') as archivo:
+            resumen.update(archivo.read())
+    return resumen.hexdigest()
+
+
+def leer_manifiesto(etl):
+    """
+    Manifiesto de la última ejecución correcta del ETL, o None si no hay uno válido.
+    """
+    try:
+        with open(ruta_manifiesto(etl), encoding='utf-8') as archivo:
+            manifiesto = json.load(archivo)
+    except (OSError, ValueError):
+        return None
+    if manifiesto.get('version') != VERSION_MANIFIESTO or manifiesto.get('etl') != etl:
+        return None
+    return manifiesto
+
+
+def huella_ejecucion(etl, opciones=None, anterior=None):
+    """
+    Huella de una ejecución antes de empezarla: entradas, versión del código y opciones.
+    'anterior' es el manifiesto previo (para reutilizar los hashes de los archivos que no cambiaron).
+    """
+    entradas_anteriores = (anterior or {}).get('entradas', {})
+    return {
+        'version': VERSION_MANIFIESTO,
+        'etl': etl,
+        # Ida y vuelta por JSON para comparar igual que lo que se lee del manifiesto (tuplas -> listas)
+        'opciones': json.loads(json.dumps(opciones or {}, sort_keys=True)),
+        'codigo': version_codigo(etl),
+        'entradas': {nombre: huella_archivo(nombre, entradas_anteriores.get(nombre))
+                     for nombre in ETLS[etl]['entradas']},
+    }
+
+
+def _archivos_salida(etl):
+    salida = ETLS[etl]['salida']
+    # En modo WAL los cambios confirmados pueden estar todavía en el archivo -wal
+    return (salida, salida + '-wal')
+
+
+def huella_salida(etl, anterior=None):
+    """
+    Huella de los archivos de la base de datos de salida (sin los que no existen o están vacíos).
+    """
+    anterior = anterior or {}
+    huellas = {}
+    for ruta in _archivos_salida(etl):
+        huella = huella_archivo(ruta, anterior.get(ruta))
+        if huella is not None and huella['tamano'] > 0:
+            huellas[ruta] = huella
+    return huellas
+
+
+def huella_contenido_salida(etl):
+    """
+    Hash del esquema y de las filas de la base de datos de salida, sin los índices que crea el visor.
+    Las tablas virtuales solo aportan su esquema: sus datos están en sus tablas internas, que sí se leen.
+    """
+    resumen = _nuevo_resumen()
+    conn = sqlite3.connect(f"file:{ETLS[etl]['salida']}?mode=ro", uri=True)
+    try:
+        esquema = [fila for fila in conn.execute("SELECT type, name, tbl_name, sql FROM sqlite_master ORDER BY type, name")
+                   if not fila[1].startswith(PREFIJO_INDICE_VISOR)]
+        for tipo, nombre, _, sql in esquema:
+            resumen.update(repr((tipo, nombre, sql)).encode('utf-8'))
+            if tipo != 'table' or (sql or '').upper().startswith('CREATE VIRTUAL'):
+                continue
+            orden = '' if 'WITHOUT ROWID' in (sql or '').upper() else ' ORDER BY rowid'
+            cursor = conn.execute(f"SELECT * FROM {citar_identificador(nombre)}{orden}")
+            while filas := cursor.fetchmany(TAMANO_LOTE_CONTENIDO):
+                resumen.update(repr(filas).encode('utf-8'))
+    finally:
+        conn.close()
+    return {'algoritmo': algoritmo_hash(), 'hash': resumen.hexdigest()}
+
+
+def _hashes(huellas):
+    return {ruta: huella['hash'] for ruta, huella in huellas.items()}
+
+
+def motivo_para_ejecutar(huella, anterior):
+    """
+    Por qué hay que volver a ejecutar el ETL, o None si nada cambió desde la última ejecución.
+    """
+    if anterior is None:
+        return "no hay registro de una ejecución anterior"
+    if huella['codigo'] != anterior['codigo']:
+        return "cambió el código del ETL"
+    if huella['opciones'] != anterior['opciones']:
+        return "cambiaron las opciones de la ejecución"
+    for nombre, entrada in huella['entradas'].items():
+        previa = anterior['entradas'].get(nombre)
+        if entrada is None or previa is None:
+            return f"falta el archivo de entrada '{nombre}'"
+        if (entrada['hash'], entrada['algoritmo']) != (previa['hash'], previa['algoritmo']):
+            return f"cambió el archivo de entrada '{nombre}'"
+    salida_anterior = anterior['salida']
+    salida = huella_salida(huella['etl'], salida_anterior)
+    if not salida:
+        return f"falta la base de datos '{ETLS[huella['etl']]['salida']}'"
+    if (_hashes(salida) != _hashes(salida_anterior)
+            and huella_contenido_salida(huella['etl']) != anterior['contenido_salida']):
+        return f"la base de datos '{ETLS[huella['etl']]['salida']}' cambió desde la última carga"
+    return None
+
+
+def guardar_manifiesto(huella):
+    """
+    Completa la huella con la de la base de datos resultante y la guarda como manifiesto del ETL.
+    """
+    etl = huella['etl']
+    # Las entradas que no existían al empezar (el ETL crea un archivo de ejemplo) se toman ahora
+    huella = {**huella, 'entradas': {nombre: entrada or huella_archivo(nombre)
+                                     for nombre, entrada in huella['entradas'].items()}}
+    # Se pasa el WAL a la base de datos para que su huella no dependa de cuándo se haga el checkpoint.
+    # Si hay lectores el WAL puede quedar con datos: también forma parte de la huella
+    conn = sqlite3.connect(ETLS[etl]['salida'], timeout=ESPERA_CHECKPOINT_S)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    manifiesto = {**huella, 'fecha': datetime.now().isoformat(timespec='seconds'), 'salida': huella_salida(etl),
+                  'contenido_salida': huella_contenido_salida(etl)}
+    _escribir_manifiesto(manifiesto)
+    return manifiesto
+
+
+def refrescar_manifiesto(huella, anterior):
+    """
+    Tras omitir una ejecución: si algún archivo cambió de fecha pero no de contenido (p. ej. se copió
+    de nuevo), guarda las fechas nuevas para no volver a calcular su hash la próxima vez. Lo mismo con
+    los archivos de la base de datos que solo cambiaron por un índice del visor: se guarda su hash nuevo.
+    """
+    manifiesto = {**anterior, 'entradas': huella['entradas'], 'salida': huella_salida(huella['etl'], anterior['salida'])}
+    if manifiesto != anterior:
+        _escribir_manifiesto(manifiesto)
+
+
+def _escribir_manifiesto(manifiesto):
+    # Archivo temporal y renombrado: un manifiesto a medio escribir se leería como inexistente
+    ruta = ruta_manifiesto(manifiesto['etl'])
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, indent=2, ensure_ascii=False)
+    os.replace(temporal, ruta)
@@ -0,0 +1,244 @@
+import contextvars
+import functools
+import json
+import os
+import sqlite3
+import time
+import tracemalloc
+from datetime import datetime
+
+from perfilado import marcar_memoria
+
+# --- Métricas por etapa de cada ejecución de un ETL ---
+# Las funciones run_etl_* se decoran con @medir_etl('<etl>') y marcan sus etapas con
+# iniciar_etapa('<etapa>', filas_entrada=n) ... terminar_etapa(filas_salida=m).
+# De cada etapa se registra el tiempo real (perf_counter), el tiempo de CPU del hilo (thread_time),
+# las filas de entrada y salida y, si se pide, el pico de memoria trazada por tracemalloc.
+# tracemalloc hace unas tres veces más lentas las etapas que crean muchos objetos de Python, así que
+# solo se activa con la variable de entorno ETL_MEDIR_MEMORIA=1 (--medir-memoria en ejecutar_etl.py
+# o el interruptor de la interfaz); si no, los campos de memoria quedan en None.
+# Al terminar, la ejecución se guarda como JSON en la tabla 'ejecuciones' de ejecuciones_etl.db
+# y se imprime un resumen. Fuera de una ejecución medida, iniciar_etapa y terminar_etapa no hacen nada.
+
+ARCHIVO_EJECUCIONES = 'ejecuciones_etl.db'
+TABLA_EJECUCIONES = 'ejecuciones'
+# Segundos que se espera si otro ETL está guardando su ejecución al mismo tiempo
+ESPERA_GUARDADO_S = 30
+# Variable de entorno que activa la medición de memoria con tracemalloc
+VARIABLE_MEDIR_MEMORIA = 'ETL_MEDIR_MEMORIA'
+
+# Medición en curso en este contexto (hilo o proceso)
+_medicion_actual = contextvars.ContextVar('medicion_etl', default=None)
+
+
+class MedicionEtl:
+    """
+    Métricas de una ejecución de un ETL. Las etapas son consecutivas: iniciar una etapa
+    termina la anterior si seguía abierta.
+    """
+
+    def __init__(self, etl, medir_memoria=None):
+        self.etl = etl
+        self.medir_memoria = memoria_solicitada() if medir_memoria is None else medir_memoria
+        self.inicio = time.time()
+        self.etapas = []
+        self._etapa_abierta = None
+        self._inicio_real = time.perf_counter()
+        self._inicio_cpu = time.thread_time()
+        # tracemalloc solo se detiene al final si lo inició esta medición
+        self._inicio_tracemalloc = self.medir_memoria and not tracemalloc.is_tracing()
+        if self._inicio_tracemalloc:
+            tracemalloc.start()
+
+    def iniciar_etapa(self, nombre, filas_entrada=None):
+        if self._etapa_abierta is not None:
+            self.terminar_etapa()
+        if self.medir_memoria:
+            tracemalloc.reset_peak()
+        self._etapa_abierta = {
+            'etapa': nombre,
+            'filas_entrada': filas_entrada,
+            '_real': time.perf_counter(),
+            '_cpu': time.thread_time(),
+            '_memoria': tracemalloc.get_traced_memory()[0] if self.medir_memoria else None,
+        }
+
+    def terminar_etapa(self, filas_salida=None, filas_entrada=None):
+        """
+        Cierra la etapa abierta. filas_entrada sirve para etapas que solo las conocen al final (por bloques).
+        """
+        etapa = self._etapa_abierta
+        if etapa is None:
+            return
+        self._etapa_abierta = None
+        actual, pico = tracemalloc.get_traced_memory() if self.medir_memoria else (None, None)
+        self.etapas.append({
+            'etapa': etapa['etapa'],
+            'segundos': time.perf_counter() - etapa['_real'],
+            'cpu_segundos': time.thread_time() - etapa['_cpu'],
+            # Pico de memoria trazada durante la etapa y memoria que la etapa deja reservada al terminar
+            'pico_memoria_bytes': pico,
+            'memoria_retenida_bytes': None if actual is None else actual - etapa['_memoria'],
+            'filas_entrada': etapa['filas_entrada'] if filas_entrada is None else filas_entrada,
+            'filas_salida': filas_salida,
+        })
+        # Si se está perfilando la memoria, el final de cada etapa es un buen momento para mirarla
+        marcar_memoria(etapa['etapa'])
+
+    def finalizar(self, ok):
+        """
+        Cierra la etapa abierta, detiene tracemalloc (si lo inició) y devuelve el registro de la ejecución.
+        """
+        self.terminar_etapa()
+        pico_total = None
+        if self.medir_memoria:
+            pico_total = max([tracemalloc.get_traced_memory()[1]] + [etapa['pico_memoria_bytes'] for etapa in self.etapas])
+        if self._inicio_tracemalloc:
+            tracemalloc.stop()
+        return {
+            'etl': self.etl,
+            'inicio': datetime.fromtimestamp(self.inicio).isoformat(timespec='seconds'),
+            'inicio_epoch': self.inicio,
+            'ok': ok,
+            'segundos': time.perf_counter() - self._inicio_real,
+            'cpu_segundos': time.thread_time() - self._inicio_cpu,
+            'pico_memoria_bytes': pico_total,
+            'etapas': self.etapas,
+        }
+
+
+def memoria_solicitada():
+    """
+    Indica si la variable de entorno ETL_MEDIR_MEMORIA pide medir la memoria.
+    """
+    return os.environ.get(VARIABLE_MEDIR_MEMORIA, '') not in ('', '0')
+
+
+def iniciar_etapa(nombre, filas_entrada=None):
+    medicion = _medicion_actual.get()
+    if medicion is not None:
+        medicion.iniciar_etapa(nombre, filas_entrada)
+
+
+def terminar_etapa(filas_salida=None, filas_entrada=None):
+    medicion = _medicion_actual.get()
+    if medicion is not None:
+        medicion.terminar_etapa(filas_salida, filas_entrada)
+
+
+def medir_etl(etl):
+    """
+    Decorador para las funciones run_etl_*: mide la ejecución completa, la guarda y muestra el resumen.
+    La ejecución es correcta si la función no lanza una excepción ni devuelve False.
+    Si ya hay una medición en curso (una run_etl_* que llama a otra) no se abre otra.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if _medicion_actual.get() is not None:
+                return funcion(*args, **kwargs)
+            medicion = MedicionEtl(etl)
+            token = _medicion_actual.set(medicion)
+            ok = False
+            try:
+                resultado = funcion(*args, **kwargs)
+                ok = resultado is not False
+                return resultado
+            finally:
+                _medicion_actual.reset(token)
+                registro = medicion.finalizar(ok)
+                print(formatear_resumen(registro))
+                try:
+                    guardar_ejecucion(registro)
+                except (sqlite3.Error, OSError) as e:
+                    print(f"⚠️ No se pudieron guardar las métricas en '{ARCHIVO_EJECUCIONES}': {e}")
+        return envoltura
+    return decorador
+
+
+def _conectar(ruta_db):
+    conn = sqlite3.connect(ruta_db, timeout=ESPERA_GUARDADO_S)
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {TABLA_EJECUCIONES} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        etl TEXT,
+        inicio TEXT,
+        ok INTEGER,
+        segundos REAL,
+        registro TEXT
+    )
+    """)
+    return conn
+
+
+def guardar_ejecucion(registro, ruta_db=ARCHIVO_EJECUCIONES):
+    """
+    Agrega el registro de una ejecución (JSON completo en la columna 'registro'). Devuelve su id.
+    """
+    conn = _conectar(ruta_db)
+    try:
+        with conn:
+            cursor = conn.execute(
+                f"INSERT INTO {TABLA_EJECUCIONES} (etl, inicio, ok, segundos, registro) VALUES (?, ?, ?, ?, ?)",
+                (registro['etl'], registro['inicio'], int(registro['ok']), registro['segundos'], json.dumps(registro)))
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def ultima_ejecucion(etl, ruta_db=ARCHIVO_EJECUCIONES):
+    """
+    Registro de la última ejecución guardada del ETL, o None si no hay ninguna.
+    """
+    try:
+        conn = sqlite3.connect(f"file:{ruta_db}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        fila = conn.execute(
+            f"SELECT registro FROM {TABLA_EJECUCIONES} WHERE etl = ? ORDER BY id DESC LIMIT 1", (etl,)).fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    return json.loads(fila[0]) if fila else None
+
+
+def etapa_mas_lenta(registro):
+    """
+    Etapa con más tiempo real del registro, o None si no tiene etapas.
+    """
+    return max(registro['etapas'], key=lambda etapa: etapa['segundos'], default=None)
+
+
+def _mb(cantidad_bytes):
+    return '-' if cantidad_bytes is None else f"{cantidad_bytes / (1024 * 1024):,.1f}"
+
+
+def _filas(cantidad):
+    return '-' if cantidad is None else f"{cantidad:,}"
+
+
+def formatear_resumen(registro):
+    """
+    Tabla de texto con las métricas de cada etapa de una ejecución.
+    """
+    estado = "OK" if registro['ok'] else "CON ERRORES"
+    if registro['pico_memoria_bytes'] is None:
+        memoria = f"memoria no medida ({VARIABLE_MEDIR_MEMORIA}=1 para medirla)"
+    else:
+        memoria = f"pico de memoria {_mb(registro['pico_memoria_bytes'])} MB"
+    lineas = [
+        f"\n📈 Métricas de la ejecución de {registro['etl'].upper()} ({estado}): "
+        f"{registro['segundos']:.2f} s, CPU {registro['cpu_segundos']:.2f} s, {memoria}",
+        f"  {'etapa':<24}{'s':>9}{'CPU s':>9}{'pico MB':>10}{'filas entrada':>15}{'filas salida':>15}",
+    ]
+    for etapa in registro['etapas']:
+        lineas.append(
+            f"  {etapa['etapa']:<24}{etapa['segundos']:>9.2f}{etapa['cpu_segundos']:>9.2f}"
+            f"{_mb(etapa['pico_memoria_bytes']):>10}{_filas(etapa['filas_entrada']):>15}{_filas(etapa['filas_salida']):>15}")
+    mas_lenta = etapa_mas_lenta(registro)
+    if mas_lenta is not None and registro['segundos'] > 0:
+        lineas.append(f"  Etapa más lenta: {mas_lenta['etapa']} "
+                      f"({mas_lenta['segundos'] / registro['segundos']:.0%} del tiempo total)")
+    return '\n'.join(lineas)
@@ -0,0 +1,148 @@
+import functools
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# --- Motor de normalización de texto compartido por los tres ETL ---
+# Los datos reales repiten mucho los mismos valores (países, ciudades, direcciones),
+# así que cada columna se factoriza a sus valores únicos, solo esos se normalizan
+# y el resultado se vuelve a expandir a todas las filas.
+
+# Modos de normalización disponibles
+MODO_CIUDAD = 'ciudad'            # Mayúsculas, sin tildes, espacios colapsados (etl_ciudades)
+MODO_COMPARACION = 'comparacion'  # ASCII, separadores a un espacio, mayúsculas (etl_ubicacion)
+MODO_NOMBRE = 'nombre'            # Sin espacios al borde y en mayúsculas (etl_famosos)
+
+# Cantidad de valores normalizados que se recuerdan entre columnas y bloques
+TAMANO_MEMO = 1 << 18
+
+# Rangos de caracteres precalculados: Latin-1, Latin Extendido A/B y diacríticos combinables.
+# El resto de caracteres no ASCII pasa por unicodedata como antes.
+_RANGOS_TABLA = (range(0x80, 0x250), range(0x300, 0x370))
+
+_ESPACIOS = re.compile(r'\s+')
+_SEPARADORES = re.compile(r'[,\s_-]+')
+
+
+def _sin_combinables(texto):
+    """
+    Descompone el texto (NFKD) y elimina las marcas combinables (tildes, diéresis, etc.).
+    """
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+
+
+def _solo_ascii(texto):
+    """
+    Descompone el texto (NFKD) y descarta todo lo que no sea ASCII.
+    """
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('utf-8')
+
+
+def _construir_tabla(funcion):
+    """
+    Precalcula una tabla para str.translate con el resultado de 'funcion' para cada carácter
+    de los rangos frecuentes. La descomposición NFKD es carácter a carácter, por lo que
+    traducir con la tabla da el mismo resultado que aplicar la función al texto completo.
+    """
+    tabla = {}
+    for rango in _RANGOS_TABLA:
+        for codigo in rango:
+            caracter = chr(codigo)
+            resultado = funcion(caracter)
+            if resultado != caracter:
+                tabla[codigo] = resultado
+    return tabla
+
+
+_TABLA_SIN_ACENTOS = _construir_tabla(_sin_combinables)
+_TABLA_ASCII = _construir_tabla(_solo_ascii)
+
+
+def quitar_acentos(texto):
+    """
+    Elimina tildes y acentos de un texto usando la tabla precalculada.
+    Si no es texto, lo devuelve sin cambios.
+    """
+    if not isinstance(texto, str):
+        return texto
+    traducido = texto.translate(_TABLA_SIN_ACENTOS)
+    if traducido.isascii():
+        return traducido
+    # Caracteres fuera de la tabla (otros alfabetos): descomposición completa
+    return _sin_combinables(traducido)
+
+
+def normalizar_ciudad(texto):
+    """
+    Normaliza un nombre de ciudad o país: mayúsculas, sin tildes, sin espacios al borde
+    y con los espacios internos colapsados a uno solo.
+    """
+    if not isinstance(texto, str):
+        return texto
+    return _ESPACIOS.sub(' ', quitar_acentos(texto.upper()).strip())
+
+
+def normalizar_para_comparacion(texto):
+    """
+    Normaliza una cadena para comparación y uso en la base de datos:
+    quita el BOM y los espacios al borde, la convierte a ASCII sin acentos,
+    reemplaza espacios, comas, guiones y guiones bajos por un solo espacio y la pasa a mayúsculas.
+    Devuelve None si no es texto.
+    """
+    if not isinstance(texto, str):
+        return None
+    limpio = texto.strip().replace('\ufeff', '')
+    ascii_texto = limpio.translate(_TABLA_ASCII)
+    if not ascii_texto.isascii():
+        ascii_texto = _solo_ascii(ascii_texto)
+    return _SEPARADORES.sub(' ', ascii_texto).strip().upper()
+
+
+def normalizar_nombre(texto):
+    """
+    Quita los espacios al borde de un nombre y lo convierte a mayúsculas.
+    """
+    if not isinstance(texto, str):
+        return texto
+    return texto.strip().upper()
+
+
+_FUNCIONES_POR_MODO = {
+    MODO_CIUDAD: normalizar_ciudad,
+    MODO_COMPARACION: normalizar_para_comparacion,
+    MODO_NOMBRE: normalizar_nombre,
+}
+
+
+@functools.lru_cache(maxsize=TAMANO_MEMO)
+def _normalizar_valor(modo, valor):
+    """
+    Normaliza un único valor con memoria LRU compartida entre columnas y bloques.
+    """
+    return _FUNCIONES_POR_MODO[modo](valor)
+
+
+def normalizar_serie(serie, modo):
+    """
+    Normaliza una columna (Series) completa según el modo indicado.
+    Factoriza la columna a sus valores únicos, normaliza solo esos (con memoria LRU)
+    y vuelve a expandir el resultado a todas las filas.
+    Los valores nulos se devuelven como None.
+    """
+    if modo not in _FUNCIONES_POR_MODO:
+        raise ValueError(f"Modo de normalización desconocido: '{modo}'.")
+    codigos, unicos = pd.factorize(serie)
+    # El último elemento es el valor para los nulos (código -1 en pd.factorize)
+    valores = np.empty(len(unicos) + 1, dtype=object)
+    valores[:-1] = [_normalizar_valor(modo, valor) for valor in unicos]
+    valores[-1] = None
+    return pd.Series(valores.take(codigos), index=serie.index, name=serie.name, dtype=object)
+
+
+def estadisticas_memo():
+    """
+    Devuelve las estadísticas de aciertos y fallos de la memoria LRU de normalización.
+    """
+    return _normalizar_valor.cache_info()
@@ -0,0 +1,218 @@
+import contextvars
+import cProfile
+import os
+import pstats
+import re
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- Perfilado opcional de las ejecuciones de los ETL y de las acciones del visor ---
+# Con la variable de entorno ETL_PERFILAR (cpu, memoria o todo; --perfilar en ejecutar_etl.py o el
+# interruptor de la interfaz) cada ejecución se envuelve en perfilar('<nombre>'):
+#  - cpu: cProfile. Se guarda <nombre>_<fecha>.prof en la carpeta 'perfiles' (se abre con pstats,
+#    snakeviz, etc.) y se muestran en el log las 20 funciones con más tiempo acumulado.
+#  - memoria: tracemalloc. Se guarda <nombre>_<fecha>_memoria.txt con las líneas de código que más
+#    memoria tenían reservada en el momento de mayor uso que se observó. Ese momento se busca al final
+#    de cada etapa de los ETL (metricas.py llama a marcar_memoria()) y al terminar.
+# cProfile solo ve el hilo que lo activa y no puede haber dos perfiladores a la vez: si ya hay otro
+# activo, la ejecución sigue sin perfil de CPU.
+
+# Variable de entorno que activa el perfilado: 'cpu', 'memoria' o 'todo' (también '1'); '' o '0' lo desactiva
+VARIABLE_PERFILAR = 'ETL_PERFILAR'
+DIRECTORIO_PERFILES = 'perfiles'
+# Funciones que se muestran en el log y líneas de asignación que se muestran / se guardan en el informe
+FUNCIONES_MOSTRADAS = 20
+ASIGNACIONES_MOSTRADAS = 10
+ASIGNACIONES_EN_INFORME = 50
+# Cuadros de la pila que se guardan por asignación (1 = solo la línea que reservó la memoria)
+CUADROS_TRACEMALLOC = 1
+
+# Sesión de perfilado en curso en este contexto (hilo o proceso)
+_sesion_actual = contextvars.ContextVar('sesion_perfilado', default=None)
+
+
+def modos_solicitados(valor=None):
+    """
+    Conjunto de modos ('cpu', 'memoria') que pide el valor dado o la variable de entorno ETL_PERFILAR.
+    """
+    valor = (os.environ.get(VARIABLE_PERFILAR, '') if valor is None else valor).strip().lower()
+    if valor in ('', '0'):
+        return set()
+    if valor in ('cpu', 'memoria'):
+        return {valor}
+    return {'cpu', 'memoria'}
+
+
+class SesionPerfilado:
+    """
+    Perfil de CPU y/o memoria de una ejecución. Se usa a través de perfilar().
+    """
+
+    def __init__(self, nombre, modos, directorio=DIRECTORIO_PERFILES):
+        self.nombre = nombre
+        self.modos = set(modos)
+        self.directorio = directorio
+        self.perfil = None
+        self._inicio_tracemalloc = False
+        # Instantánea de memoria del momento con más memoria trazada visto hasta ahora
+        self._instantanea = None
+        self._memoria_instantanea = -1
+        self._etiqueta_instantanea = None
+        # Pico de memoria trazada (metricas.py lo reinicia al empezar cada etapa, por eso se acumula aquí)
+        self._pico = None
+
+    def iniciar(self):
+        if 'memoria' in self.modos:
+            self._inicio_tracemalloc = not tracemalloc.is_tracing()
+            if self._inicio_tracemalloc:
+                tracemalloc.start(CUADROS_TRACEMALLOC)
+        if 'cpu' in self.modos:
+            self.perfil = cProfile.Profile()
+            try:
+                self.perfil.enable()
+            except ValueError as e:
+                # "Another profiling tool is already active" (otro cProfile, un depurador, etc.)
+                print(f"⚠️ No se puede perfilar la CPU de '{self.nombre}': {e}")
+                self.perfil = None
+
+    def marcar_memoria(self, etiqueta):
+        """
+        Guarda una instantánea de la memoria si ahora hay más memoria trazada que en la anterior.
+        etiqueta es la etapa que acaba de terminar (None: el final de la ejecución).
+        """
+        if 'memoria' not in self.modos or not tracemalloc.is_tracing():
+            return
+        actual, pico = tracemalloc.get_traced_memory()
+        self._pico = max(pico, self._pico or 0)
+        if actual > self._memoria_instantanea:
+            # La instantánea puede tardar; su tiempo no se cuenta en el perfil de CPU
+            if self.perfil is not None:
+                self.perfil.disable()
+            self._instantanea = tracemalloc.take_snapshot()
+            if self.perfil is not None:
+                self.perfil.enable()
+            self._memoria_instantanea = actual
+            self._etiqueta_instantanea = etiqueta
+
+    def terminar(self):
+        """
+        Detiene los perfiladores, guarda los informes y muestra el resumen. Devuelve las rutas guardadas.
+        """
+        perfil, self.perfil = self.perfil, None
+        if perfil is not None:
+            perfil.disable()
+        self.marcar_memoria(None)
+        if self._inicio_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(self.directorio, exist_ok=True)
+        # El nombre puede venir de una tabla: solo letras, números y guiones bajos en el archivo
+        nombre_archivo = re.sub(r'\W+', '_', self.nombre)
+        base = os.path.join(self.directorio, f"{nombre_archivo}_{datetime.now():%Y%m%d_%H%M%S_%f}")
+        rutas = []
+        if perfil is not None:
+            ruta = base + '.prof'
+            perfil.dump_stats(ruta)
+            rutas.append(ruta)
+            print(formatear_funciones(pstats.Stats(perfil)))
+        if self._instantanea is not None:
+            estadisticas = _filtrar_instantanea(self._instantanea).statistics('lineno')
+            ruta = base + '_memoria.txt'
+            momento = ("al terminar" if self._etiqueta_instantanea is None
+                       else f"al terminar la etapa '{self._etiqueta_instantanea}'")
+            titulo = (f"Memoria reservada por línea de código en '{self.nombre}' {momento} "
+                      f"({_mb(self._memoria_instantanea)} MB trazados; pico de la ejecución: {_mb(self._pico)} MB)")
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(formatear_asignaciones(titulo, estadisticas[:ASIGNACIONES_EN_INFORME]) + '\n')
+            rutas.append(ruta)
+            print(formatear_asignaciones(f"\n🧠 {titulo}", estadisticas[:ASIGNACIONES_MOSTRADAS]))
+        if rutas:
+            print(f"📄 Perfil de '{self.nombre}' guardado en: {', '.join(rutas)}")
+        return rutas
+
+
+@contextmanager
+def perfilar(nombre, modos=None, directorio=DIRECTORIO_PERFILES):
+    """
+    Perfila el bloque con los modos indicados (por defecto, los de ETL_PERFILAR). Sin modos no hace nada.
+    El informe se guarda y se muestra aunque el bloque termine con una excepción.
+    """
+    modos = modos_solicitados() if modos is None else set(modos)
+    if not modos or _sesion_actual.get() is not None:
+        yield None
+        return
+    sesion = SesionPerfilado(nombre, modos, directorio)
+    token = _sesion_actual.set(sesion)
+    sesion.iniciar()
+    try:
+        yield sesion
+    finally:
+        _sesion_actual.reset(token)
+        try:
+            sesion.terminar()
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"⚠️ No se pudo guardar el perfil de '{nombre}': {e}")
+
+
+def marcar_memoria(etiqueta):
+    """
+    Punto de la ejecución en el que conviene mirar la memoria (p. ej. el final de una etapa).
+    Fuera de una sesión de perfilado de memoria no hace nada.
+    """
+    sesion = _sesion_actual.get()
+    if sesion is not None:
+        sesion.marcar_memoria(etiqueta)
+
+
+def _filtrar_instantanea(instantanea):
+    # Sin la memoria del propio tracemalloc ni la del sistema de importación
+    return instantanea.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ))
+
+
+def _mb(cantidad_bytes):
+    return '-' if cantidad_bytes is None else f"{cantidad_bytes / (1024 * 1024):,.1f}"
+
+
+def _archivo_corto(archivo):
+    # Carpeta y archivo, para distinguir p. ej. pandas/core/frame.py de otros frame.py
+    return os.path.join(os.path.basename(os.path.dirname(archivo)), os.path.basename(archivo))
+
+
+def _nombre_funcion(funcion):
+    archivo, linea, nombre = funcion
+    if archivo == '~':
+        # Funciones integradas (p. ej. "<method 'apply' of ...>")
+        return nombre
+    return f"{nombre} ({_archivo_corto(archivo)}:{linea})"
+
+
+def formatear_funciones(estadisticas, cantidad=FUNCIONES_MOSTRADAS):
+    """
+    Tabla de texto con las funciones de más tiempo acumulado de un pstats.Stats.
+    """
+    filas = sorted(estadisticas.stats.items(), key=lambda item: item[1][3], reverse=True)[:cantidad]
+    lineas = [
+        f"\n🔥 Funciones con más tiempo acumulado ({estadisticas.total_tt:.2f} s perfilados):",
+        f"  {'llamadas':>12}{'propio s':>10}{'acumulado s':>13}  función",
+    ]
+    for funcion, (_, llamadas, propio, acumulado, _) in filas:
+        lineas.append(f"  {llamadas:>12,}{propio:>10.3f}{acumulado:>13.3f}  {_nombre_funcion(funcion)}")
+    return '\n'.join(lineas)
+
+
+def formatear_asignaciones(titulo, estadisticas):
+    """
+    Tabla de texto con las líneas de código que más memoria tienen reservada (tracemalloc.Statistic).
+    """
+    lineas = [titulo, f"  {'MB':>10}{'bloques':>12}  línea"]
+    for estadistica in estadisticas:
+        cuadro = estadistica.traceback[0]
+        lineas.append(f"  {_mb(estadistica.size):>10}{estadistica.count:>12,}  "
+                      f"{_archivo_corto(cuadro.filename)}:{cuadro.lineno}")
+    return '\n'.join(lineas)
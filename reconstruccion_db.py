@@ -0,0 +1,51 @@
+import sqlite3
+from contextlib import contextmanager
+
+# --- Recarga de las bases de datos de los ETL sin bloquear a los lectores ---
+# Los ETL ya no borran su archivo .db antes de cargarlo: lo abren en modo WAL y reemplazan sus tablas
+# dentro de una única transacción. Mientras dura la carga, el visor (u otro lector) sigue viendo los
+# datos anteriores sin esperar ni recibir "database is locked"; al confirmar pasa a ver los nuevos.
+# Si la carga falla se deshace todo y la base de datos queda como estaba.
+
+# Segundos que se espera a otro escritor (p. ej. el visor creando un índice de orden)
+ESPERA_ESCRITURA_S = 30
+
+
+def activar_wal(ruta_db):
+    """
+    Pone la base de datos en modo WAL (queda guardado en el archivo). La crea si no existe.
+    """
+    conn = sqlite3.connect(ruta_db, timeout=ESPERA_ESCRITURA_S)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+    finally:
+        conn.close()
+
+
+def abrir_para_reconstruir(ruta_db, pragmas=()):
+    """
+    Abre la base de datos en modo WAL para recargarla con reconstruccion().
+    La conexión no abre transacciones implícitas (isolation_level=None): la transacción la controla
+    reconstruccion(). Los PRAGMA de carga se aplican aquí porque algunos (synchronous) no se
+    pueden cambiar dentro de una transacción.
+    """
+    conn = sqlite3.connect(ruta_db, timeout=ESPERA_ESCRITURA_S, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = WAL")
+    for pragma in pragmas:
+        conn.execute(pragma)
+    return conn
+
+
+@contextmanager
+def reconstruccion(conn):
+    """
+    Transacción de escritura (BEGIN IMMEDIATE) para borrar, recrear y cargar tablas de una sola vez.
+    Confirma al salir del bloque o deshace todo si se produce una excepción.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
@@ -0,0 +1,151 @@
+import contextvars
+import queue
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- Salida de logs de la interfaz ---
+# Los hilos de los ETL solo encolan el texto que imprimen; el hilo principal de Tk vacía la cola
+# cada pocos milisegundos e inserta todo lo acumulado de una sola vez. El cuadro de texto conserva
+# solo las últimas líneas y el log completo se guarda en un archivo.
+# sys.stdout se reemplaza una sola vez por un SalidaPorContexto: cada hilo elige con redirigir_salida()
+# en qué sumidero se escribe lo que imprime, así varios procesos pueden tener cada uno su propio log.
+
+# Archivo donde se guarda el log completo de la sesión
+ARCHIVO_LOG = 'registro_etl.log'
+# Cada cuánto se vacía la cola hacia el cuadro de texto (milisegundos)
+INTERVALO_VACIADO_MS = 100
+# Líneas que se conservan en el cuadro de texto
+MAX_LINEAS_VISIBLES = 5000
+# Fragmentos que se sacan de la cola en cada vaciado (si quedan más se vuelve a vaciar enseguida)
+MAX_FRAGMENTOS_POR_VACIADO = 20_000
+
+# Sumidero al que va lo que se imprime en el contexto actual (None = el sumidero general).
+# Los hilos nuevos empiezan con el valor por defecto: cada hilo fija el suyo con redirigir_salida().
+destino_salida = contextvars.ContextVar('destino_salida', default=None)
+
+
+@contextmanager
+def redirigir_salida(destino):
+    """
+    Envía a 'destino' (un objeto con write) lo que se imprima en este hilo dentro del bloque.
+    """
+    token = destino_salida.set(destino)
+    try:
+        yield destino
+    finally:
+        destino_salida.reset(token)
+
+
+class SalidaPorContexto:
+    """
+    Objeto tipo archivo para instalar como sys.stdout: cada write va al destino fijado con
+    redirigir_salida() en el contexto que escribe, o a 'destino_general' si no hay ninguno.
+    """
+
+    def __init__(self, destino_general):
+        self.destino_general = destino_general
+
+    def write(self, texto):
+        return (destino_salida.get() or self.destino_general).write(texto)
+
+    def flush(self):
+        pass
+
+
+class SumideroLog:
+    """
+    Objeto tipo archivo (write/flush) seguro para usar desde cualquier hilo como sys.stdout.
+    'widget_texto' es el CTkTextbox donde se muestra el log; 'raiz' es el widget de Tk
+    que programa los vaciados con after().
+    """
+
+    def __init__(self, widget_texto, raiz, archivo_log=ARCHIVO_LOG, max_lineas=MAX_LINEAS_VISIBLES,
+                 intervalo_ms=INTERVALO_VACIADO_MS):
+        self.widget_texto = widget_texto
+        self.raiz = raiz
+        self.max_lineas = max_lineas
+        self.intervalo_ms = intervalo_ms
+        self._cola = queue.SimpleQueue()
+        self._archivo = None
+        if archivo_log:
+            try:
+                self._archivo = open(archivo_log, 'a', encoding='utf-8')
+                self._archivo.write(f"\n===== Sesión iniciada {datetime.now():%Y-%m-%d %H:%M:%S} =====\n")
+            except OSError:
+                self._archivo = None
+        self._id_vaciado = self.raiz.after(self.intervalo_ms, self._vaciar)
+
+    # --- Interfaz de archivo (llamada desde cualquier hilo) ---
+    def write(self, texto):
+        if texto:
+            self._cola.put(texto)
+        return len(texto)
+
+    def flush(self):
+        pass
+
+    # --- Hilo principal de Tk ---
+    def _sacar_pendiente(self):
+        """
+        Saca de la cola hasta MAX_FRAGMENTOS_POR_VACIADO fragmentos y los devuelve unidos.
+        """
+        fragmentos = []
+        try:
+            while len(fragmentos) < MAX_FRAGMENTOS_POR_VACIADO:
+                fragmentos.append(self._cola.get_nowait())
+        except queue.Empty:
+            pass
+        return ''.join(fragmentos)
+
+    def _vaciar(self):
+        texto = self._sacar_pendiente()
+        if texto:
+            self._escribir(texto)
+        # Si la cola sigue con datos se vuelve a vaciar sin esperar el intervalo completo
+        demora = 1 if not self._cola.empty() else self.intervalo_ms
+        self._id_vaciado = self.raiz.after(demora, self._vaciar)
+
+    def _escribir(self, texto):
+        if self._archivo is not None:
+            self._archivo.write(texto)
+            self._archivo.flush()
+
+        # Solo hacen falta las últimas max_lineas líneas del lote
+        if texto.count('\n') > self.max_lineas:
+            texto = ''.join(texto.splitlines(keepends=True)[-self.max_lineas:])
+
+        self.widget_texto.configure(state="normal")
+        self.widget_texto.insert("end", texto)
+        lineas = int(self.widget_texto.index("end-1c").split('.')[0])
+        if lineas > self.max_lineas:
+            self.widget_texto.delete("1.0", f"{lineas - self.max_lineas + 1}.0")
+        self.widget_texto.see("end")
+        self.widget_texto.configure(state="disabled")
+
+    def limpiar(self):
+        """
+        Vacía el cuadro de texto. Lo que estaba pendiente en la cola se guarda en el archivo de log.
+        """
+        texto = self._sacar_pendiente()
+        while texto:
+            if self._archivo is not None:
+                self._archivo.write(texto)
+            texto = self._sacar_pendiente()
+        self.widget_texto.configure(state="normal")
+        self.widget_texto.delete("1.0", "end")
+        self.widget_texto.configure(state="disabled")
+
+    def cerrar(self):
+        """
+        Detiene el vaciado periódico, escribe lo pendiente en el archivo de log y lo cierra.
+        """
+        if self._id_vaciado is not None:
+            self.raiz.after_cancel(self._id_vaciado)
+            self._id_vaciado = None
+        if self._archivo is not None:
+            texto = self._sacar_pendiente()
+            while texto:
+                self._archivo.write(texto)
+                texto = self._sacar_pendiente()
+            self._archivo.close()
+            self._archivo = None
@@ -0,0 +1,500 @@
+import os
+import re
+import sqlite3
+import time
+
+# --- Visor paginado de tablas SQLite para la pestaña "Visualizar DB" ---
+# En lugar de cargar la tabla completa en pandas, las filas se leen por páginas con paginación
+# por clave (WHERE rowid > ? LIMIT ?) y el Treeview solo guarda una ventana de pocas páginas
+# alrededor de lo que se está viendo. Así el tiempo hasta mostrar la primera página
+# no depende del tamaño de la tabla.
+
+# Filas leídas en cada consulta
+TAMANO_PAGINA = 200
+# Páginas que se mantienen a la vez en el Treeview (la visible más las precargadas)
+PAGINAS_EN_VENTANA = 5
+# Fracción de la ventana desde el borde a la que se precarga la página siguiente/anterior
+UMBRAL_PRECARGA = 0.15
+# Filas usadas para estimar el ancho de las columnas
+FILAS_MUESTRA_ANCHOS = 1000
+# Conversión de caracteres a píxeles y límites de ancho de columna
+ANCHO_CARACTER_PX = 10
+ANCHO_MINIMO_COLUMNA_PX = 100
+ANCHO_MAXIMO_COLUMNA_PX = 600
+
+# Alias de rowid que se prueban en orden (una columna con el mismo nombre lo oculta)
+_ALIAS_ROWID = ('rowid', '_rowid_', 'oid')
+
+# Índices automáticos para ordenar: veces que se ordena una tabla por la misma columna antes de
+# crear un índice sobre ella, y filas mínimas de la tabla (en tablas chicas ORDER BY ya es rápido)
+ORDENES_PARA_INDICE = 2
+FILAS_MINIMAS_INDICE = 50_000
+PREFIJO_INDICE_VISOR = 'idx_visor_'
+# Espera máxima (segundos) si otra conexión está escribiendo en la base de datos al crear un índice
+ESPERA_ESCRITURA_S = 5
+
+# Operadores de los filtros por columna: texto mostrado -> plantilla SQL ({col} es la columna)
+OPERADORES_FILTRO = {
+    'contiene': "{col} LIKE ? ESCAPE '\\'",
+    'empieza con': "{col} LIKE ? ESCAPE '\\'",
+    '=': "{col} = ?",
+    '≠': "{col} <> ?",
+    '>': "{col} > ?",
+    '>=': "{col} >= ?",
+    '<': "{col} < ?",
+    '<=': "{col} <= ?",
+}
+
+
+def citar_identificador(nombre):
+    """
+    Devuelve el nombre entre comillas dobles para usarlo como identificador en SQL.
+    """
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+def firma_base_datos(ruta_db):
+    """
+    Devuelve (mtime, tamaño) de la base de datos y de su archivo WAL, para detectar si cambió.
+    Un WAL vacío cuenta como inexistente: aparece en cuanto alguien abre la base de datos para escribir,
+    sin que cambie ningún dato (si no, el índice FTS y el espacial se reconstruirían sin motivo).
+    """
+    firma = []
+    for ruta in (ruta_db, ruta_db + '-wal'):
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            firma.append(None)
+            continue
+        es_wal_vacio = ruta != ruta_db and estado.st_size == 0
+        firma.append(None if es_wal_vacio else (estado.st_mtime_ns, estado.st_size))
+    return tuple(firma)
+
+
+def escapar_like(texto):
+    """
+    Escapa %, _ y \\ para usar el texto literal en un LIKE ... ESCAPE '\\'.
+    """
+    return re.sub(r'([\\%_])', r'\\\1', texto)
+
+
+def condicion_filtro(columna, operador, valor):
+    """
+    Condición SQL parametrizada para un filtro por columna. Devuelve (sql, parametros).
+    Los valores se pasan como parámetros: SQLite los convierte a número si la columna es numérica.
+    """
+    if operador not in OPERADORES_FILTRO:
+        raise ValueError(f"Operador de filtro desconocido: '{operador}'.")
+    sql = OPERADORES_FILTRO[operador].format(col=f"t.{citar_identificador(columna)}")
+    if operador == 'contiene':
+        valor = f"%{escapar_like(valor)}%"
+    elif operador == 'empieza con':
+        valor = f"{escapar_like(valor)}%"
+    return sql, [valor]
+
+
+def columna_indexada(conn, tabla, columna):
+    """
+    Indica si algún índice de la tabla empieza por la columna (y sirve entonces para ORDER BY columna, rowid).
+    """
+    for indice in conn.execute(f"PRAGMA index_list({citar_identificador(tabla)})").fetchall():
+        columnas = conn.execute(f"PRAGMA index_info({citar_identificador(indice[1])})").fetchall()
+        if columnas and columnas[0][2] is not None and columnas[0][2].lower() == columna.lower():
+            return True
+    return False
+
+
+def filas_aproximadas(conn, tabla, alias_rowid='rowid'):
+    """
+    Estimación rápida del número de filas de una tabla con rowid (el mayor rowid; no recorre la tabla).
+    """
+    fila = conn.execute(f"SELECT max({alias_rowid}) FROM {citar_identificador(tabla)}").fetchone()
+    return fila[0] or 0
+
+
+def crear_indice_orden(ruta_db, tabla, columna):
+    """
+    Crea un índice sobre la columna para que ORDER BY columna y la paginación por (columna, rowid)
+    se resuelvan recorriendo el índice: cada entrada ya incluye el rowid, así que el índice cubre
+    el orden y la clave, y por página solo se leen de la tabla las filas mostradas.
+    Usa su propia conexión de escritura (puede ejecutarse en un hilo aparte). Devuelve el nombre del índice.
+    """
+    nombre = f"{PREFIJO_INDICE_VISOR}{tabla}_{columna}"
+    conn = sqlite3.connect(ruta_db, timeout=ESPERA_ESCRITURA_S)
+    try:
+        with conn:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {citar_identificador(nombre)} "
+                         f"ON {citar_identificador(tabla)} ({citar_identificador(columna)})")
+    finally:
+        conn.close()
+    return nombre
+
+
+def formatear_valor(valor):
+    """
+    Convierte un valor leído de SQLite en el texto que se muestra en el Treeview (None como vacío).
+    """
+    return "" if valor is None else str(valor)
+
+
+class PaginadorTabla:
+    """
+    Lee una tabla por páginas. Si la tabla tiene rowid usa paginación por clave (constante
+    en cualquier posición de la tabla); si no (vistas, tablas WITHOUT ROWID) usa LIMIT/OFFSET.
+    Cada página es una lista de tuplas (clave, valores), donde la clave sirve para pedir
+    la página siguiente o la anterior.
+    Con aplicar_filtros() las páginas se limitan a las filas que cumplen las condiciones,
+    que se resuelven en SQLite dentro de la misma consulta paginada.
+    """
+
+    def __init__(self, conn, tabla, tamano_pagina=TAMANO_PAGINA):
+        self.conn = conn
+        self.tabla = tabla
+        self.tamano_pagina = tamano_pagina
+        self._tabla_sql = citar_identificador(tabla)
+        cursor = conn.execute(f"SELECT * FROM {self._tabla_sql} LIMIT 0")
+        self.columnas = [descripcion[0] for descripcion in cursor.description]
+        self._columnas_sql = ", ".join(citar_identificador(columna) for columna in self.columnas)
+        self.alias_rowid = self._detectar_rowid()
+        self.ultima_consulta_ms = 0.0
+        self.orden = None  # (columna, descendente) o None para el orden natural
+        self.aplicar_filtros()
+
+    @property
+    def usa_rowid(self):
+        return self.alias_rowid is not None
+
+    def _detectar_rowid(self):
+        """
+        Devuelve el alias de rowid disponible para la tabla, o None si no tiene rowid.
+        """
+        tipo = self.conn.execute(
+            "SELECT type FROM sqlite_master WHERE name = ? COLLATE NOCASE", (self.tabla,)).fetchone()
+        if tipo is None or tipo[0] != 'table':
+            # Las vistas aceptan "rowid" pero devuelven NULL
+            return None
+        columnas = {columna.lower() for columna in self.columnas}
+        for alias in _ALIAS_ROWID:
+            if alias in columnas:
+                continue
+            try:
+                self.conn.execute(f"SELECT {alias} FROM {self._tabla_sql} LIMIT 0")
+                return alias
+            except sqlite3.OperationalError:
+                return None
+        return None
+
+    def aplicar_filtros(self, condiciones=(), indice_fts=None, consulta_fts=None):
+        """
+        Define qué filas devuelven las páginas.
+        - condiciones: lista de (sql, parametros) que deben cumplirse todas; las columnas se
+          nombran como t."columna" (ver condicion_filtro).
+        - indice_fts y consulta_fts: (esquema, tabla_fts) de un índice FTS5 cuyo rowid es el de
+          la tabla, y la expresión MATCH a buscar. Solo se usa si la tabla tiene rowid.
+        """
+        desde = f"{self._tabla_sql} AS t"
+        donde, parametros = [], []
+        self._clave_sql = f"t.{self.alias_rowid}" if self.usa_rowid else None
+        if indice_fts is not None and consulta_fts and self.usa_rowid:
+            esquema, tabla_fts = indice_fts
+            # Se recorre el índice FTS en orden de rowid y se une con la tabla por clave primaria
+            desde = f"{esquema}.{tabla_fts} AS f JOIN {desde} ON t.{self.alias_rowid} = f.rowid"
+            donde.append(f"f.{tabla_fts} MATCH ?")
+            parametros.append(consulta_fts)
+            self._clave_sql = "f.rowid"
+        for sql, valores in condiciones:
+            donde.append(f"({sql})")
+            parametros.extend(valores)
+        self._desde = desde
+        self._donde = donde
+        self._parametros = parametros
+        self._columnas_t_sql = ", ".join(f"t.{citar_identificador(columna)}" for columna in self.columnas)
+
+    def ordenar_por(self, columna=None, descendente=False):
+        """
+        Ordena las páginas por una columna (ORDER BY en SQLite), o vuelve al orden natural si es None.
+        Con rowid la clave de cada fila pasa a ser (valor, rowid) y la paginación sigue siendo
+        por clave; el rowid desempata las filas con el mismo valor.
+        """
+        self.orden = (columna, descendente) if columna is not None else None
+
+    @property
+    def filtrado(self):
+        return bool(self._donde)
+
+    def _orden_sql(self, invertir=False):
+        """
+        Cláusula ORDER BY del orden actual. 'invertir' da el orden exactamente opuesto
+        (en SQLite los NULL van primero en ASC y último en DESC, así que basta con cambiar el sentido).
+        """
+        descendente = invertir
+        partes = []
+        if self.orden is not None:
+            columna, descendente = self.orden
+            descendente = descendente != invertir
+            partes.append(f"t.{citar_identificador(columna)} {'DESC' if descendente else 'ASC'}")
+        if self._clave_sql is not None:
+            partes.append(f"{self._clave_sql} {'DESC' if descendente else 'ASC'}")
+        return f" ORDER BY {', '.join(partes)}" if partes else ""
+
+    def _condicion_despues(self, clave, invertir=False):
+        """
+        Condición (sql, parametros) de las filas que van después de 'clave' en el orden actual
+        (o en el opuesto si 'invertir'). Con orden por columna los NULL se tratan aparte,
+        porque no se pueden comparar con > o <.
+        """
+        if self.orden is None:
+            return f"{self._clave_sql} {'<' if invertir else '>'} ?", [clave]
+        columna, descendente = self.orden
+        descendente = descendente != invertir
+        col = f"t.{citar_identificador(columna)}"
+        valor, id_fila = clave
+        mayor = '<' if descendente else '>'
+        if valor is None:
+            # ASC: los NULL van primero, después vienen el resto de NULL y todos los valores
+            # DESC: los NULL van al final, después solo quedan los NULL con rowid posterior
+            sql = f"({col} IS NULL AND {self._clave_sql} {mayor} ?)"
+            if not descendente:
+                sql = f"({sql} OR {col} IS NOT NULL)"
+            return sql, [id_fila]
+        sql = f"{col} {mayor} ? OR ({col} = ? AND {self._clave_sql} {mayor} ?)"
+        if descendente:
+            sql += f" OR {col} IS NULL"
+        return f"({sql})", [valor, valor, id_fila]
+
+    def _where(self, *extra):
+        partes = self._donde + list(extra)
+        return f" WHERE {' AND '.join(partes)}" if partes else ""
+
+    def _consultar(self, consulta, parametros):
+        inicio = time.perf_counter()
+        filas = self.conn.execute(consulta, parametros).fetchall()
+        # Duración de la última consulta, para mostrarla en la interfaz
+        self.ultima_consulta_ms = (time.perf_counter() - inicio) * 1000
+        return filas
+
+    def _pagina_por_clave(self, clave=None, invertir=False):
+        """
+        Página que sigue a 'clave' (o la primera si es None) en el orden actual, o que la precede
+        si 'invertir'. Se devuelve siempre en el orden actual.
+        """
+        extra, parametros_clave = [], []
+        if clave is not None:
+            condicion, parametros_clave = self._condicion_despues(clave, invertir)
+            extra.append(condicion)
+        columna_orden = ""
+        if self.orden is not None:
+            columna_orden = f"t.{citar_identificador(self.orden[0])}, "
+        filas = self._consultar(
+            f"SELECT {columna_orden}{self._clave_sql}, {self._columnas_t_sql} FROM {self._desde}"
+            f"{self._where(*extra)}{self._orden_sql(invertir)} LIMIT ?",
+            self._parametros + parametros_clave + [self.tamano_pagina])
+        if self.orden is not None:
+            paginas = [((fila[0], fila[1]), fila[2:]) for fila in filas]
+        else:
+            paginas = [(fila[0], fila[1:]) for fila in filas]
+        return paginas[::-1] if invertir else paginas
+
+    def primera_pagina(self):
+        """
+        Devuelve la primera página de la tabla.
+        """
+        if self.usa_rowid:
+            return self._pagina_por_clave()
+        return self._pagina_por_desplazamiento(0)
+
+    def pagina_despues(self, clave):
+        """
+        Devuelve la página que sigue a la fila con la clave dada.
+        """
+        if self.usa_rowid:
+            return self._pagina_por_clave(clave)
+        return self._pagina_por_desplazamiento(clave + 1)
+
+    def pagina_antes(self, clave):
+        """
+        Devuelve la página que precede a la fila con la clave dada, en orden ascendente.
+        """
+        if self.usa_rowid:
+            return self._pagina_por_clave(clave, invertir=True)
+        inicio = max(clave - self.tamano_pagina, 0)
+        return self._pagina_por_desplazamiento(inicio, clave - inicio)
+
+    def _pagina_por_desplazamiento(self, inicio, cantidad=None):
+        """
+        Página por LIMIT/OFFSET: la clave de cada fila es su posición en el resultado.
+        """
+        cantidad = self.tamano_pagina if cantidad is None else cantidad
+        if cantidad <= 0:
+            return []
+        filas = self._consultar(
+            f"SELECT {self._columnas_t_sql} FROM {self._desde}{self._where()}{self._orden_sql()} LIMIT ? OFFSET ?",
+            self._parametros + [cantidad, inicio])
+        return [(inicio + posicion, fila) for posicion, fila in enumerate(filas)]
+
+    def anchos_columnas(self, filas_muestra=FILAS_MUESTRA_ANCHOS):
+        """
+        Calcula el ancho en píxeles de cada columna con max(length()) sobre las primeras filas de la tabla.
+        """
+        maximos = ", ".join(f"max(length({citar_identificador(columna)}))" for columna in self.columnas)
+        fila = self.conn.execute(
+            f"SELECT {maximos} FROM (SELECT {self._columnas_sql} FROM {self._tabla_sql} LIMIT ?)",
+            (filas_muestra,)).fetchone()
+        anchos = {}
+        for columna, largo in zip(self.columnas, fila):
+            ancho = max((largo or 0) * ANCHO_CARACTER_PX, len(columna) * ANCHO_CARACTER_PX, ANCHO_MINIMO_COLUMNA_PX)
+            anchos[columna] = min(ancho, ANCHO_MAXIMO_COLUMNA_PX)
+        return anchos
+
+
+class VisorTablaVirtual:
+    """
+    Muestra un PaginadorTabla en un ttk.Treeview manteniendo solo una ventana de páginas.
+    Cuando el desplazamiento se acerca al final (o al principio) de la ventana se carga la página
+    siguiente (o anterior) y se descarta la del extremo opuesto.
+    'al_cambiar_rango' se llama con (primera_fila, ultima_fila, hay_mas) cada vez que cambia la ventana.
+    'al_ordenar' se llama con el nombre de la columna cuando se hace clic en su encabezado.
+    """
+
+    def __init__(self, treeview, scrollbar, paginas_en_ventana=PAGINAS_EN_VENTANA, al_cambiar_rango=None,
+                 al_ordenar=None):
+        self.treeview = treeview
+        self.scrollbar = scrollbar
+        self.paginas_en_ventana = paginas_en_ventana
+        self.al_cambiar_rango = al_cambiar_rango
+        self.al_ordenar = al_ordenar
+        self.paginador = None
+        self._paginas = []           # Lista de páginas cargadas: cada una es una lista de (iid, clave)
+        self._fila_inicial = 0       # Posición (base 0) de la primera fila cargada
+        self._hay_anterior = False
+        self._hay_siguiente = False
+        self._carga_pendiente = False
+        self._generacion = 0         # Para distinguir los ids de filas de tablas mostradas antes
+        self.treeview.configure(yscrollcommand=self._al_desplazar)
+
+    # --- Ciclo de vida ---
+    def mostrar(self, paginador, anchos=None):
+        """
+        Configura las columnas y muestra la primera página del paginador.
+        Devuelve False si la tabla está vacía.
+        """
+        self.limpiar()
+        self.paginador = paginador
+        self.treeview["columns"] = list(paginador.columnas)
+        self.treeview.column("#0", width=0, stretch=False)
+        anchos = anchos or paginador.anchos_columnas()
+        orden = paginador.orden or (None, False)
+        for columna in paginador.columnas:
+            flecha = (" ▼" if orden[1] else " ▲") if columna == orden[0] else ""
+            comando = (lambda columna=columna: self.al_ordenar(columna)) if self.al_ordenar else ""
+            self.treeview.heading(columna, text=f"{columna}{flecha}", anchor="w", command=comando)
+            self.treeview.column(columna, width=anchos[columna], minwidth=20, stretch=True, anchor="w")
+
+        pagina = paginador.primera_pagina()
+        if not pagina:
+            return False
+        self._agregar_pagina(pagina, al_final=True)
+        self._hay_siguiente = len(pagina) == paginador.tamano_pagina
+        self.treeview.yview_moveto(0)
+        self._notificar_rango()
+        return True
+
+    def limpiar(self):
+        """
+        Vacía el Treeview y olvida el paginador actual.
+        """
+        children = self.treeview.get_children()
+        if children:
+            self.treeview.delete(*children)
+        self.paginador = None
+        self._paginas = []
+        self._fila_inicial = 0
+        self._hay_anterior = False
+        self._hay_siguiente = False
+        self._generacion += 1
+
+    @property
+    def filas_cargadas(self):
+        return sum(len(pagina) for pagina in self._paginas)
+
+    # --- Manejo de páginas ---
+    def _agregar_pagina(self, pagina, al_final):
+        posicion = "end" if al_final else 0
+        registros = []
+        for indice, (clave, valores) in enumerate(pagina if al_final else reversed(pagina)):
+            # Con orden por columna la clave es (valor, rowid): basta el rowid para identificar la fila
+            iid = f"{self._generacion}:{clave[-1] if isinstance(clave, tuple) else clave}"
+            self.treeview.insert("", posicion, iid=iid, values=[formatear_valor(valor) for valor in valores])
+            registros.append((iid, clave))
+        if not al_final:
+            registros.reverse()
+        if al_final:
+            self._paginas.append(registros)
+        else:
+            self._paginas.insert(0, registros)
+
+    def _quitar_pagina(self, del_final):
+        pagina = self._paginas.pop() if del_final else self._paginas.pop(0)
+        self.treeview.delete(*[iid for iid, _ in pagina])
+        return len(pagina)
+
+    def _al_desplazar(self, primero, ultimo):
+        """
+        yscrollcommand del Treeview: actualiza la barra y programa la precarga si hace falta.
+        """
+        self.scrollbar.set(primero, ultimo)
+        if self.paginador is None or self._carga_pendiente:
+            return
+        primero, ultimo = float(primero), float(ultimo)
+        if (ultimo >= 1.0 - UMBRAL_PRECARGA and self._hay_siguiente) or \
+           (primero <= UMBRAL_PRECARGA and self._hay_anterior):
+            self._carga_pendiente = True
+            self.treeview.after_idle(self._precargar)
+
+    def _precargar(self):
+        self._carga_pendiente = False
+        if self.paginador is None or not self._paginas:
+            return
+        primero, ultimo = (float(valor) for valor in self.treeview.yview())
+        if ultimo >= 1.0 - UMBRAL_PRECARGA and self._hay_siguiente:
+            self._cargar_siguiente(primero)
+        elif primero <= UMBRAL_PRECARGA and self._hay_anterior:
+            self._cargar_anterior(primero)
+
+    def _cargar_siguiente(self, primero):
+        total = self.filas_cargadas
+        fila_superior = primero * total
+        pagina = self.paginador.pagina_despues(self._paginas[-1][-1][1])
+        self._hay_siguiente = len(pagina) == self.paginador.tamano_pagina
+        if not pagina:
+            return
+        self._agregar_pagina(pagina, al_final=True)
+        if len(self._paginas) > self.paginas_en_ventana:
+            quitadas = self._quitar_pagina(del_final=False)
+            self._fila_inicial += quitadas
+            self._hay_anterior = True
+            fila_superior -= quitadas
+        # Mantiene a la vista las mismas filas que antes de cambiar la ventana
+        self.treeview.yview_moveto(max(fila_superior, 0) / self.filas_cargadas)
+        self._notificar_rango()
+
+    def _cargar_anterior(self, primero):
+        total = self.filas_cargadas
+        fila_superior = primero * total
+        pagina = self.paginador.pagina_antes(self._paginas[0][0][1])
+        if not pagina:
+            self._hay_anterior = False
+            return
+        self._agregar_pagina(pagina, al_final=False)
+        self._fila_inicial -= len(pagina)
+        self._hay_anterior = self._fila_inicial > 0
+        fila_superior += len(pagina)
+        if len(self._paginas) > self.paginas_en_ventana:
+            self._quitar_pagina(del_final=True)
+            self._hay_siguiente = True
+        self.treeview.yview_moveto(fila_superior / self.filas_cargadas)
+        self._notificar_rango()
+
+    def _notificar_rango(self):
+        if self.al_cambiar_rango is not None:
+            self.al_cambiar_rango(self._fila_inicial + 1, self._fila_inicial + self.filas_cargadas, self._hay_siguiente)